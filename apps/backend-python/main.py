@@ -4,9 +4,12 @@ import json
 import logging
 import asyncio
 import os
+import importlib.util
+from functools import lru_cache
 from typing import List, Optional
 
 from fastapi import FastAPI, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 
 from factory import StructuralFactory
@@ -26,6 +29,17 @@ from analysis.solver import (
 # AI Mock Mode - Set to False to use real AI API
 USE_MOCK_AI = os.getenv("USE_MOCK_AI", "True").lower() == "true"
 
+# Sparse solver module (services/solver-python/solver.py). Deployments bundle it
+# next to this file as sparse_solver.py; SPARSE_SOLVER_PATH overrides both.
+SPARSE_SOLVER_PATHS = [
+    path for path in (
+        os.getenv("SPARSE_SOLVER_PATH", ""),
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), "sparse_solver.py"),
+        os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                     "..", "..", "services", "solver-python", "solver.py"),
+    ) if path
+]
+
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -372,6 +386,75 @@ async def analyze_simple_frame(request_data: dict):
         raise HTTPException(status_code=500, detail=str(exc))
 
 
+# ============================================================================
+# SPARSE SOLVER ENDPOINT (in-process SciPy solver for large models)
+# ============================================================================
+
+@lru_cache(maxsize=1)
+def load_sparse_solver():
+    """Import the sparse solver module from the first path that exists."""
+    for path in SPARSE_SOLVER_PATHS:
+        if os.path.isfile(path):
+            spec = importlib.util.spec_from_file_location("sparse_solver", path)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            return module
+    raise ImportError(f"Sparse solver not found in: {', '.join(SPARSE_SOLVER_PATHS)}")
+
+
+@app.post("/analyze/sparse", tags=["analysis"])
+async def analyze_sparse(request_data: dict):
+    """
+    Large-model 3D frame analysis with the sparse (SciPy) solver, run in-process.
+    
+    Accepts the same model JSON as services/solver-python/solver.py (nodes,
+    members, supports, loads, optional constraints/config/...) and returns its
+    result: displacements, reactions, nodalDisplacements, timing, solverInfo.
+    With config.profile set, the result also holds the per-stage "profile".
+    Time-history frames come back in the result. Fields naming server paths
+    (timeHistory.output.file, config.checkpoint.dir, config.outOfCore.scratchDir)
+    are only available from the command line; out-of-core scratch files go
+    to the server's temp directory.
+    """
+    config = request_data.get("config") or {}
+    client_paths = {
+        "timeHistory.output.file": ((request_data.get("timeHistory") or {}).get("output") or {}, "file"),
+        "config.checkpoint.dir": (config.get("checkpoint") or {}, "dir"),
+        "config.outOfCore.scratchDir": (config.get("outOfCore") or {}, "scratchDir"),
+    }
+    for name, (spec, key) in client_paths.items():
+        if isinstance(spec, dict) and key in spec:
+            raise HTTPException(status_code=400, detail=f"{name} is not supported over HTTP")
+    
+    try:
+        sparse_solver = load_sparse_solver()
+    except ImportError as exc:
+        logger.error(f"[Sparse] {str(exc)}")
+        raise HTTPException(status_code=503, detail="Sparse solver not available")
+    
+    def log_progress(stage: str, progress: int, message: str):
+        logger.debug(f"[Sparse] {stage} {progress}%: {message}")
+    
+    logger.info(f"[Sparse] Analyzing {len(request_data.get('nodes', []))} nodes, "
+                f"{len(request_data.get('members', []))} members")
+    try:
+        # CPU-bound; keep the event loop free while it runs
+        result = await run_in_threadpool(
+            sparse_solver.analyze, request_data, progress_callback=log_progress
+        )
+    except sparse_solver.SolverError as exc:
+        detail = f"{exc.error}: {exc.details}" if exc.details else exc.error
+        logger.warning(f"[Sparse] Analysis failed: {detail}")
+        raise HTTPException(status_code=400, detail=detail)
+    except Exception as exc:
+        logger.error(f"[Sparse] Error: {str(exc)}")
+        raise HTTPException(status_code=500, detail=f"Sparse analysis failed: {str(exc)}")
+    
+    logger.info(f"[Sparse] Complete in {result['timing']['total']:.0f} ms "
+                f"({result['solverInfo'].get('method')})")
+    return result
+
+
 @app.post("/template/{template_type}", tags=["generation"], response_model=StructuralModel)
 async def generate_template(
     template_type: str,
@@ -32,9 +32,12 @@ interface CloudAnalysisJob {
   createdAt: Date;
   updatedAt: Date;
   result?: any;
+  profile?: any;
+  frames?: Array<{ time: number; displacements: Record<string, number[]> }>;  // Time-history output frames
   error?: string;
   nodeCount: number;
   memberCount: number;
+  attempts: number;
 }
 
 interface AnalysisInputData {
@@ -50,6 +53,10 @@ interface AnalysisInputData {
     G?: number;
     J?: number;
     beta?: number;
+    tensionOnly?: boolean;
+    compressionOnly?: boolean;
+    density?: number;
+    plasticMoment?: number | { y?: number; z?: number };
   }>;
   supports: Array<{
     nodeId: string;
@@ -59,6 +66,7 @@ interface AnalysisInputData {
     rx: boolean;
     ry: boolean;
     rz: boolean;
+    compressionOnly?: string[];  // e.g. ['dy'], or ['-dy'] for a bearing above the node
   }>;
   loads: Array<{
     nodeId: string;
@@ -68,11 +76,59 @@ interface AnalysisInputData {
     mx?: number;
     my?: number;
     mz?: number;
+    case?: string;
   }>;
+  combinations?: Array<{ id: string; factors: Record<string, number> }>;
+  timeHistory?: {
+    dt: number;
+    steps?: number;
+    duration?: number;
+    loads?: Array<{ case?: string; time?: number[]; dt?: number; factor: number[] }>;
+    groundMotion?: {
+      direction: 'dx' | 'dy' | 'dz';
+      time?: number[];
+      dt?: number;
+      acceleration: number[];
+      scale?: number;
+    };
+    density?: number;
+    masses?: Array<{ nodeId: string; mass: number }>;
+    damping?: { ratio: number; frequencies: [number, number] } | { alpha?: number; beta?: number };
+    newmark?: { beta?: number; gamma?: number };
+    output?: { every?: number; nodeIds?: string[] };
+  };
+  responseSpectrum?: {
+    modes?: number;
+    combination?: 'cqc' | 'srss';
+    damping?: number;
+    spectrum: { period: number[]; acceleration: number[]; scale?: number };
+    directions?: Array<{ direction: 'dx' | 'dy' | 'dz'; scale?: number }>;
+    density?: number;
+    masses?: Array<{ nodeId: string; mass: number }>;
+  };
+  pushover?: {
+    controlNodeId: string;
+    controlDof?: 'dx' | 'dy' | 'dz';
+    case?: string;
+    gravityCase?: string;
+    targetDisplacement?: number;
+    maxEvents?: number;
+  };
   config?: {
     useIterative?: boolean;
     tolerance?: number;
     maxIterations?: number;
+    preconditioner?: 'ilu' | 'jacobi' | 'block-jacobi' | 'none';
+    precision?: 'double' | 'mixed';
+    outOfCore?: boolean | { memoryLimitMB?: number };
+    truss?: boolean;
+    planar?: boolean;
+    symmetry?: boolean;
+    matrixFree?: boolean;
+    threads?: number | 'auto';
+    activeSet?: boolean;
+    activeSetIterations?: number;
+    profile?: boolean | { topN?: number };
   };
 }
 
@@ -116,8 +172,16 @@ function getSolverPath(): string {
   );
 }
 
+// Relaunches (with --resume) of a solver process that was killed or lost
+const MAX_SOLVER_RESTARTS = parseInt(process.env.SOLVER_MAX_RESTARTS || '2', 10);
+
+// Exit code of a process killed with SIGKILL as reported through a shell
+// wrapper, which is how the OOM killer usually surfaces
+const OOM_EXIT_CODE = 137;
+
 /**
- * Spawn Python solver process
+ * Run the Python solver for a job, checkpointing iterative solves so a
+ * killed process (OOM, preemption) resumes instead of starting over
  */
 async function runPythonSolver(
   jobId: string,
@@ -133,9 +197,23 @@ async function runPythonSolver(
   // Write input to temp file
   const tempDir = os.tmpdir();
   const inputFile = path.join(tempDir, `beamlab-${jobId}.json`);
+  const checkpointDir = path.join(tempDir, `beamlab-${jobId}-checkpoint`);
+  const scratchDir = path.join(tempDir, `beamlab-${jobId}-scratch`);
+  // Checkpoint and scratch locations are always server-owned, never taken from the client
+  const outOfCore = inputData.config?.outOfCore;
+  const config = {
+    ...inputData.config,
+    checkpoint: { dir: checkpointDir },
+    ...(outOfCore ? {
+      outOfCore: {
+        memoryLimitMB: typeof outOfCore === 'object' ? outOfCore.memoryLimitMB : undefined,
+        scratchDir,
+      },
+    } : {}),
+  };
   
   try {
-    await fs.writeFile(inputFile, JSON.stringify(inputData));
+    await fs.writeFile(inputFile, JSON.stringify({ ...inputData, config }));
   } catch (error) {
     job.status = 'failed';
     job.error = `Failed to write input file: ${error}`;
@@ -143,11 +221,36 @@ async function runPythonSolver(
     return;
   }
   
-  // Spawn Python process
+  const cleanup = async () => {
+    try {
+      await fs.rm(inputFile, { force: true });
+      await fs.rm(checkpointDir, { recursive: true, force: true });
+      await fs.rm(scratchDir, { recursive: true, force: true });
+    } catch {
+      // Ignore cleanup errors
+    }
+  };
+  
+  spawnSolver(job, inputFile, false, cleanup);
+}
+
+/**
+ * Spawn Python solver process
+ */
+function spawnSolver(
+  job: CloudAnalysisJob,
+  inputFile: string,
+  resume: boolean,
+  cleanup: () => Promise<void>
+): void {
+  const jobId = job.id;
   const solverPath = getSolverPath();
   const pythonCmd = process.env.PYTHON_CMD || 'python3';
+  const args = resume ? [solverPath, '--resume', inputFile] : [solverPath, inputFile];
+  job.attempts += 1;
+  job.frames = undefined;  // A relaunched time history starts again from t = 0
   
-  const child = spawn(pythonCmd, [solverPath, inputFile], {
+  const child = spawn(pythonCmd, args, {
     stdio: ['pipe', 'pipe', 'pipe'],
     env: {
       ...process.env,
@@ -175,6 +278,13 @@ async function runPythonSolver(
           job.stage = msg.data.stage;
           job.message = msg.data.message;
           job.updatedAt = new Date();
+        } else if (msg.type === 'frame') {
+          job.frames = job.frames || [];
+          job.frames.push(msg.data);
+          job.updatedAt = new Date();
+        } else if (msg.type === 'profile') {
+          job.profile = msg.data;
+          job.updatedAt = new Date();
         } else if (msg.type === 'result') {
           job.status = 'completed';
           job.progress = 100;
@@ -198,19 +308,26 @@ async function runPythonSolver(
   });
   
   // Handle process exit
-  child.on('close', async (code) => {
-    processes.delete(jobId);
+  child.on('close', async (code, signal) => {
+    if (processes.get(jobId) === child) {
+      processes.delete(jobId);
+    }
     
-    // Clean up temp file
-    try {
-      await fs.unlink(inputFile);
-    } catch {
-      // Ignore cleanup errors
+    // Killed by a signal or the OOM killer: continue from the last checkpoint.
+    // Any other failure would just fail again on resume.
+    const killed = signal !== null || code === OOM_EXIT_CODE;
+    if (job.status === 'running' && killed && job.attempts <= MAX_SOLVER_RESTARTS) {
+      job.message = `Solver process lost (${signal || `exit code ${code}`}), resuming from checkpoint`;
+      job.updatedAt = new Date();
+      spawnSolver(job, inputFile, true, cleanup);
+      return;
     }
     
+    await cleanup();
+    
     if (code !== 0 && job.status !== 'completed' && job.status !== 'cancelled') {
       job.status = 'failed';
-      job.error = stderr || `Process exited with code ${code}`;
+      job.error = job.error || stderr || `Process exited with code ${code}`;
       job.updatedAt = new Date();
     }
   });
@@ -249,6 +366,10 @@ router.post('/cloud', async (req: Request, res: Response) => {
     if (!inputData.loads || !Array.isArray(inputData.loads)) {
       return res.status(400).json({ error: 'Invalid or missing loads array' });
     }
+    // Frames come back with the job; the solver never writes client-chosen paths
+    if ((inputData.timeHistory?.output as { file?: unknown } | undefined)?.file !== undefined) {
+      return res.status(400).json({ error: 'timeHistory.output.file is not supported; frames are returned with the job' });
+    }
     
     // Create job
     const jobId = randomUUID();
@@ -262,6 +383,7 @@ router.post('/cloud', async (req: Request, res: Response) => {
       updatedAt: new Date(),
       nodeCount: inputData.nodes.length,
       memberCount: inputData.members.length,
+      attempts: 0,
     };
     
     jobs.set(jobId, job);
@@ -322,6 +444,14 @@ router.get('/cloud/:id', (req: Request, res: Response) => {
     response.result = job.result;
   }
   
+  if (job.profile) {
+    response.profile = job.profile;
+  }
+  
+  if (job.frames) {
+    response.frames = job.frames;
+  }
+  
   if (job.status === 'failed' && job.error) {
     response.error = job.error;
   }
@@ -123,6 +123,13 @@ export interface AnalysisResult {
     nnz: number;
     density: number;
     memorySavedMB: number;
+    format?: 'csr' | 'bsr';
+    indexMB?: number;
+    elementCache?: {
+      elements: number;
+      unique: number;
+      hitRate: number;
+    };
   };
 }
 
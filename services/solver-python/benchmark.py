@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+"""
+benchmark.py - Benchmark suite for the sparse structural solver
+
+Generates parametric models (3D frame grids, braced towers and pin-jointed
+space trusses) from 1k to 500k nodes and runs every solver path: direct
+(SuperLU), CG with each preconditioner, and matrix-free CG. Each case runs
+in its own process, so its peak RSS is not inflated by earlier, larger
+cases. Records per-stage timing from the solver, peak traced memory and
+peak RSS, and writes the results as JSON and CSV so runs from different
+versions can be compared.
+
+Usage:
+    python benchmark.py                          # Full suite (1k-500k nodes)
+    python benchmark.py --quick                  # Small sizes only
+    python benchmark.py --families grid --sizes 1000 20000 --paths direct cg-jacobi
+    python benchmark.py --quick --baseline results/benchmark-20260101-120000.json
+"""
+
+import argparse
+import csv
+import gc
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import scipy
+
+import solver as sparse_solver
+
+
+SIZES = [1000, 10000, 100000, 500000]
+QUICK_SIZES = [1000, 5000]
+
+# Solver path -> StructuralSolver.solve() arguments
+PATHS = {
+    "direct": {"use_iterative": False},
+    "direct-mixed": {"use_iterative": False, "precision": "mixed"},
+    "cg-ilu": {"use_iterative": True, "preconditioner": "ilu"},
+    "cg-jacobi": {"use_iterative": True, "preconditioner": "jacobi"},
+    "cg-block-jacobi": {"use_iterative": True, "preconditioner": "block-jacobi"},
+    "cg-matrix-free": {"use_iterative": True, "preconditioner": "block-jacobi", "matrix_free": True},
+    "cg-none": {"use_iterative": True, "preconditioner": "none"},
+}
+
+SECTION = {"E": 200e9, "A": 0.01, "Iy": 1e-4, "Iz": 1e-4, "G": 80e9, "J": 1.5e-4}
+FIXED = {"dx": True, "dy": True, "dz": True, "rx": True, "ry": True, "rz": True}
+PINNED_ENDS = {"startMomentY": True, "startMomentZ": True, "startTorsion": True,
+               "endMomentY": True, "endMomentZ": True}
+
+# Timing stages reported by StructuralSolver.solve()
+STAGES = ["assembly", "boundary_conditions", "solve", "postprocessing", "total"]
+
+
+# ============================================================================
+# MODEL GENERATORS
+# ============================================================================
+
+def _model(coords: np.ndarray, connectivity: np.ndarray, section: Dict[str, Any],
+           supports: List[Dict[str, Any]], loads: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Build solver input from node coordinates and member connectivity."""
+    nodes = [{"id": f"n{i}", "x": float(x), "y": float(y), "z": float(z)}
+             for i, (x, y, z) in enumerate(coords)]
+    members = [dict(section, id=f"m{i}", startNodeId=f"n{a}", endNodeId=f"n{b}")
+               for i, (a, b) in enumerate(connectivity)]
+    return {"nodes": nodes, "members": members, "supports": supports, "loads": loads}
+
+
+def _grid_shape(target_nodes: int) -> Tuple[int, int, int]:
+    """(levels, k, k) node grid of generate_grid."""
+    k = max(2, int(round((2 * target_nodes) ** (1 / 3))))
+    storeys = max(1, int(round(target_nodes / (k * k))) - 1)
+    return storeys + 1, k, k
+
+
+def generate_grid(target_nodes: int) -> Dict[str, Any]:
+    """Multi-storey 3D frame: k x k columns, about k/2 storeys, fixed bases."""
+    shape = _grid_shape(target_nodes)
+    index = np.arange(np.prod(shape)).reshape(shape)
+    level, i, j = np.indices(shape)
+    coords = np.stack([4.0 * i, 3.5 * level, 4.0 * j], axis=-1).reshape(-1, 3)
+
+    connectivity = np.vstack([
+        np.stack([index[:-1].ravel(), index[1:].ravel()], axis=1),            # Columns
+        np.stack([index[1:, :-1].ravel(), index[1:, 1:].ravel()], axis=1),    # Beams along x
+        np.stack([index[1:, :, :-1].ravel(), index[1:, :, 1:].ravel()], axis=1),  # Beams along z
+    ])
+    supports = [dict(FIXED, nodeId=f"n{n}") for n in index[0].ravel()]
+    loads = [{"nodeId": f"n{n}", "fx": 2000.0, "fy": -10000.0} for n in index[1:].ravel()]
+    return _model(coords, connectivity, SECTION, supports, loads)
+
+
+def _tower_shape(target_nodes: int) -> Tuple[int, int, int]:
+    """(levels, k, k) node grid of generate_tower."""
+    k = max(2, int(round((target_nodes / 6) ** (1 / 3))))
+    levels = max(1, int(round(target_nodes / (k * k))) - 1)
+    return levels + 1, k, k
+
+
+def generate_tower(target_nodes: int) -> Dict[str, Any]:
+    """Slender braced tower: k x k plan, about 6k levels, X-bracing on two faces."""
+    shape = _tower_shape(target_nodes)
+    index = np.arange(np.prod(shape)).reshape(shape)
+    level, i, j = np.indices(shape)
+    coords = np.stack([3.0 * i, 3.0 * level, 3.0 * j], axis=-1).reshape(-1, 3)
+
+    face_x, face_z = index[:, :, 0], index[:, 0, :]
+    connectivity = np.vstack([
+        np.stack([index[:-1].ravel(), index[1:].ravel()], axis=1),
+        np.stack([index[1:, :-1].ravel(), index[1:, 1:].ravel()], axis=1),
+        np.stack([index[1:, :, :-1].ravel(), index[1:, :, 1:].ravel()], axis=1),
+        # Diagonal braces on the x = 0 and z = 0 faces
+        np.stack([face_x[:-1, :-1].ravel(), face_x[1:, 1:].ravel()], axis=1),
+        np.stack([face_x[:-1, 1:].ravel(), face_x[1:, :-1].ravel()], axis=1),
+        np.stack([face_z[:-1, :-1].ravel(), face_z[1:, 1:].ravel()], axis=1),
+        np.stack([face_z[:-1, 1:].ravel(), face_z[1:, :-1].ravel()], axis=1),
+    ])
+    supports = [dict(FIXED, nodeId=f"n{n}") for n in index[0].ravel()]
+    loads = [{"nodeId": f"n{n}", "fx": 5000.0, "fy": -2000.0} for n in face_x[1:].ravel()]
+    return _model(coords, connectivity, SECTION, supports, loads)
+
+
+def _truss_size(target_nodes: int) -> int:
+    """Top-layer grid size k of generate_truss (k x k top, (k-1) x (k-1) bottom nodes)."""
+    return max(3, int(round(np.sqrt(target_nodes / 2))))
+
+
+def generate_truss(target_nodes: int) -> Dict[str, Any]:
+    """Double-layer space truss roof, pin-jointed, pinned along the top perimeter."""
+    k = _truss_size(target_nodes)
+    top = np.arange(k * k).reshape(k, k)
+    bottom = k * k + np.arange((k - 1) ** 2).reshape(k - 1, k - 1)
+    ti, tj = np.indices((k, k))
+    bi, bj = np.indices((k - 1, k - 1))
+    coords = np.vstack([
+        np.stack([2.0 * ti, np.full(ti.shape, 1.5), 2.0 * tj], axis=-1).reshape(-1, 3),
+        np.stack([2.0 * bi + 1.0, np.zeros(bi.shape), 2.0 * bj + 1.0], axis=-1).reshape(-1, 3),
+    ])
+
+    connectivity = np.vstack([
+        np.stack([top[:-1].ravel(), top[1:].ravel()], axis=1),
+        np.stack([top[:, :-1].ravel(), top[:, 1:].ravel()], axis=1),
+        np.stack([bottom[:-1].ravel(), bottom[1:].ravel()], axis=1),
+        np.stack([bottom[:, :-1].ravel(), bottom[:, 1:].ravel()], axis=1),
+        # Web: each bottom node to the four top nodes around it
+        np.stack([bottom.ravel(), top[:-1, :-1].ravel()], axis=1),
+        np.stack([bottom.ravel(), top[1:, :-1].ravel()], axis=1),
+        np.stack([bottom.ravel(), top[:-1, 1:].ravel()], axis=1),
+        np.stack([bottom.ravel(), top[1:, 1:].ravel()], axis=1),
+    ])
+    section = dict(SECTION, releases=PINNED_ENDS)
+    perimeter = np.unique(np.concatenate([top[0], top[-1], top[:, 0], top[:, -1]]))
+    supports = [{"nodeId": f"n{n}", "dx": True, "dy": True, "dz": True} for n in perimeter]
+    loads = [{"nodeId": f"n{n}", "fy": -5000.0} for n in top[1:-1, 1:-1].ravel()]
+    return _model(coords, connectivity, section, supports, loads)
+
+
+GENERATORS: Dict[str, Callable[[int], Dict[str, Any]]] = {
+    "grid": generate_grid,
+    "tower": generate_tower,
+    "truss": generate_truss,
+}
+
+# Node count of each family's model, without generating it
+NODE_COUNTS: Dict[str, Callable[[int], int]] = {
+    "grid": lambda target_nodes: int(np.prod(_grid_shape(target_nodes))),
+    "tower": lambda target_nodes: int(np.prod(_tower_shape(target_nodes))),
+    "truss": lambda target_nodes: _truss_size(target_nodes) ** 2 + (_truss_size(target_nodes) - 1) ** 2,
+}
+
+
+# ============================================================================
+# RUNNER
+# ============================================================================
+
+def _peak_rss_mb() -> float:
+    """Process peak resident set size (high-water mark since start).
+
+    Only meaningful per case because run_case_isolated gives each case a
+    fresh process; it includes the interpreter and the model generation.
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 ** 2 if sys.platform == "darwin" else peak / 1024
+
+
+def run_case(model: Dict[str, Any], family: str, target_nodes: int, path: str,
+             trace_memory: bool = True) -> Dict[str, Any]:
+    """Solve one model with one solver path and collect its measurements."""
+    nodes, members, supports, loads = sparse_solver.parse_input(model)
+    solver = sparse_solver.StructuralSolver(nodes, members, supports, loads)
+
+    record: Dict[str, Any] = {
+        "family": family,
+        "targetNodes": target_nodes,
+        "nodes": len(nodes),
+        "members": len(members),
+        "dofs": solver.num_dofs,
+        "path": path,
+    }
+
+    gc.collect()
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        result = solver.solve(**PATHS[path])
+        error = None
+    except sparse_solver.SolverError as e:
+        result = None
+        error = e.error
+    record["wallMs"] = (time.perf_counter() - start) * 1000
+    if trace_memory:
+        record["peakTracedMB"] = tracemalloc.get_traced_memory()[1] / 1024 ** 2
+        tracemalloc.stop()
+    record["peakRssMB"] = _peak_rss_mb()
+
+    if result is None:
+        record.update({"success": False, "error": error})
+        return record
+
+    info = result["solverInfo"]
+    record.update({
+        "success": bool(info.get("success", False)),
+        "method": info.get("method"),
+        "converged": info.get("converged", True),
+        "iterations": info.get("iterations"),
+        "factorMB": info.get("factorMB"),
+        "nnz": result["matrixStats"]["nnz"],
+    })
+    # A matrix-free solve does not keep its reduced system
+    system = solver.system
+    if system is not None:
+        residual = system.K_reduced @ solver.u_reduced - system.F_reduced
+        record.update({
+            "freeDofs": len(system.free_dofs),
+            "relativeResidual": float(np.linalg.norm(residual) / max(np.linalg.norm(system.F_reduced), 1e-300)),
+        })
+    for stage in STAGES:
+        record[f"{stage}Ms"] = solver.timing.get(stage)
+    return record
+
+
+def run_case_isolated(family: str, target_nodes: int, path: str,
+                      trace_memory: bool = True) -> Dict[str, Any]:
+    """run_case in a fresh process (see --case), so peak RSS is that case's own."""
+    command = [sys.executable, str(Path(__file__).resolve()), "--case", family, str(target_nodes), path]
+    if not trace_memory:
+        command.append("--no-trace-memory")
+    output = subprocess.run(command, capture_output=True, text=True)
+    lines = output.stdout.strip().splitlines()
+    if output.returncode != 0 or not lines:
+        # Killed (e.g. out of memory) or crashed before reporting
+        reason = output.stderr.strip().splitlines()[-1:] or [f"exit code {output.returncode}"]
+        return {"family": family, "targetNodes": target_nodes, "path": path,
+                "success": False, "error": f"Case process failed: {reason[0]}"}
+    return json.loads(lines[-1])
+
+
+def _environment() -> Dict[str, Any]:
+    """Versions and machine details stored with every result file."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, cwd=Path(__file__).parent, timeout=10).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        commit = ""
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "commit": commit or None,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "scipy": scipy.__version__,
+        "platform": platform.platform(),
+        "cpuCount": os.cpu_count(),
+    }
+
+
+def write_results(records: List[Dict[str, Any]], output_dir: Path) -> Path:
+    """Write results as JSON (with environment) and CSV; returns the JSON path."""
+    output_dir.mkdir(parents=True, exist_ok=True)
+    stem = output_dir / f"benchmark-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+
+    json_path = stem.with_suffix(".json")
+    with open(json_path, "w") as f:
+        json.dump({"environment": _environment(), "results": records}, f, indent=2)
+
+    columns = list(dict.fromkeys(key for record in records for key in record))
+    with open(stem.with_suffix(".csv"), "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        writer.writeheader()
+        writer.writerows(records)
+
+    return json_path
+
+
+def compare_with_baseline(records: List[Dict[str, Any]], baseline_file: str,
+                          threshold: float) -> List[str]:
+    """Report cases whose total time grew by more than `threshold` (a ratio)."""
+    with open(baseline_file) as f:
+        baseline = {
+            (r["family"], r["targetNodes"], r["path"]): r
+            for r in json.load(f)["results"]
+        }
+
+    regressions = []
+    for record in records:
+        previous = baseline.get((record["family"], record["targetNodes"], record["path"]))
+        if not previous or not previous.get("totalMs") or not record.get("totalMs"):
+            continue
+        ratio = record["totalMs"] / previous["totalMs"]
+        line = (f"{record['family']:>6} {record['targetNodes']:>7} {record['path']:>15}: "
+                f"{previous['totalMs']:10.1f} -> {record['totalMs']:10.1f} ms ({ratio:5.2f}x)")
+        print(line)
+        if ratio > threshold:
+            regressions.append(line)
+    return regressions
+
+
+def run_benchmarks(families: List[str], sizes: List[int], paths: List[str],
+                   trace_memory: bool = True,
+                   max_direct_nodes: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Run every family x size x path combination, each case in its own process."""
+    records = []
+    for family in families:
+        for size in sizes:
+            node_count = NODE_COUNTS[family](size)
+            for path in paths:
+                if path.startswith("direct") and max_direct_nodes and node_count > max_direct_nodes:
+                    continue
+                record = run_case_isolated(family, size, path, trace_memory)
+                records.append(record)
+                status = "ok" if record["success"] else record.get("error", "not converged")
+                if "wallMs" not in record:
+                    print(f"{family:>6} {node_count:>7} nodes {path:>15}: {status}", flush=True)
+                    continue
+                print(f"{family:>6} {record['nodes']:>7} nodes {path:>15}: "
+                      f"{record['wallMs']:10.1f} ms, peak RSS {record['peakRssMB']:8.1f} MB  {status}",
+                      flush=True)
+    return records
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the sparse structural solver")
+    parser.add_argument("--families", nargs="+", choices=list(GENERATORS), default=list(GENERATORS))
+    parser.add_argument("--sizes", nargs="+", type=int, help="Target node counts")
+    parser.add_argument("--quick", action="store_true", help=f"Use sizes {QUICK_SIZES}")
+    parser.add_argument("--paths", nargs="+", choices=list(PATHS), default=list(PATHS))
+    parser.add_argument("--max-direct-nodes", type=int,
+                        help="Skip the direct solver above this many nodes")
+    parser.add_argument("--no-trace-memory", action="store_true",
+                        help="Disable tracemalloc (it slows allocation-heavy stages)")
+    parser.add_argument("--output-dir", default="benchmark_results")
+    parser.add_argument("--baseline", help="Earlier result JSON to compare total times against")
+    parser.add_argument("--regression-threshold", type=float, default=1.2)
+    parser.add_argument("--case", nargs=3, metavar=("FAMILY", "NODES", "PATH"),
+                        help="Run one case in this process and print its record as JSON")
+    args = parser.parse_args()
+
+    if args.case:
+        family, size, path = args.case
+        model = GENERATORS[family](int(size))
+        print(json.dumps(run_case(model, family, int(size), path,
+                                  trace_memory=not args.no_trace_memory)))
+        return
+
+    sizes = args.sizes or (QUICK_SIZES if args.quick else SIZES)
+    records = run_benchmarks(args.families, sizes, args.paths,
+                             trace_memory=not args.no_trace_memory,
+                             max_direct_nodes=args.max_direct_nodes)
+    json_path = write_results(records, Path(args.output_dir))
+    print(f"\nResults written to {json_path} (and .csv)")
+
+    if args.baseline:
+        print(f"\nComparison with {args.baseline}:")
+        regressions = compare_with_baseline(records, args.baseline, args.regression_threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regressions above {args.regression_threshold}x")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,22 +7,92 @@ Uses industry-standard scipy.sparse.linalg for optimal performance.
 
 Features:
 - Sparse matrix assembly using COO format (fast construction)
-- CSR conversion for efficient matrix-vector products
-- Direct solver (SuperLU) for robust solutions
-- Iterative solver (CG with ILU preconditioner) for very large systems
-- Progress reporting via JSON to stdout
+- Vectorized element kernels with batched static condensation of end releases
+- Truss fast path: pin-jointed models (or config.truss = true) assemble 6x6
+  axial elements over translational DOFs only
+- Plane-frame fast path: models and loads in a global xy-plane assemble 6x6
+  elements over (dx, dy, rz); results keep the 3D schema (config.planar)
+- Mirror symmetry: models symmetric about global mid-planes, with symmetric or
+  antisymmetric loads, solve a half/quarter model (config.symmetry)
+- Element stiffness computed once per group of identical members (quantized
+  properties, length, orientation, releases); hit rate in matrixStats
+- CSR conversion for efficient matrix-vector products; skew frames keep 6x6
+  nodal blocks (BSR) through reduction and CG, converting to scalar CSR only
+  for factorization
+- Direct solver (SuperLU) for robust solutions, optionally float32 factors with
+  float64 iterative refinement (config.precision = "mixed") at half the memory
+- Low-rank (Woodbury) re-solve when a few members change, reusing the factorization
+- Influence lines and axle-train envelopes for moving loads (one factorization)
+- Load combinations and envelopes by superposition of load-case blocks
+- Adjoint sensitivities of responses to member A, Iy, Iz
+- Section-sizing optimization from a catalogue (displacement and utilization limits)
+- Newmark time histories (load functions, ground motion, Rayleigh damping) with
+  consistent mass on the stiffness pattern; frames streamed as they are computed
+- Response-spectrum analysis: Lanczos modes, CQC/SRSS combination of nodal and
+  member results as blocked matrix products over all modes
+- Event-to-event pushover with plastic hinges at member ends, each hinge a
+  low-rank update of one factorization (capacity curve and hinge sequence)
+- Iterative solver (CG with ILU, Jacobi or block-Jacobi preconditioner) for
+  very large systems
+- Matrix-free CG on the unassembled element matrices, block-Jacobi
+  preconditioned without global assembly (config.matrixFree)
+- Thread-parallel CG matrix products and (block-)Jacobi preconditioning in
+  row chunks, with measured speedups (config.threads)
+- Out-of-core mode: matrix and CG vectors in memory-mapped scratch files,
+  streamed in blocks under a configurable memory limit (config.outOfCore)
+- Rigid diaphragm / equal-DOF constraints by master-slave elimination
+- Tension-/compression-only members and uplift-free supports by active-set
+  iteration, each state a low-rank update of one factorization
+- Coincident node merging via spatial hashing (optional cleanup stage)
+- In-process library API (analyze) raising SolverError, with a progress callback
+- Progress reporting via JSON to stdout (CLI)
+- Checkpoint/resume of iterative solves (config.checkpoint, --resume)
+- Opt-in per-stage profiling (cProfile, tracemalloc, RSS) as a "profile" message
 - Memory-efficient for large problems
 
 Usage:
     python solver.py input.json
     python solver.py --stdin < input.json
+    python solver.py --profile input.json   # Also emit a "profile" message
+    python solver.py --resume input.json    # Continue from config.checkpoint.dir
 
 Input JSON format:
 {
     "nodes": [{"id": "n1", "x": 0, "y": 0, "z": 0}, ...],
-    "members": [{"id": "m1", "startNodeId": "n1", "endNodeId": "n2", ...}, ...],
-    "supports": [{"nodeId": "n1", "dx": true, ...}, ...],
-    "loads": [{"nodeId": "n2", "fy": -10000}, ...]
+    "members": [{"id": "m1", "startNodeId": "n1", "endNodeId": "n2", ...,
+                 "releases": {"startMomentZ": true, ...}, "tensionOnly": true,
+                 "plasticMoment": {"y": 2.5e5, "z": 4e5}}, ...],
+    "supports": [{"nodeId": "n1", "dx": true, ..., "compressionOnly": ["dy"]}, ...],
+    "loads": [{"nodeId": "n2", "fy": -10000, "case": "dead"}, ...],
+    "combinations": [{"id": "ULS1", "factors": {"dead": 1.35, "live": 1.5}}, ...],
+    "constraints": [{"type": "diaphragm", "nodeIds": [...], "plane": "xz"},
+                    {"type": "equalDof", "masterNodeId": "n1",
+                     "slaveNodeIds": [...], "dofs": ["dx", "dy"]}, ...],
+    "movingLoad": {"path": ["m1", "m2", ...], "direction": "fy", "step": 0.5,
+                   "axles": [{"offset": 0, "load": -50000}, ...],
+                   "responses": [{"type": "reaction", "nodeId": "n1",
+                                  "component": "fy"}, ...]},
+    "sensitivity": {"responses": [{"type": "displacement", "nodeId": "n2",
+                                   "component": "dy"}, ...]},
+    "optimization": {"catalogue": [{"name": "S1", "A": ..., "Iy": ..., "Iz": ...,
+                                    "Zy": ..., "Zz": ...}, ...],
+                     "groups": [{"id": "columns", "memberIds": [...]}, ...],
+                     "displacementLimits": [{"nodeId": "n2", "component": "dy",
+                                             "limit": 0.02}, ...],
+                     "maxUtilization": 1.0, "yieldStress": 355e6},
+    "timeHistory": {"dt": 0.01, "steps": 1000, "density": 7850,
+                    "loads": [{"case": "wind", "time": [0, 1, 2], "factor": [0, 1, 0]}],
+                    "groundMotion": {"direction": "dx", "dt": 0.02, "acceleration": [...]},
+                    "masses": [{"nodeId": "n2", "mass": 500}],
+                    "damping": {"ratio": 0.05, "frequencies": [1.0, 10.0]},
+                    "output": {"every": 10, "nodeIds": ["n2"], "file": "frames.csv"}},
+    "responseSpectrum": {"modes": 30, "combination": "cqc", "damping": 0.05,
+                         "spectrum": {"period": [0, 0.1, 0.5, 4], "acceleration": [...],
+                                      "scale": 9.81},
+                         "directions": [{"direction": "dx"}, {"direction": "dz", "scale": 0.3}],
+                         "density": 7850, "masses": [{"nodeId": "n2", "mass": 500}]},
+    "pushover": {"controlNodeId": "roof", "controlDof": "dx", "case": "lateral",
+                 "gravityCase": "dead", "targetDisplacement": 0.5, "maxEvents": 200}
 }
 
 Output JSON format:
@@ -36,19 +106,60 @@ Output JSON format:
 }
 """
 
+import contextlib
+import cProfile
+import hashlib
+import inspect
 import json
+import os
+import pstats
+import shutil
 import sys
+import tempfile
+import threading
 import time
+import tracemalloc
 import numpy as np
-from typing import Dict, List, Tuple, Optional, Any
+from typing import Dict, List, Tuple, Optional, Any, Callable
 from dataclasses import dataclass
-from scipy import sparse
+from functools import cached_property
+from scipy import linalg, sparse
 from scipy.sparse import linalg as spla
+from scipy.sparse.csgraph import connected_components
 import warnings
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
 
 # Suppress scipy warnings for cleaner output
 warnings.filterwarnings('ignore', category=sparse.SparseEfficiencyWarning)
 
+# scipy >= 1.12 renamed the CG tolerance argument from `tol` to `rtol`
+CG_TOL_KWARG = "rtol" if "rtol" in inspect.signature(spla.cg).parameters else "tol"
+
+# Free DOFs with diagonal stiffness below this fraction of the largest are
+# treated as having no stiffness at all
+ZERO_STIFFNESS_TOL = 1e-12
+
+# Nodal DOF names in global DOF order
+DOF_NAMES = ["dx", "dy", "dz", "rx", "ry", "rz"]
+
+# Nodal reaction names in global DOF order
+REACTION_NAMES = ["fx", "fy", "fz", "mx", "my", "mz"]
+
+# Free DOF count above which solve() picks the iterative solver by default
+ITERATIVE_THRESHOLD_DOFS = 10000
+
+# CG preconditioners: incomplete LU, diagonal scaling, inverse nodal
+# 6x6 diagonal blocks, or none
+PRECONDITIONERS = ("ilu", "jacobi", "block-jacobi", "none")
+
+# Diaphragm plane -> index of the axis normal to it
+PLANE_NORMAL_AXIS = {"yz": 0, "xz": 1, "xy": 2}
+
 # ============================================================================
 # DATA STRUCTURES
 # ============================================================================
@@ -74,6 +185,10 @@ class Member:
     G: float   # Shear modulus (Pa)
     J: float   # Torsional constant (m⁴)
     beta: float = 0.0  # Roll angle (radians)
+    releases: Tuple[int, ...] = ()  # Released local DOF indices (0-11)
+    only: Optional[str] = None  # "tension" / "compression": inactive otherwise
+    density: Optional[float] = None  # kg/m³ for dynamic analysis (default from the analysis)
+    plastic_moment: Optional[Tuple[float, float]] = None  # (about y, about z) for pushover hinges
 
 
 @dataclass
@@ -85,6 +200,9 @@ class Support:
     rx: bool
     ry: bool
     rz: bool
+    # (component, sign) of restrained DOFs whose reaction can only act in
+    # the sign direction (e.g. (1, 1): a bearing under the node, no uplift)
+    unilateral: Tuple[Tuple[int, int], ...] = ()
 
 
 @dataclass
@@ -96,12 +214,158 @@ class Load:
     mx: float = 0.0
     my: float = 0.0
     mz: float = 0.0
+    case: str = "default"  # Load case, for combinations
+
+
+@dataclass
+class Constraint:
+    """
+    Multi-point constraint tying slave node DOFs to a master node.
+    
+    - equalDof: each listed slave DOF equals the master DOF
+    - diaphragm: slaves move rigidly with the master in `plane`
+      (two in-plane translations plus rotation about the plane normal)
+    """
+    type: str
+    master_node_id: str
+    slave_node_ids: List[str]
+    dofs: Optional[List[str]] = None  # equalDof only
+    plane: str = "xz"  # diaphragm only; y is vertical
+
+
+@dataclass
+class Response:
+    """
+    A scalar result quantity, linear in the displacements.
+    
+    - displacement: nodal DOF (component 0-5, dx..rz)
+    - reaction: support reaction (component 0-5, fx..mz)
+    - memberForce: local member end force (component 0-11, start/end
+      + Axial, ShearY, ShearZ, Torsion, MomentY, MomentZ)
+    """
+    key: str
+    type: str
+    target_id: str  # Node ID, or member ID for memberForce
+    component: int
+
+
+@dataclass
+class Section:
+    """Catalogue cross-section for sizing."""
+    name: str
+    A: float
+    Iy: float
+    Iz: float
+    J: float    # NaN keeps each member's own J
+    Zy: float   # Elastic section moduli
+    Zz: float
+    mass: float  # Per unit length
+
+
+@dataclass
+class SizingProblem:
+    """Minimum-weight selection of catalogue sections for member groups."""
+    catalogue: List[Section]  # Sorted by mass
+    groups: Dict[str, List[str]]  # Group ID -> member IDs sharing a section
+    displacement_limits: List[Tuple[Response, float]]
+    max_utilization: float = 1.0
+    yield_stress: float = 355e6
+    max_iterations: int = 30
+
+
+@dataclass
+class MovingLoad:
+    """Axle train crossing a path of members."""
+    path: List[str]                   # Member IDs in travel order
+    responses: List[Response]
+    axles: List[Tuple[float, float]]  # (offset behind lead axle, load)
+    direction: int = 1                # Global force component of the loads
+    step: float = 0.5                 # Spacing of unit-load positions
+    both_directions: bool = True
+
+
+@dataclass
+class Pushover:
+    """Event-to-event pushover with plastic hinges at member ends."""
+    control_node: str
+    control_dof: int                  # Global translation 0-2 of the control node
+    pattern_case: Optional[str] = None  # Lateral load case; None: every case but gravity
+    gravity_case: Optional[str] = None  # Loads held constant while pushing
+    target_displacement: Optional[float] = None  # Stop at this control displacement
+    max_events: int = 200
+
+
+@dataclass
+class LoadCombination:
+    """Factored sum of load cases."""
+    id: str
+    factors: Dict[str, float]  # Load case -> factor
+
+
+@dataclass
+class OutOfCoreOptions:
+    """Out-of-core solve: matrices and Krylov vectors in memory-mapped files."""
+    scratch_dir: Optional[str] = None  # Parent of the per-solve scratch directory
+    memory_limit_mb: float = 512.0     # Budget for matrix blocks held in RAM
+    
+    @property
+    def block_entries(self) -> int:
+        """Matrix entries streamed per block under the memory limit."""
+        return max(4096, int(self.memory_limit_mb * 1024 ** 2 / OUT_OF_CORE_BYTES_PER_ENTRY))
+
+
+@dataclass
+class TimeHistory:
+    """Linear transient analysis by Newmark-beta integration."""
+    dt: float
+    steps: int
+    # (load case, or None for every load; times; factors) scaling static loads
+    load_functions: List[Tuple[Optional[str], np.ndarray, np.ndarray]]
+    # (global direction 0-2, times, accelerations) of a uniform base excitation
+    ground_motion: Optional[Tuple[int, np.ndarray, np.ndarray]]
+    nodal_masses: Dict[str, float]    # Lumped translational masses (kg)
+    density: float = 7850.0           # Default member density (kg/m³)
+    rayleigh: Tuple[float, float] = (0.0, 0.0)  # (alpha, beta): C = alpha M + beta K
+    beta: float = 0.25                # Newmark parameters (average acceleration)
+    gamma: float = 0.5
+    output_every: int = 1             # Output every n-th step
+    output_nodes: Optional[List[str]] = None  # Default: every node
+    output_file: Optional[str] = None         # Stream frames to this CSV file
+
+
+@dataclass
+class ResponseSpectrum:
+    """Modal response-spectrum analysis."""
+    periods: np.ndarray               # Spectrum table: periods (s) ...
+    accelerations: np.ndarray         # ... and spectral accelerations (m/s²)
+    directions: List[Tuple[int, float]]  # (global direction 0-2, scale factor)
+    nodal_masses: Dict[str, float]    # Lumped translational masses (kg)
+    modes: int = 12                   # Number of modes
+    damping: float = 0.05             # Modal damping ratio (CQC correlation)
+    method: str = "cqc"               # Modal combination: "cqc" or "srss"
+    density: float = 7850.0           # Default member density (kg/m³)
 
 
 # ============================================================================
-# PROGRESS REPORTING
+# ERRORS AND PROGRESS REPORTING
 # ============================================================================
 
+# Progress callback: (stage, progress percent, message)
+ProgressCallback = Callable[[str, int, str], None]
+
+# Time-history frame callback: (time, {node ID: [dx, dy, dz, rx, ry, rz]})
+FrameCallback = Callable[[float, Dict[str, List[float]]], None]
+
+
+class SolverError(Exception):
+    """Invalid model or failed analysis, with optional details for the user."""
+    
+    def __init__(self, error: str, details: Optional[str] = None):
+        super().__init__(error)
+        self.error = error
+        self.details = details
+
+
 def report_progress(stage: str, progress: int, message: str):
     """Send progress update to stdout as JSON."""
     progress_msg = {
@@ -115,8 +379,14 @@ def report_progress(stage: str, progress: int, message: str):
     print(json.dumps(progress_msg), flush=True)
 
 
+def report_frame(time_s: float, displacements: Dict[str, List[float]]):
+    """Send a time-history output frame to stdout as JSON."""
+    print(json.dumps({"type": "frame", "data": {"time": time_s, "displacements": displacements}}),
+          flush=True)
+
+
 def report_error(error: str, details: Optional[str] = None):
-    """Send error to stdout as JSON."""
+    """Send error to stdout as JSON and exit (CLI only; library code raises SolverError)."""
     error_msg = {
         "type": "error",
         "data": {
@@ -129,6 +399,138 @@ def report_error(error: str, details: Optional[str] = None):
     sys.exit(1)
 
 
+# ============================================================================
+# PROFILING
+# ============================================================================
+
+def current_rss_mb() -> Optional[float]:
+    """Current resident set size in MB (Linux only)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 ** 2
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of the process so far in MB."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 ** 2 if sys.platform == "darwin" else peak / 1024
+
+
+# Held by the one Profiler that may run at a time
+PROFILER_LOCK = threading.Lock()
+
+
+class Profiler:
+    """
+    Opt-in per-stage profile of a solver run.
+    
+    Each stage gets its own cProfile (top functions by cumulative time),
+    the tracemalloc peak, the source lines whose live allocations grew
+    most over the stage, and the process RSS. Stages do not nest: a stage
+    opened inside another is folded into the outer one.
+    
+    tracemalloc is process-wide, so profiled runs in different threads are
+    serialized: a profiler holds PROFILER_LOCK from construction until
+    report(). Tracing is stopped only if this profiler started it.
+    """
+    
+    def __init__(self, top_n: int = 20):
+        PROFILER_LOCK.acquire()
+        self.top_n = top_n
+        self.stages: Dict[str, Dict[str, Any]] = {}
+        self.overall: Optional[pstats.Stats] = None
+        self._active = False
+        self._start = time.perf_counter()
+        self._started_tracing = not tracemalloc.is_tracing()
+        if self._started_tracing:
+            tracemalloc.start()
+    
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        """Profile the enclosed block as stage `name`."""
+        if self._active:
+            yield
+            return
+        
+        self._active = True
+        profile = cProfile.Profile()
+        before = self._snapshot()
+        tracemalloc.reset_peak()
+        start = time.perf_counter()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            self._active = False
+            wall = (time.perf_counter() - start) * 1000
+            traced_peak = tracemalloc.get_traced_memory()[1]
+            growth = self._snapshot().compare_to(before, "lineno")
+            
+            stats = pstats.Stats(profile)
+            if self.overall is None:
+                self.overall = stats
+            else:
+                self.overall.add(stats)
+            
+            key = name
+            while key in self.stages:
+                key += "+"
+            self.stages[key] = {
+                "wallMs": wall,
+                "tracedPeakMB": traced_peak / 1024 ** 2,
+                "rssMB": current_rss_mb(),
+                "peakRssMB": peak_rss_mb(),
+                "functions": self._top_functions(stats),
+                "allocations": [
+                    {
+                        "location": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                        "sizeDiffMB": stat.size_diff / 1024 ** 2,
+                        "countDiff": stat.count_diff
+                    }
+                    for stat in growth[:self.top_n] if stat.size_diff > 0
+                ]
+            }
+    
+    @staticmethod
+    def _snapshot() -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        ])
+    
+    def _top_functions(self, stats: pstats.Stats) -> List[Dict[str, Any]]:
+        """Top functions by cumulative time."""
+        rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)
+        return [
+            {
+                "function": f"{name} ({os.path.basename(filename)}:{line})",
+                "calls": calls,
+                "totalMs": total * 1000,
+                "cumulativeMs": cumulative * 1000
+            }
+            for (filename, line, name), (_, calls, total, cumulative, _) in rows[:self.top_n]
+        ]
+    
+    def report(self) -> Dict[str, Any]:
+        """Finish profiling and return the report."""
+        try:
+            if self._started_tracing:
+                tracemalloc.stop()
+            return {
+                "totalMs": (time.perf_counter() - self._start) * 1000,
+                "peakRssMB": peak_rss_mb(),
+                "stages": self.stages,
+                "functions": self._top_functions(self.overall) if self.overall else []
+            }
+        finally:
+            PROFILER_LOCK.release()
+
+
 # ============================================================================
 # MATRIX UTILITIES
 # ============================================================================
@@ -284,10 +686,450 @@ def get_local_stiffness_matrix(
     return k
 
 
+# ============================================================================
+# BATCHED ELEMENT KERNELS
+# ============================================================================
+
+# Members processed per vectorized assembly chunk (bounds peak memory)
+ASSEMBLY_CHUNK_SIZE = 20000
+
+# Element stiffness deduplication: member properties and lengths share a
+# key when their mantissas agree to this many bits (~1e-12 relative),
+# direction cosines when they agree to ORIENTATION_KEY_SCALE (absolute)
+ELEMENT_KEY_MANTISSA_BITS = 40
+ORIENTATION_KEY_SCALE = 1e12
+
+# Member end release keys -> local DOF offset within a member end
+RELEASE_COMPONENTS = ["Axial", "ShearY", "ShearZ", "Torsion", "MomentY", "MomentZ"]
+
+# Local DOFs released on pin-jointed (truss) members: both end moments,
+# and torsion at the start
+TRUSS_RELEASES = [3, 4, 5, 10, 11]
+
+# In-plane local DOFs of members in a global xy-plane (u, v, θz per end),
+# and the uncoupled axial and bending blocks of the plane-frame stiffness
+PLANE_DOFS = [0, 1, 5, 6, 7, 11]
+PLANE_STIFFNESS_BLOCKS = [np.array([0, 3]), np.array([1, 2, 4, 5])]
+
+# Out-of-plane direction cosines below this count as zero for plane frames
+PLANE_TOL = 1e-12
+
+# Uncoupled blocks of the local frame stiffness: axial, torsion,
+# bending about z (v, θz) and bending about y (w, θy)
+LOCAL_STIFFNESS_BLOCKS = [
+    np.array([0, 6]), np.array([3, 9]), np.array([1, 5, 7, 11]), np.array([2, 4, 8, 10])
+]
+
+
+@dataclass
+class ElementSet:
+    """Stacked per-member arrays for the batched element kernels."""
+    member_index: np.ndarray  # Position in the solver's member list
+    start: np.ndarray         # Start node index
+    end: np.ndarray           # End node index
+    L: np.ndarray
+    R: np.ndarray             # (m, 3, 3) rotation matrices
+    E: np.ndarray
+    A: np.ndarray
+    Iy: np.ndarray
+    Iz: np.ndarray
+    G: np.ndarray
+    J: np.ndarray
+    released: np.ndarray      # (m, 12) bool, True where the local DOF is released
+    
+    def __len__(self) -> int:
+        return len(self.L)
+    
+    @cached_property
+    def dof_map(self) -> np.ndarray:
+        """(m, 12) global DOF indices."""
+        offsets = np.arange(6)
+        return np.hstack([
+            self.start[:, None] * 6 + offsets,
+            self.end[:, None] * 6 + offsets
+        ])
+    
+    @cached_property
+    def translation_dof_map(self) -> np.ndarray:
+        """(m, 6) global translational DOF indices, for the truss kernel."""
+        offsets = np.arange(3)
+        return np.hstack([
+            self.start[:, None] * 6 + offsets,
+            self.end[:, None] * 6 + offsets
+        ])
+    
+    @cached_property
+    def plane_dof_map(self) -> np.ndarray:
+        """(m, 6) global in-plane DOF indices (dx, dy, rz per end), for the plane kernel."""
+        offsets = np.array([0, 1, 5])
+        return np.hstack([
+            self.start[:, None] * 6 + offsets,
+            self.end[:, None] * 6 + offsets
+        ])
+    
+    @cached_property
+    def in_plane(self) -> np.ndarray:
+        """(m,) True where the local x-y plane is a global xy-plane (bending about z only)."""
+        coupling = np.abs(np.concatenate([self.R[:, :2, 2], self.R[:, 2, :2]], axis=1))
+        return coupling.max(axis=1, initial=0.0) <= PLANE_TOL
+    
+    @cached_property
+    def axial_only(self) -> np.ndarray:
+        """(m,) True where releases leave only axial stiffness (pin-jointed members)."""
+        moments = self.released[:, [4, 5, 10, 11]].all(axis=1)
+        return moments & (self.released[:, 3] | self.released[:, 9])
+
+
+def get_rotation_matrices(delta: np.ndarray, beta: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Batched version of get_rotation_matrix.
+    
+    Args:
+        delta: (m, 3) end minus start coordinates
+        beta: (m,) roll angles
+    
+    Returns:
+        Tuple of lengths (m,) and rotation matrices (m, 3, 3)
+    """
+    L = np.sqrt(np.einsum('ij,ij->i', delta, delta))
+    cx, cy, cz = (delta / L[:, None]).T
+    
+    vertical = (np.abs(cx) < 1e-10) & (np.abs(cz) < 1e-10)
+    D = np.sqrt(cx * cx + cz * cz)
+    D = np.where(vertical, 1.0, D)
+    
+    R = np.zeros((len(L), 3, 3))
+    R[:, 0, 0], R[:, 0, 1], R[:, 0, 2] = cx, cy, cz
+    R[:, 1, 0], R[:, 1, 1], R[:, 1, 2] = -cx * cy / D, D, -cy * cz / D
+    R[:, 2, 0], R[:, 2, 2] = -cz / D, cx / D
+    
+    if vertical.any():
+        sign = np.where(cy[vertical] > 0, 1.0, -1.0)
+        R_vertical = np.zeros((vertical.sum(), 3, 3))
+        R_vertical[:, 0, 1] = sign
+        R_vertical[:, 1, 0] = -sign
+        R_vertical[:, 2, 2] = 1.0
+        R[vertical] = R_vertical
+    
+    rolled = np.abs(beta) > 1e-10
+    if rolled.any():
+        cos_b = np.cos(beta[rolled])
+        sin_b = np.sin(beta[rolled])
+        R_roll = np.zeros((rolled.sum(), 3, 3))
+        R_roll[:, 0, 0] = 1.0
+        R_roll[:, 1, 1], R_roll[:, 1, 2] = cos_b, sin_b
+        R_roll[:, 2, 1], R_roll[:, 2, 2] = -sin_b, cos_b
+        R[rolled] = R[rolled] @ R_roll
+    
+    return L, R
+
+
+def get_local_stiffness_matrices(
+    E: np.ndarray, Iy: np.ndarray, Iz: np.ndarray, A: np.ndarray,
+    L: np.ndarray, G: np.ndarray, J: np.ndarray
+) -> np.ndarray:
+    """Batched version of get_local_stiffness_matrix, returns (m, 12, 12)."""
+    k = np.zeros((len(L), 12, 12))
+    L2 = L * L
+    L3 = L2 * L
+    
+    def put(i: int, j: int, value: np.ndarray):
+        k[:, i, j] = value
+        k[:, j, i] = value
+    
+    # Axial and torsion
+    EA_L = E * A / L
+    GJ_L = G * J / L
+    for a, b, s in ((0, 6, EA_L), (3, 9, GJ_L)):
+        put(a, a, s)
+        put(b, b, s)
+        put(a, b, -s)
+    
+    # Bending about z-axis (in x-y plane)
+    EIz = E * Iz
+    put(1, 1, 12 * EIz / L3)
+    put(1, 5, 6 * EIz / L2)
+    put(1, 7, -12 * EIz / L3)
+    put(1, 11, 6 * EIz / L2)
+    put(5, 5, 4 * EIz / L)
+    put(5, 7, -6 * EIz / L2)
+    put(5, 11, 2 * EIz / L)
+    put(7, 7, 12 * EIz / L3)
+    put(7, 11, -6 * EIz / L2)
+    put(11, 11, 4 * EIz / L)
+    
+    # Bending about y-axis (in x-z plane)
+    EIy = E * Iy
+    put(2, 2, 12 * EIy / L3)
+    put(2, 4, -6 * EIy / L2)
+    put(2, 8, -12 * EIy / L3)
+    put(2, 10, -6 * EIy / L2)
+    put(4, 4, 4 * EIy / L)
+    put(4, 8, 6 * EIy / L2)
+    put(4, 10, 2 * EIy / L)
+    put(8, 8, 12 * EIy / L3)
+    put(8, 10, 6 * EIy / L2)
+    put(10, 10, 4 * EIy / L)
+    
+    return k
+
+
+def get_truss_stiffness_matrices(E: np.ndarray, A: np.ndarray, L: np.ndarray,
+                                 R: np.ndarray) -> np.ndarray:
+    """Global axial stiffness (m, 6, 6) of pin-jointed members over end translations."""
+    c = R[:, 0, :]
+    k_block = (E * A / L)[:, None, None] * c[:, :, None] * c[:, None, :]
+    k = np.empty((len(L), 6, 6))
+    k[:, :3, :3] = k_block
+    k[:, 3:, 3:] = k_block
+    k[:, :3, 3:] = -k_block
+    k[:, 3:, :3] = -k_block
+    return k
+
+
+def get_plane_frame_stiffness_matrices(E: np.ndarray, A: np.ndarray, Iz: np.ndarray,
+                                       L: np.ndarray) -> np.ndarray:
+    """Local plane-frame stiffness (m, 6, 6) over (u, v, θz) at each end."""
+    k = np.zeros((len(L), 6, 6))
+    L2 = L * L
+    EA_L = E * A / L
+    EI = E * Iz
+    
+    def put(i: int, j: int, value: np.ndarray):
+        k[:, i, j] = value
+        k[:, j, i] = value
+    
+    put(0, 0, EA_L)
+    put(3, 3, EA_L)
+    put(0, 3, -EA_L)
+    put(1, 1, 12 * EI / (L2 * L))
+    put(1, 2, 6 * EI / L2)
+    put(1, 4, -12 * EI / (L2 * L))
+    put(1, 5, 6 * EI / L2)
+    put(2, 2, 4 * EI / L)
+    put(2, 4, -6 * EI / L2)
+    put(2, 5, 2 * EI / L)
+    put(4, 4, 12 * EI / (L2 * L))
+    put(4, 5, -6 * EI / L2)
+    put(5, 5, 4 * EI / L)
+    return k
+
+
+def get_local_mass_matrices(rho: np.ndarray, A: np.ndarray, Ip: np.ndarray,
+                            L: np.ndarray) -> np.ndarray:
+    """Consistent local mass (m, 12, 12) of 3D frame elements (rho: density, Ip: polar inertia)."""
+    m = np.zeros((len(L), 12, 12))
+    mass = rho * A * L / 420
+    rotary = rho * Ip * L / 6
+    
+    def put(i: int, j: int, value: np.ndarray):
+        m[:, i, j] = value
+        m[:, j, i] = value
+    
+    put(0, 0, 140 * mass)
+    put(6, 6, 140 * mass)
+    put(0, 6, 70 * mass)
+    put(3, 3, 2 * rotary)
+    put(9, 9, 2 * rotary)
+    put(3, 9, rotary)
+    # Bending in the local xy (v, θz) and xz (w, θy) planes
+    for v, t, sign in ((1, 5, 1), (2, 4, -1)):
+        put(v, v, 156 * mass)
+        put(v + 6, v + 6, 156 * mass)
+        put(v, v + 6, 54 * mass)
+        put(v, t, sign * 22 * L * mass)
+        put(v + 6, t + 6, -sign * 22 * L * mass)
+        put(v, t + 6, -sign * 13 * L * mass)
+        put(t, v + 6, sign * 13 * L * mass)
+        put(t, t, 4 * L * L * mass)
+        put(t + 6, t + 6, 4 * L * L * mass)
+        put(t, t + 6, -3 * L * L * mass)
+    return m
+
+
+def get_truss_mass_matrices(rho: np.ndarray, A: np.ndarray, L: np.ndarray) -> np.ndarray:
+    """Consistent mass (m, 6, 6) of bars over end translations (any orientation)."""
+    m_block = (rho * A * L / 6)[:, None, None] * np.eye(3)
+    m = np.empty((len(L), 6, 6))
+    m[:, :3, :3] = m[:, 3:, 3:] = 2 * m_block
+    m[:, :3, 3:] = m[:, 3:, :3] = m_block
+    return m
+
+
+def release_codes(released: np.ndarray) -> np.ndarray:
+    """Pack (m, 12) release flags into one integer per member."""
+    return released.astype(np.int64) @ (1 << np.arange(12, dtype=np.int64))
+
+
+def element_keys(E, A, Iy, Iz, G, J, L, R: np.ndarray, released: np.ndarray) -> np.ndarray:
+    """Quantized stiffness keys (m, 25): members with equal rows have equal global stiffness."""
+    mantissa, exponent = np.frexp(np.column_stack([E, A, Iy, Iz, G, J, L]))
+    return np.column_stack([
+        np.round(mantissa * 2.0 ** ELEMENT_KEY_MANTISSA_BITS).astype(np.int64),
+        exponent.astype(np.int64),
+        np.round(R.reshape(-1, 9) * ORIENTATION_KEY_SCALE).astype(np.int64),
+        release_codes(released)
+    ])
+
+
+def unique_element_groups(keys: np.ndarray):
+    """Representative row and group of every row of an (m, w) key array.
+    
+    Rows are grouped by a 64-bit hash; a collision (checked exactly) falls
+    back to comparing whole rows. Returns (first, inverse) with
+    keys[first[inverse]] == keys.
+    """
+    keys = np.ascontiguousarray(keys)
+    weights = np.random.default_rng(0).integers(1, 2 ** 62, keys.shape[1]) | 1
+    _, first, inverse = np.unique(keys @ weights, return_index=True, return_inverse=True)
+    inverse = inverse.ravel()
+    if not np.array_equal(keys[first[inverse]], keys):
+        rows = keys.view(np.dtype((np.void, keys.dtype.itemsize * keys.shape[1]))).ravel()
+        _, first, inverse = np.unique(rows, return_index=True, return_inverse=True)
+        inverse = inverse.ravel()
+    return first, inverse
+
+
+def condense_releases(k: np.ndarray, released: np.ndarray, loads: Optional[np.ndarray] = None,
+                      blocks: List[np.ndarray] = LOCAL_STIFFNESS_BLOCKS):
+    """
+    Statically condense released DOFs out of stacked local stiffness matrices.
+    
+    The local frame stiffness is block diagonal in its axial, torsion and
+    two bending blocks, so each block is condensed on its own (at most 4x4
+    per member) by eliminating released DOFs one pivot at a time across
+    every member releasing that DOF: k* = k_cc - k_cr k_rr^-1 k_rc.
+    Released rows and columns are zero in the result.
+    
+    Args:
+        k: (m, 12, 12) local stiffness matrices
+        released: (m, 12) bool release flags
+        loads: Optional (m, 12) local load vectors condensed alongside,
+            q* = q_c - k_cr k_rr^-1 q_r
+        blocks: Uncoupled stiffness blocks; PLANE_STIFFNESS_BLOCKS for
+            (m, 6, 6) plane-frame matrices
+    
+    Returns:
+        Condensed k, or (k, loads) when loads are given
+    """
+    if not released.any():
+        return k if loads is None else (k, loads)
+    
+    k = k.copy()
+    if loads is not None:
+        loads = loads.copy()
+    for block in blocks:
+        block_released = released[:, block]
+        idx = np.flatnonzero(block_released.any(axis=1))
+        if not len(idx):
+            continue
+        
+        block_released = block_released[idx]
+        kb = k[idx[:, None, None], block[:, None], block]
+        qb = loads[idx[:, None], block] if loads is not None else None
+        for j in np.flatnonzero(block_released.any(axis=0)):
+            eliminate = block_released[:, j]
+            pivot = np.where(eliminate, kb[:, j, j], 1.0)
+            factor = eliminate / pivot
+            if qb is not None:
+                qb -= kb[:, :, j] * (qb[:, j] * factor)[:, None]
+                qb[eliminate, j] = 0.0
+            row = kb[:, j, :] * factor[:, None]
+            kb -= kb[:, :, j, None] * row[:, None, :]
+            kb[eliminate, j, :] = 0.0
+            kb[eliminate, :, j] = 0.0
+        k[idx[:, None, None], block[:, None], block] = kb
+        if qb is not None:
+            loads[idx[:, None], block] = qb
+    
+    return k if loads is None else (k, loads)
+
+
+def point_load_vectors(L: np.ndarray, a: np.ndarray, p: np.ndarray) -> np.ndarray:
+    """
+    Consistent (fixed-end) nodal load vectors for concentrated member loads.
+    
+    Args:
+        L: (m,) member lengths
+        a: (m,) distance of each load from the member start
+        p: (m, 3) load components in local axes
+    
+    Returns:
+        (m, 12) local equivalent nodal loads; end forces are k u - q
+    """
+    b = L - a
+    L2 = L * L
+    L3 = L2 * L
+    px, py, pz = p.T
+    
+    q = np.zeros((len(L), 12))
+    q[:, 0] = px * b / L
+    q[:, 6] = px * a / L
+    
+    near = b * b * (3 * a + b) / L3
+    far = a * a * (a + 3 * b) / L3
+    moment_near = a * b * b / L2
+    moment_far = a * a * b / L2
+    
+    q[:, 1], q[:, 7] = py * near, py * far
+    q[:, 5], q[:, 11] = py * moment_near, -py * moment_far
+    q[:, 2], q[:, 8] = pz * near, pz * far
+    q[:, 4], q[:, 10] = -pz * moment_near, pz * moment_far
+    return q
+
+
+def local_to_global_vectors(q: np.ndarray, R: np.ndarray) -> np.ndarray:
+    """Compute T^T q for stacked (m, 12) local vectors."""
+    m = len(q)
+    return np.einsum('mji,mbj->mbi', R, q.reshape(m, 4, 3)).reshape(m, 12)
+
+
+def global_to_local_vectors(v: np.ndarray, R: np.ndarray) -> np.ndarray:
+    """Compute T v for stacked (m, n) or (m, n, r) global vectors, n a multiple of 3."""
+    m, n = v.shape[:2]
+    local = np.einsum('mij,mbj...->mbi...', R, v.reshape((m, n // 3, 3) + v.shape[2:]))
+    return local.reshape(v.shape)
+
+
+def transform_to_global(k_local: np.ndarray, R: np.ndarray) -> np.ndarray:
+    """Compute T^T k T for stacked (m, n, n) matrices, T = blockdiag(R, ..., R).
+    
+    Applies R to each 3-row and 3-column block with batched matmuls
+    instead of forming T. For plane frames the blocks are (dx, dy, θz),
+    which R maps correctly because it has no out-of-plane coupling.
+    """
+    m, n = k_local.shape[:2]
+    k = np.swapaxes(R, 1, 2)[:, None] @ k_local.reshape(m, n // 3, 3, n)
+    k = k.reshape(m, n, n // 3, 3) @ R[:, None]
+    return k.reshape(m, n, n)
+
+
+def check_release_stability(released: np.ndarray, member_ids: List[str]):
+    """Reject release patterns that leave a member with an internal mechanism."""
+    _, first = np.unique(release_codes(released), return_index=True)
+    unit = np.ones(1)
+    k_unit = get_local_stiffness_matrices(unit, unit, unit, unit, unit, unit, unit)[0]
+    for i in first:
+        r = np.flatnonzero(released[i])
+        if len(r) and np.linalg.matrix_rank(k_unit[np.ix_(r, r)]) < len(r):
+            raise SolverError(f"Member {member_ids[i]} releases form a mechanism",
+                              "Releasing axial or torsion at both ends, or shear and "
+                              "moment together, leaves the member unstable")
+
+
 # ============================================================================
 # SPARSE MATRIX ASSEMBLY
 # ============================================================================
 
+# Minimum fraction of non-zero entries in the 6x6 nodal blocks for block
+# (BSR) storage; axis-aligned frames leave most block entries zero, and
+# scalar CSR then stores less
+BLOCK_MIN_FILL = 0.5
+
+# Entries at or below this magnitude are dropped from scalar assembly
+ZERO_ENTRY_TOL = 1e-15
+
+
 class SparseAssembler:
     """
     Assembles global stiffness matrix using COO format for efficiency.
@@ -297,34 +1139,43 @@ class SparseAssembler:
     
     def __init__(self, num_dofs: int):
         self.num_dofs = num_dofs
-        self.rows: List[int] = []
-        self.cols: List[int] = []
-        self.values: List[float] = []
+        # COO triplets, accumulated as one array chunk per add call
+        self.rows: List[np.ndarray] = []
+        self.cols: List[np.ndarray] = []
+        self.values: List[np.ndarray] = []
     
     def add_element(self, dof_map: List[int], k_local: np.ndarray, T: np.ndarray):
         """Add element contribution to global matrix."""
         # Transform to global: K_global = T^T @ K_local @ T
         k_global = T.T @ k_local @ T
+        self.add_elements(np.asarray(dof_map)[None, :], k_global[None, :, :])
+    
+    def add_elements(self, dof_maps: np.ndarray, k_global: np.ndarray):
+        """Add stacked element contributions: dof_maps (m, n), k_global (m, n, n)."""
+        n = dof_maps.shape[1]
+        rows = np.repeat(dof_maps, n, axis=1).ravel()
+        cols = np.tile(dof_maps, (1, n)).ravel()
+        values = k_global.ravel()
         
-        # Add to COO lists
-        for i in range(12):
-            for j in range(12):
-                if abs(k_global[i, j]) > 1e-15:
-                    self.rows.append(dof_map[i])
-                    self.cols.append(dof_map[j])
-                    self.values.append(k_global[i, j])
+        keep = np.abs(values) > ZERO_ENTRY_TOL
+        self.rows.append(rows[keep])
+        self.cols.append(cols[keep])
+        self.values.append(values[keep])
     
     def to_csr(self) -> sparse.csr_matrix:
         """Convert to CSR format for efficient solving."""
+        if not self.values:
+            return sparse.csr_matrix((self.num_dofs, self.num_dofs))
         coo = sparse.coo_matrix(
-            (self.values, (self.rows, self.cols)),
+            (np.concatenate(self.values),
+             (np.concatenate(self.rows), np.concatenate(self.cols))),
             shape=(self.num_dofs, self.num_dofs)
         )
         return coo.tocsr()
     
     def get_stats(self) -> Dict[str, Any]:
         """Get matrix statistics."""
-        nnz = len(self.values)
+        nnz = sum(len(v) for v in self.values)
         density = nnz / (self.num_dofs ** 2)
         memory_saved = (self.num_dofs ** 2 - nnz) * 8 / (1024 ** 2)  # MB
         return {
@@ -335,166 +1186,3220 @@ class SparseAssembler:
         }
 
 
-# ============================================================================
-# SOLVER
-# ============================================================================
+class BlockAssembler:
+    """
+    Assembles the global stiffness in 6x6 nodal block (BSR) storage.
+    
+    Each element matrix is split into its four node blocks, and blocks at
+    the same node pair are summed, so column indices are stored once per
+    block instead of once per entry. Elements over fewer than 6 DOFs per
+    node are placed at their DOF offsets within the block.
+    """
+    
+    def __init__(self, num_nodes: int):
+        self.num_nodes = num_nodes
+        self.rows: List[np.ndarray] = []
+        self.cols: List[np.ndarray] = []
+        self.blocks: List[np.ndarray] = []
+    
+    def add_elements(self, dof_maps: np.ndarray, k_global: np.ndarray):
+        """Add stacked two-node element contributions: dof_maps (m, w), k_global (m, w, w)."""
+        m, w = dof_maps.shape
+        h = w // 2
+        if m == 0:
+            return
+        nodes = dof_maps[:, [0, h]] // 6
+        offsets = dof_maps[0, :h] % 6
+        blocks = np.zeros((m, 2, 2, 6, 6))
+        blocks[:, :, :, offsets[:, None], offsets[None, :]] = \
+            k_global.reshape(m, 2, h, 2, h).transpose(0, 1, 3, 2, 4)
+        self.rows.append(np.repeat(nodes, 2, axis=1).ravel())
+        self.cols.append(np.tile(nodes, (1, 2)).ravel())
+        self.blocks.append(blocks.reshape(-1, 6, 6))
+    
+    def to_bsr(self) -> sparse.bsr_matrix:
+        """Sum blocks per node pair into a BSR matrix with sorted block columns."""
+        size = 6 * self.num_nodes
+        if not self.blocks:
+            return sparse.bsr_matrix((size, size), blocksize=(6, 6))
+        rows, cols = np.concatenate(self.rows), np.concatenate(self.cols)
+        key = rows * self.num_nodes + cols
+        order = np.argsort(key, kind="stable")
+        key = key[order]
+        starts = np.flatnonzero(np.concatenate([[True], key[1:] != key[:-1]]))
+        data = np.add.reduceat(np.concatenate(self.blocks)[order], starts, axis=0)
+        counts = np.bincount(rows[order[starts]], minlength=self.num_nodes)
+        indptr = np.concatenate([[0], np.cumsum(counts)])
+        return sparse.bsr_matrix((data, cols[order[starts]], indptr), shape=(size, size))
 
-class StructuralSolver:
+
+class BlockReducedMatrix:
     """
-    High-performance structural solver using scipy.sparse.
+    Reduced stiffness K[free][:, free] kept in the 6x6 block storage of K.
     
-    Solver selection:
-    - Direct (SuperLU): Default, robust for most problems
-    - Iterative (CG): For very large sparse systems (>10000 DOFs)
+    Holds the blocks between nodes with free DOFs, with the rows and
+    columns of their other DOFs zeroed and a unit diagonal, so products
+    with this padded matrix give the reduced products. Scalar copies are
+    made only on request (tocsr/tocsc), e.g. for a direct factorization.
     """
     
-    def __init__(self, nodes: List[Node], members: List[Member], 
-                 supports: List[Support], loads: List[Load]):
-        self.nodes = {n.id: n for n in nodes}
-        self.node_list = nodes
-        self.members = members
-        self.supports = {s.node_id: s for s in supports}
-        self.loads = loads
+    def __init__(self, K: sparse.bsr_matrix, free_dofs: np.ndarray):
+        n_nodes = K.shape[0] // 6
+        nodes = np.unique(free_dofs // 6)
+        renumber = np.full(n_nodes, -1, dtype=np.int64)
+        renumber[nodes] = np.arange(len(nodes))
+        rows = renumber[np.repeat(np.arange(n_nodes), np.diff(K.indptr))]
+        cols = renumber[K.indices]
+        keep = (rows >= 0) & (cols >= 0)
+        rows, cols = rows[keep], cols[keep]
         
-        self.num_nodes = len(nodes)
-        self.num_dofs = self.num_nodes * 6
+        free = np.zeros((len(nodes), 6), dtype=bool)
+        free[renumber[free_dofs // 6], free_dofs % 6] = True
+        data = K.data[keep] * (free[rows][:, :, None] & free[cols][:, None, :])
+        diagonal = rows == cols
+        data[diagonal] += np.eye(6) * ~free[rows[diagonal]][:, None, :]
         
-        # Timing
-        self.timing: Dict[str, float] = {}
+        indptr = np.concatenate([[0], np.cumsum(np.bincount(rows, minlength=len(nodes)))])
+        size = 6 * len(nodes)
+        self.matrix = sparse.bsr_matrix((data, cols, indptr), shape=(size, size))
+        self.position = renumber[free_dofs // 6] * 6 + free_dofs % 6
+        self.shape = (len(free_dofs), len(free_dofs))
+        self.dtype = self.matrix.dtype
     
-    def solve(self, use_iterative: bool = False) -> Dict[str, Any]:
-        """
-        Solve the structural system.
-        
-        Args:
-            use_iterative: Use iterative solver (CG) instead of direct (SuperLU)
-        
-        Returns:
-            Solution dictionary with displacements, reactions, and timing info
-        """
-        total_start = time.perf_counter()
-        
-        # Stage 1: Assembly
-        report_progress("assembling", 10, f"Assembling {len(self.members)} members...")
-        
-        assembly_start = time.perf_counter()
-        K = self._assemble_global_stiffness()
-        self.timing["assembly"] = (time.perf_counter() - assembly_start) * 1000
-        
-        report_progress("assembling", 40, 
-            f"Assembled matrix: {K.shape[0]} DOFs, {K.nnz} non-zeros")
-        
-        # Build force vector
-        F = self._build_force_vector()
-        
-        # Stage 2: Apply boundary conditions
-        report_progress("solving", 50, "Applying boundary conditions...")
-        
-        bc_start = time.perf_counter()
-        free_dofs, constrained_dofs = self._identify_dofs()
-        
-        if len(free_dofs) == 0:
-            report_error("Structure is fully constrained - no free DOFs")
-        
-        # Extract reduced system
-        K_reduced = K[np.ix_(free_dofs, free_dofs)]
-        F_reduced = F[free_dofs]
-        self.timing["boundary_conditions"] = (time.perf_counter() - bc_start) * 1000
-        
-        # Stage 3: Solve
-        report_progress("solving", 60, 
-            f"Solving {len(free_dofs)} equations...")
-        
-        solve_start = time.perf_counter()
-        
-        solver_info = {}
-        if use_iterative or len(free_dofs) > 10000:
-            # Use iterative solver with ILU preconditioner
-            u_reduced, solver_info = self._solve_iterative(K_reduced, F_reduced)
-        else:
-            # Use direct solver (SuperLU)
-            u_reduced, solver_info = self._solve_direct(K_reduced, F_reduced)
-        
-        self.timing["solve"] = (time.perf_counter() - solve_start) * 1000
-        
-        report_progress("solving", 85, 
-            f"Solved using {solver_info.get('method', 'unknown')}")
-        
-        # Stage 4: Post-processing
-        report_progress("postprocessing", 90, "Calculating reactions...")
-        
-        post_start = time.perf_counter()
+    @property
+    def nnz(self) -> int:
+        return self.matrix.nnz
+    
+    def __matmul__(self, x: np.ndarray) -> np.ndarray:
+        """K x for a vector or column block."""
+        x_padded = np.zeros((self.matrix.shape[0],) + x.shape[1:])
+        x_padded[self.position] = x
+        return (self.matrix @ x_padded)[self.position]
+    
+    def matvec(self, x: np.ndarray) -> np.ndarray:
+        return self @ np.ravel(x)
+    
+    def parallel_matvec(self, pool: ThreadPoolExecutor, chunks: int) -> Callable[[np.ndarray], np.ndarray]:
+        """Reduced products with the padded matrix's block rows split over a thread pool."""
+        product = parallel_matvec(self.matrix, pool, chunks)
         
-        # Expand solution to full DOF vector
-        u_full = np.zeros(self.num_dofs)
-        u_full[free_dofs] = u_reduced
+        def matvec(x: np.ndarray) -> np.ndarray:
+            x_padded = np.zeros(self.matrix.shape[0])
+            x_padded[self.position] = np.ravel(x)
+            return product(x_padded)[self.position]
         
-        # Calculate reactions
-        reactions = K @ u_full - F
+        return matvec
+    
+    def diagonal(self) -> np.ndarray:
+        return self.matrix.diagonal()[self.position]
+    
+    def tocsr(self) -> sparse.csr_matrix:
+        K = self.matrix.tocsr()[self.position][:, self.position]
+        K.eliminate_zeros()  # Same scalar pattern as an entrywise assembly
+        return K
+    
+    def tocsc(self) -> sparse.csc_matrix:
+        return self.tocsr().tocsc()
+    
+    def tocoo(self) -> sparse.coo_matrix:
+        return self.tocsr().tocoo()
+    
+    def node_block_triplets(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(rows, cols, values) of the nodal diagonal blocks, in reduced numbering."""
+        index = np.full(self.matrix.shape[0], -1, dtype=np.int64)
+        index[self.position] = np.arange(len(self.position))
+        block_rows = np.repeat(np.arange(len(self.matrix.indptr) - 1), np.diff(self.matrix.indptr))
+        diagonal = np.flatnonzero(block_rows == self.matrix.indices)
+        dofs = 6 * block_rows[diagonal][:, None] + np.arange(6)
+        rows = index[np.repeat(dofs, 6, axis=1)].ravel()
+        cols = index[np.tile(dofs, (1, 6))].ravel()
+        values = self.matrix.data[diagonal].ravel()
+        keep = (rows >= 0) & (cols >= 0)
+        return rows[keep], cols[keep], values[keep]
+
+
+class StiffnessPattern:
+    """
+    Fixed CSR sparsity pattern of the global stiffness matrix.
+    
+    The element-to-pattern scatter map is computed once, so reassembling
+    after property changes (same connectivity) is one weighted bincount per
+    chunk, with no sorting or format conversion. Matrices assembled from
+    the same element DOF maps (stiffness, mass) share the pattern, and
+    combinations of them are combinations of their value arrays.
+    """
+    
+    def __init__(self, dof_maps: np.ndarray, num_dofs: int):
+        self.num_dofs = num_dofs
+        width = dof_maps.shape[1]
+        self.entries = width * width  # Pattern entries per element
+        rows = np.repeat(dof_maps, width, axis=1).ravel()
+        cols = np.tile(dof_maps, (1, width)).ravel()
+        self.keys, self.scatter = np.unique(rows * num_dofs + cols, return_inverse=True)
+        self.scatter = self.scatter.reshape(-1)
+        self.indices = self.keys % num_dofs
+        self.indptr = np.searchsorted(self.keys // num_dofs, np.arange(num_dofs + 1))
+    
+    def assemble(self, chunks) -> sparse.csr_matrix:
+        """Assemble from (first element, (c, w, w) global element matrices) chunks."""
+        data = np.zeros(len(self.indices))
+        for first, k_global in chunks:
+            entries = self.scatter[first * self.entries:(first + len(k_global)) * self.entries]
+            data += np.bincount(entries, weights=k_global.ravel(), minlength=len(data))
+        return self.matrix(data)
+    
+    def matrix(self, data: np.ndarray) -> sparse.csr_matrix:
+        """CSR matrix with the given values in pattern order."""
+        return sparse.csr_matrix((data, self.indices, self.indptr),
+                                 shape=(self.num_dofs, self.num_dofs))
+    
+    def diagonal_positions(self, dofs: np.ndarray) -> np.ndarray:
+        """Position of each DOF's diagonal entry in the values, -1 if not in the pattern."""
+        keys = np.asarray(dofs, dtype=np.int64) * (self.num_dofs + 1)
+        position = np.minimum(np.searchsorted(self.keys, keys), len(self.keys) - 1)
+        return np.where(self.keys[position] == keys, position, -1)
+    
+    def restriction(self, dofs: np.ndarray) -> Callable[[np.ndarray], sparse.csr_matrix]:
+        """Map pattern values to the submatrix on dofs, with one pattern for all value arrays."""
+        position = self.matrix(np.arange(1, len(self.indices) + 1, dtype=np.float64))
+        position = position[dofs][:, dofs]
+        take = position.data.astype(np.int64) - 1
+        return lambda data: sparse.csr_matrix((data[take], position.indices, position.indptr),
+                                              shape=position.shape)
+
+
+# ============================================================================
+# OUT-OF-CORE STORAGE
+# ============================================================================
+
+# Working memory per stored matrix entry while streaming (indices, value
+# and temporaries), used to turn the memory limit into a block size
+OUT_OF_CORE_BYTES_PER_ENTRY = 96
+
+
+class ScratchDirectory:
+    """Memory-mapped arrays and append-only files in a private scratch directory."""
+    
+    def __init__(self, parent: Optional[str] = None):
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        self.path = tempfile.mkdtemp(prefix="beamlab-ooc-", dir=parent)
+    
+    def file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+    
+    def array(self, name: str, shape, dtype=np.float64) -> np.memmap:
+        """New zero-filled memory-mapped array."""
+        return np.memmap(self.file(name), dtype=dtype, mode="w+", shape=shape)
+    
+    def size_mb(self) -> float:
+        return sum(entry.stat().st_size for entry in os.scandir(self.path)) / 1024 ** 2
+    
+    def close(self):
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+class TripletFile:
+    """
+    Sparse matrix as COO triplets appended to disk and read back in blocks.
+    
+    Duplicate entries are kept (they add up in products), so element
+    contributions stream straight to disk without a sort. Supports K @ x.
+    """
+    
+    def __init__(self, scratch: ScratchDirectory, name: str, shape: Tuple[int, int],
+                 block_entries: int):
+        self.shape = shape
+        self.block_entries = block_entries
+        self.paths = [scratch.file(f"{name}.{part}") for part in ("rows", "cols", "values")]
+        self.dtypes = (np.int64, np.int64, np.float64)
+        self.nnz = 0
+        for path in self.paths:
+            open(path, "wb").close()
+    
+    def append(self, rows: np.ndarray, cols: np.ndarray, values: np.ndarray):
+        for path, dtype, array in zip(self.paths, self.dtypes, (rows, cols, values)):
+            with open(path, "ab") as f:
+                f.write(np.ascontiguousarray(array, dtype=dtype).tobytes())
+        self.nnz += len(values)
+    
+    def blocks(self):
+        """Yield (rows, cols, values) blocks of at most block_entries."""
+        if self.nnz == 0:
+            return
+        arrays = [np.memmap(path, dtype=dtype, mode="r", shape=(self.nnz,))
+                  for path, dtype in zip(self.paths, self.dtypes)]
+        for start in range(0, self.nnz, self.block_entries):
+            stop = min(start + self.block_entries, self.nnz)
+            yield tuple(np.array(array[start:stop]) for array in arrays)
+    
+    def remove(self):
+        for path in self.paths:
+            os.remove(path)
+        self.nnz = 0
+    
+    def diagonal(self) -> np.ndarray:
+        diagonal = np.zeros(self.shape[0])
+        for rows, cols, values in self.blocks():
+            on = rows == cols
+            diagonal += np.bincount(rows[on], weights=values[on], minlength=self.shape[0])
+        return diagonal
+    
+    def __matmul__(self, x: np.ndarray) -> np.ndarray:
+        y = np.zeros(self.shape[0])
+        for rows, cols, values in self.blocks():
+            y += np.bincount(rows, weights=values * x[cols], minlength=self.shape[0])
+        return y
+
+
+class OutOfCoreCSR:
+    """
+    CSR matrix whose indices and values live in memory-mapped files.
+    
+    Built from triplet blocks by a two-pass counting sort (duplicates are
+    kept), and multiplied in row blocks of at most block_entries entries so
+    only one block is resident at a time. The row pointer stays in RAM.
+    """
+    
+    def __init__(self, scratch: ScratchDirectory, name: str, triplets: TripletFile,
+                 index: Optional[np.ndarray] = None):
+        """index maps triplet rows/cols to rows of this matrix (-1 drops the entry)."""
+        n = triplets.shape[0] if index is None else int(index.max(initial=-1)) + 1
+        self.shape = (n, n)
+        self.block_entries = triplets.block_entries
+        
+        def mapped(rows, cols, values):
+            if index is None:
+                return rows, cols, values
+            rows, cols = index[rows], index[cols]
+            keep = (rows >= 0) & (cols >= 0)
+            return rows[keep], cols[keep], values[keep]
+        
+        counts = np.zeros(n, dtype=np.int64)
+        for block in triplets.blocks():
+            rows, _, _ = mapped(*block)
+            counts += np.bincount(rows, minlength=n)
+        self.indptr = np.concatenate(([0], np.cumsum(counts)))
+        self.nnz = int(self.indptr[-1])
+        
+        index_dtype = np.int32 if n < 2 ** 31 else np.int64
+        self.indices = scratch.array(f"{name}.indices", (max(self.nnz, 1),), index_dtype)
+        self.data = scratch.array(f"{name}.data", (max(self.nnz, 1),))
+        cursor = self.indptr[:-1].copy()
+        for block in triplets.blocks():
+            rows, cols, values = mapped(*block)
+            order = np.argsort(rows, kind="stable")
+            rows, cols, values = rows[order], cols[order], values[order]
+            row_ids, first, row_counts = np.unique(rows, return_index=True, return_counts=True)
+            position = cursor[rows] + np.arange(len(rows)) - np.repeat(first, row_counts)
+            self.indices[position] = cols
+            self.data[position] = values
+            cursor[row_ids] += row_counts
+        self.indices.flush()
+        self.data.flush()
+        
+        # Row blocks holding at most block_entries entries (at least one row)
+        bounds = [0]
+        while bounds[-1] < n:
+            target = self.indptr[bounds[-1]] + self.block_entries
+            bounds.append(max(bounds[-1] + 1, int(np.searchsorted(self.indptr, target, side="right")) - 1))
+        bounds[-1] = n
+        self.row_blocks = list(zip(bounds[:-1], bounds[1:]))
+    
+    def block(self, start: int, stop: int) -> sparse.csr_matrix:
+        """Rows start:stop as an in-memory CSR matrix."""
+        first, last = self.indptr[start], self.indptr[stop]
+        return sparse.csr_matrix(
+            (np.array(self.data[first:last]), np.array(self.indices[first:last]),
+             self.indptr[start:stop + 1] - first),
+            shape=(stop - start, self.shape[1])
+        )
+    
+    def diagonal(self) -> np.ndarray:
+        diagonal = np.zeros(self.shape[0])
+        for start, stop in self.row_blocks:
+            diagonal[start:stop] = self.block(start, stop).diagonal(start)
+        return diagonal
+    
+    def __matmul__(self, x: np.ndarray) -> np.ndarray:
+        y = np.zeros(self.shape[0])
+        for start, stop in self.row_blocks:
+            y[start:stop] = self.block(start, stop) @ x
+        return y
+
+
+def project_triplets(P: sparse.csr_matrix, rows: np.ndarray, cols: np.ndarray,
+                     values: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Entries of P^T K P contributed by the entries (rows, cols, values) of K."""
+    def expand(dofs, weights):
+        counts = np.diff(P.indptr)[dofs]
+        take = np.repeat(np.arange(len(dofs)), counts)
+        offset = np.arange(len(take)) - np.repeat(np.cumsum(counts) - counts, counts)
+        k = P.indptr[dofs[take]] + offset
+        return take, P.indices[k], weights[take] * P.data[k]
+    
+    take, reduced_rows, weighted = expand(rows, values)
+    take, reduced_cols, weighted = expand(cols[take], weighted)
+    return reduced_rows[take], reduced_cols, weighted
+
+
+# ============================================================================
+# MATRIX-FREE OPERATORS
+# ============================================================================
+
+# Element products are applied one matrix product per distinct element
+# stiffness up to this many distinct matrices; beyond, per element
+MATRIX_FREE_MAX_GROUPS = 256
+
+
+class ElementOperator:
+    """
+    Stiffness as the unassembled sum of element matrices, K = sum A_e^T k_e A_e.
+    
+    Products gather each element's DOF values, apply its matrix and
+    scatter-add the results, so memory is one w x w matrix per distinct
+    element stiffness (w = 12, or 6 for truss and plane-frame elements)
+    plus the element DOF maps, with no sparse index structure and no
+    factor. DOF map entries equal to the operator size stand for DOFs
+    outside it (supports, inactive DOFs) and are dropped.
+    """
+    
+    def __init__(self, dof_maps: np.ndarray, k: np.ndarray, group: np.ndarray, size: int):
+        self.shape = (size, size)
+        self.dtype = np.dtype(np.float64)
+        if len(k) > MATRIX_FREE_MAX_GROUPS:
+            k, group = k[group], np.arange(len(group))
+        self.dof_maps = dof_maps
+        self.k = k
+        self.group = group
+        # Elements ordered by group, with each group's slice of that order
+        self.order = np.argsort(group, kind="stable")
+        self.bounds = np.searchsorted(group[self.order], np.arange(len(k) + 1))
+        self.grouped = len(k) <= MATRIX_FREE_MAX_GROUPS
+    
+    @property
+    def nnz(self) -> int:
+        """Stored values: element matrices and DOF map entries."""
+        return self.k.size + self.dof_maps.size
+    
+    @property
+    def memory_mb(self) -> float:
+        arrays = (self.k, self.dof_maps, self.group, self.order)
+        return sum(array.nbytes for array in arrays) / (1024 ** 2)
+    
+    def restrict(self, dofs: np.ndarray) -> "ElementOperator":
+        """The operator on a subset of its DOFs (P^T K P for a selection P)."""
+        position = np.full(self.shape[0] + 1, len(dofs), dtype=np.int64)
+        position[dofs] = np.arange(len(dofs))
+        operator = ElementOperator.__new__(ElementOperator)
+        operator.__dict__.update(self.__dict__)
+        operator.shape = (len(dofs), len(dofs))
+        operator.dof_maps = position[self.dof_maps]
+        return operator
+    
+    def __matmul__(self, x: np.ndarray) -> np.ndarray:
+        """K x for a vector or column block."""
+        n = self.shape[0]
+        x_ext = np.concatenate([x, np.zeros((1,) + x.shape[1:])])
+        x_elements = x_ext[self.dof_maps]
+        if self.grouped:
+            y_elements = np.empty_like(x_elements)
+            for g in range(len(self.k)):
+                members = self.order[self.bounds[g]:self.bounds[g + 1]]
+                y_elements[members] = np.einsum('ij,mj...->mi...', self.k[g], x_elements[members])
+        else:
+            y_elements = np.einsum('mij,mj...->mi...', self.k, x_elements)
+        
+        dofs = self.dof_maps.ravel()
+        y_elements = y_elements.reshape((len(dofs),) + x.shape[1:])
+        if x.ndim == 1:
+            return np.bincount(dofs, weights=y_elements, minlength=n + 1)[:n]
+        return np.column_stack([np.bincount(dofs, weights=y_elements[:, j], minlength=n + 1)[:n]
+                                for j in range(x.shape[1])])
+    
+    def matvec(self, x: np.ndarray) -> np.ndarray:
+        return self @ np.ravel(x)
+    
+    def diagonal(self) -> np.ndarray:
+        n = self.shape[0]
+        k_diagonal = np.diagonal(self.k, axis1=1, axis2=2)[self.group]
+        return np.bincount(self.dof_maps.ravel(), weights=k_diagonal.ravel(), minlength=n + 1)[:n]
+    
+    def node_block_triplets(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(rows, cols, values) of every element's entries coupling DOFs of one end node."""
+        half = self.dof_maps.shape[1] // 2
+        ends = [np.arange(half), np.arange(half, 2 * half)]
+        i = np.concatenate([np.repeat(end, half) for end in ends])
+        j = np.concatenate([np.tile(end, half) for end in ends])
+        rows, cols = self.dof_maps[:, i].ravel(), self.dof_maps[:, j].ravel()
+        values = self.k[:, i, j][self.group].ravel()
+        keep = (rows < self.shape[0]) & (cols < self.shape[0])
+        return rows[keep], cols[keep], values[keep]
+
+
+def block_jacobi(rows: np.ndarray, cols: np.ndarray, values: np.ndarray,
+                 free_dofs: np.ndarray, pool: Optional[ThreadPoolExecutor] = None,
+                 chunks: int = 1) -> spla.LinearOperator:
+    """
+    Block-Jacobi preconditioner from the nodal diagonal blocks of a reduced matrix.
+    
+    Triplets are in reduced numbering; free_dofs gives each reduced DOF's
+    global DOF, and so its node. Entries coupling different nodes are
+    ignored. Each node's block (up to 6x6 over its free DOFs) is inverted.
+    With a thread pool the block products run in node chunks.
+    """
+    n = len(free_dofs)
+    nodes, slot = np.unique(free_dofs // 6, return_inverse=True)
+    offset = free_dofs % 6
+    same = slot[rows] == slot[cols]
+    blocks = np.bincount(
+        slot[rows[same]] * 36 + offset[rows[same]] * 6 + offset[cols[same]],
+        weights=values[same], minlength=len(nodes) * 36
+    ).reshape(-1, 6, 6)
+    
+    # DOFs outside the reduced system get a unit diagonal so blocks invert
+    absent = np.ones((len(nodes), 6), dtype=bool)
+    absent[slot, offset] = False
+    blocks[absent[:, :, None] | absent[:, None, :]] = 0.0
+    blocks[:, np.arange(6), np.arange(6)] += absent
+    inverse = np.linalg.inv(blocks)
+    bounds = even_chunks(len(nodes), chunks) if pool is not None else None
+    
+    def apply(r: np.ndarray) -> np.ndarray:
+        z = np.zeros((len(nodes), 6))
+        z[slot, offset] = np.ravel(r)
+        if bounds is None:
+            return np.einsum('nij,nj->ni', inverse, z)[slot, offset]
+        out = np.empty_like(z)
+        
+        def work(first: int, last: int):
+            np.einsum('nij,nj->ni', inverse[first:last], z[first:last], out=out[first:last])
+        
+        run_chunks(pool, bounds, work)
+        return out[slot, offset]
+    
+    return spla.LinearOperator((n, n), apply)
+
+
+# ============================================================================
+# THREAD-PARALLEL KERNELS
+# ============================================================================
+
+# Work (stored entries, or 36 per block-Jacobi node) below which a row
+# chunk is not worth a thread-pool task
+PARALLEL_MIN_CHUNK_WORK = 20000
+
+# Applications of each kernel timed serially and in parallel to measure
+# the speedup (the faster variant is used for the solve)
+PARALLEL_TIMING_REPEATS = 5
+
+
+def resolve_threads(value: Any) -> int:
+    """Worker thread count from config.threads: a positive count, or "auto"/0 for every core."""
+    if value in ("auto", 0):
+        return os.cpu_count() or 1
+    try:
+        threads = int(value)
+    except (TypeError, ValueError):
+        threads = 0
+    if threads < 1:
+        raise SolverError(f"Invalid thread count: {value}", "Use a positive integer or \"auto\"")
+    return threads
+
+
+def chunk_count(work: int, threads: int) -> int:
+    """Chunks for a kernel: one per thread, but none below PARALLEL_MIN_CHUNK_WORK."""
+    return max(1, min(threads, work // PARALLEL_MIN_CHUNK_WORK))
+
+
+def even_chunks(n: int, chunks: int) -> np.ndarray:
+    """Boundaries (chunks + 1,) of near-equal runs of n rows."""
+    return np.linspace(0, n, chunks + 1).round().astype(np.int64)
+
+
+def balanced_chunks(indptr: np.ndarray, chunks: int) -> np.ndarray:
+    """Row boundaries splitting a compressed matrix into runs of near-equal stored entries."""
+    bounds = np.searchsorted(indptr, np.linspace(0, indptr[-1], chunks + 1))
+    bounds[0], bounds[-1] = 0, len(indptr) - 1
+    return np.unique(bounds)
+
+
+def run_chunks(pool: ThreadPoolExecutor, bounds: np.ndarray, work: Callable[[int, int], None]):
+    """Run work(first, last) for every chunk on the pool and wait for all of them."""
+    for future in [pool.submit(work, first, last) for first, last in zip(bounds[:-1], bounds[1:])]:
+        future.result()
+
+
+def parallel_matvec(K: sparse.spmatrix, pool: ThreadPoolExecutor,
+                    chunks: int) -> Callable[[np.ndarray], np.ndarray]:
+    """
+    K x with the rows of a CSR or BSR matrix split into thread-pool chunks.
+    
+    Each chunk is a row slice sharing K's data and indices (no copy) and
+    writes its own part of the result; scipy's sparse kernels release the
+    GIL while they run.
+    """
+    block = K.blocksize[0] if isinstance(K, sparse.bsr_matrix) else 1
+    bounds = balanced_chunks(K.indptr, chunks)
+    pieces = []
+    for first, last in zip(bounds[:-1], bounds[1:]):
+        start, stop = K.indptr[first], K.indptr[last]
+        parts = (K.data[start:stop], K.indices[start:stop], K.indptr[first:last + 1] - start)
+        shape = ((last - first) * block, K.shape[1])
+        pieces.append(sparse.bsr_matrix(parts, shape=shape, blocksize=K.blocksize)
+                      if block > 1 else sparse.csr_matrix(parts, shape=shape))
+    row_bounds = bounds * block
+    
+    def matvec(x: np.ndarray) -> np.ndarray:
+        x = np.ravel(x)
+        y = np.empty(K.shape[0])
+        
+        def work(first: int, last: int):
+            y[first:last] = pieces[np.searchsorted(row_bounds, first)] @ x
+        
+        run_chunks(pool, row_bounds, work)
+        return y
+    
+    return matvec
+
+
+def time_kernel(apply: Callable[[np.ndarray], np.ndarray], x: np.ndarray,
+                repeats: int = PARALLEL_TIMING_REPEATS) -> float:
+    """Mean wall time (ms) of one application, after a warm-up."""
+    apply(x)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        apply(x)
+    return (time.perf_counter() - start) * 1000 / repeats
+
+
+# ============================================================================
+# REDUCED SYSTEM AND LOW-RANK UPDATES
+# ============================================================================
+
+# Woodbury updates above this rank fall back to a full refactorization
+INCREMENTAL_MAX_RANK = 64
+
+# Member properties that update_members may change
+UPDATABLE_MEMBER_FIELDS = ("E", "A", "Iy", "Iz", "G", "J")
+
+# Active-set iteration for tension-/compression-only members and supports:
+# iteration limit, and the tolerance (relative to the largest displacement
+# or load) within which an elongation or reaction counts as zero
+ACTIVE_SET_MAX_ITERATIONS = 50
+ACTIVE_SET_TOL = 1e-9
+
+# Pushover: local end-force components that can hinge (start My, Mz, end
+# My, Mz); hinges within this fraction of their plastic moment form in the
+# same event; and the tangent stiffness, relative to the initial one, below
+# which the structure is a mechanism
+HINGE_COMPONENTS = np.array([4, 5, 10, 11])
+HINGE_TOL = 1e-9
+MECHANISM_TOL = 1e-6
+
+# Unit-load right-hand sides back-substituted per block
+MOVING_LOAD_CHUNK_SIZE = 256
+
+# Section properties with sensitivities -> local stiffness block they scale
+SENSITIVITY_BLOCKS = {"A": 0, "Iz": 2, "Iy": 3}
+
+# Direct solve precisions: float64 factors, or float32 factors + float64 refinement
+PRECISIONS = ("double", "mixed")
+REFINEMENT_TOLERANCE = 1e-12   # Relative residual that ends refinement
+MAX_REFINEMENT_STEPS = 10
+
+
+@dataclass
+class ReducedSystem:
+    """Global system reduced to its free DOFs: u_full = expand(u_reduced)."""
+    K: sparse.csr_matrix
+    F: np.ndarray
+    K_reduced: sparse.csr_matrix
+    F_reduced: np.ndarray
+    free_dofs: np.ndarray        # Global DOF of each reduced equation
+    constrained_dofs: List[int]  # Supported DOFs
+    inactive_dofs: np.ndarray    # Free DOFs restrained for lack of stiffness
+    C: Optional[sparse.csc_matrix] = None  # Constraint matrix, u = C @ u
+    P: Optional[sparse.csc_matrix] = None  # C[:, free_dofs]
+    
+    def expand(self, u_reduced: np.ndarray) -> np.ndarray:
+        """Map a reduced vector (or column block) to all global DOFs."""
+        if self.P is not None:
+            return self.P @ u_reduced
+        u = np.zeros((self.K.shape[0],) + u_reduced.shape[1:])
+        u[self.free_dofs] = u_reduced
+        return u
+    
+    def restrict(self, v: np.ndarray) -> np.ndarray:
+        """Project a global vector (or column block) onto the reduced DOFs."""
+        if self.P is not None:
+            return self.P.T @ v
+        return v[self.free_dofs]
+    
+    def restrict_matrix(self, M: sparse.spmatrix) -> sparse.csr_matrix:
+        """Project a global matrix onto the reduced DOFs (P^T M P)."""
+        if self.P is not None:
+            return (self.P.T @ M @ self.P).tocsr()
+        M = M.tocsr()
+        return M[self.free_dofs][:, self.free_dofs]
+
+
+def low_rank_factors(delta: sparse.spmatrix, tol: float = 1e-10) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Factor a sparse symmetric update as delta = U diag(lam) U^T.
+    
+    The update is confined to a few DOFs, so its dense block there is
+    eigendecomposed and negligible eigenvalues are dropped.
+    
+    Returns:
+        Tuple of (dofs, V, lam) with U = I[:, dofs] @ V
+    """
+    delta = delta.tocsr()
+    delta.eliminate_zeros()
+    coo = delta.tocoo()
+    dofs = np.unique(np.concatenate([coo.row, coo.col]))
+    if len(dofs) == 0:
+        return dofs, np.zeros((0, 0)), np.zeros(0)
+    
+    block = delta[dofs][:, dofs].toarray()
+    lam, V = np.linalg.eigh((block + block.T) / 2)
+    keep = np.abs(lam) > tol * np.abs(lam).max()
+    return dofs, V[:, keep], lam[keep]
+
+
+class SymmetricLU:
+    """
+    SuperLU factorization of a symmetric positive definite matrix.
+    
+    Orders by minimum degree on A^T + A with diagonal pivots, which keeps
+    far less fill than the default column ordering. The ordering depends
+    only on the sparsity pattern, so matrices sharing it are refactored
+    with the saved ordering and the symbolic step skipped.
+    """
+    
+    def __init__(self, K: sparse.spmatrix, ordering: Optional[np.ndarray] = None):
+        K = K.tocsc()
+        self.shape = K.shape
+        self.dtype = K.dtype
+        options = {"SymmetricMode": True}
+        if ordering is None:
+            self.lu = spla.splu(K, permc_spec="MMD_AT_PLUS_A",
+                                diag_pivot_thresh=0.0, options=options)
+            self.ordering = np.argsort(self.lu.perm_c)
+            self.permuted = False
+        else:
+            self.lu = spla.splu(K[ordering][:, ordering].tocsc(), permc_spec="NATURAL",
+                                diag_pivot_thresh=0.0, options=options)
+            self.ordering = ordering
+            self.permuted = True
+    
+    def solve(self, b: np.ndarray) -> np.ndarray:
+        """Solve for a vector or column block."""
+        if not self.permuted:
+            return self.lu.solve(b)
+        x = np.empty(b.shape)
+        x[self.ordering] = self.lu.solve(np.ascontiguousarray(b[self.ordering]))
+        return x
+    
+    @property
+    def factor_mb(self) -> float:
+        """Memory held by the L and U factors (values and row indices)."""
+        return self.lu.nnz * (np.dtype(np.int32).itemsize + self.dtype.itemsize) / 1024 ** 2
+
+
+class MixedPrecisionLU:
+    """
+    Float32 factorization with float64 iterative refinement.
+    
+    K is equilibrated (D K D with D = diag(K)^-1/2, unit diagonal) so the
+    translational and rotational stiffnesses fit float32 together, then
+    factorized in single precision at about half the factor memory. Each
+    solve refines x += D LU^-1 D r against the float64 K until the relative
+    residual reaches the tolerance. If refinement stalls the matrix is
+    refactorized in float64 and that factorization is used from then on.
+    """
+    
+    def __init__(self, K: sparse.spmatrix, ordering: Optional[np.ndarray] = None,
+                 tolerance: float = REFINEMENT_TOLERANCE, max_steps: int = MAX_REFINEMENT_STEPS):
+        self.K = K.tocsr()
+        self.shape = K.shape
+        self.tolerance = tolerance
+        self.max_steps = max_steps
+        diagonal = self.K.diagonal()
+        self.scale = 1.0 / np.sqrt(np.where(diagonal > 0, diagonal, 1.0))
+        # Scale the entries in place of D @ K @ D: a product would prune the
+        # pattern's explicit zeros, and the fill-reducing ordering with them
+        rows = np.repeat(np.arange(self.shape[0]), np.diff(self.K.indptr))
+        equilibrated = self.K.astype(np.float32)
+        equilibrated.data = (self.K.data * self.scale[rows] * self.scale[self.K.indices]).astype(np.float32)
+        self.single = SymmetricLU(equilibrated, ordering)
+        self.ordering = self.single.ordering
+        self.fallback: Optional[SymmetricLU] = None
+        self.fallback_reason: Optional[str] = None
+        # Refinement statistics of the most recent solve
+        self.steps = 0
+        self.residual = 0.0
+    
+    @property
+    def factor_mb(self) -> float:
+        return (self.fallback or self.single).factor_mb
+    
+    def solve(self, b: np.ndarray) -> np.ndarray:
+        """Solve for a vector or column block to the refinement tolerance."""
+        if self.fallback is not None:
+            return self.fallback.solve(b)
+        
+        scale = self.scale if b.ndim == 1 else self.scale[:, None]
+        b_norm = np.linalg.norm(b, axis=0)
+        b_norm = np.where(b_norm > 0, b_norm, 1.0)
+        x = np.zeros(b.shape)
+        r = np.array(b, dtype=np.float64)
+        residual = 1.0
+        for step in range(1, self.max_steps + 1):
+            correction = self.single.solve((scale * r).astype(np.float32))
+            x += scale * correction
+            r = b - self.K @ x
+            previous, residual = residual, float(np.max(np.linalg.norm(r, axis=0) / b_norm))
+            if not np.isfinite(residual):
+                break
+            if residual <= self.tolerance:
+                self.steps, self.residual = step, residual
+                return x
+            if residual > 0.5 * previous:
+                break  # Stalled: float32 factors too inaccurate for this K
+        
+        self.fallback_reason = (f"refinement stalled at relative residual {residual:.1e} "
+                                f"after {step} steps")
+        self.fallback = SymmetricLU(self.K)
+        self.single = None  # Release the float32 factors
+        self.steps, self.residual = step, residual
+        return self.fallback.solve(b)
+
+
+class WoodburySolver:
+    """
+    Solve (A + U diag(lam) U^T) x = b reusing a factorization of A.
+    
+    By Sherman-Morrison-Woodbury, x = y - Z S^-1 U^T y with y = A^-1 b,
+    Z = A^-1 U and the small capacitance matrix S = diag(1/lam) + U^T Z.
+    Setup costs one multi-RHS back-substitution with rank(U) columns.
+    """
+    
+    def __init__(self, lu: SymmetricLU, dofs: np.ndarray, V: np.ndarray, lam: np.ndarray):
+        self.lu = lu
+        self.dofs = dofs
+        self.V = V
+        
+        rhs = np.zeros((lu.shape[0], V.shape[1]))
+        rhs[dofs] = V
+        self.Z = lu.solve(rhs) if V.shape[1] else rhs
+        self.S = np.diag(1.0 / lam) + V.T @ self.Z[dofs]
+        
+        if self.rank and np.linalg.cond(self.S) > 1e12:
+            raise np.linalg.LinAlgError("Low-rank update leaves the system singular")
+    
+    @property
+    def rank(self) -> int:
+        return self.V.shape[1]
+    
+    def solve(self, b: np.ndarray, y: Optional[np.ndarray] = None) -> np.ndarray:
+        """Solve for b (vector or column block); y = A^-1 b if already known."""
+        if y is None:
+            y = self.lu.solve(b)
+        if not self.rank:
+            return y
+        return y - self.Z @ np.linalg.solve(self.S, self.V.T @ y[self.dofs])
+
+
+def train_envelopes(stations: np.ndarray, ordinates: np.ndarray, axles: List[Tuple[float, float]],
+                    step: float, both_directions: bool = True) -> Dict[str, np.ndarray]:
+    """
+    Max/min responses of an axle train moving along influence lines.
+    
+    The lead axle steps from the path start until the last axle has left;
+    each axle samples the ordinates by linear interpolation (zero off the
+    path), with the interpolation weights shared by all responses.
+    
+    Args:
+        stations: (s,) increasing path distances of the ordinates
+        ordinates: (r, s) influence ordinates per response
+        axles: (offset behind lead axle, load) pairs
+    
+    Returns:
+        Dict of (r,) arrays: max, min, their lead-axle positions and
+        travel directions (+1 along the path, -1 against it)
+    """
+    offsets = np.array([offset for offset, _ in axles])
+    loads = np.array([load for _, load in axles])
+    length = stations[-1]
+    travel = length + offsets.max()
+    lead = np.linspace(0.0, travel, int(np.ceil(travel / step - 1e-9)) + 1)
+    
+    best = None
+    for direction in ((1.0, -1.0) if both_directions else (1.0,)):
+        # Lead axle position along the path; trailing axles follow behind it
+        lead_position = lead if direction > 0 else length - lead
+        values = np.zeros((len(ordinates), len(lead)))
+        for offset, load in zip(offsets, loads):
+            position = lead_position - direction * offset
+            on_path = (position >= 0.0) & (position <= length)
+            i = np.clip(np.searchsorted(stations, position, side="right") - 1, 0, len(stations) - 2)
+            w = np.clip((position - stations[i]) / (stations[i + 1] - stations[i]), 0.0, 1.0)
+            sample = ordinates[:, i] * (1.0 - w) + ordinates[:, i + 1] * w
+            values += load * np.where(on_path, sample, 0.0)
+        
+        i_max = values.argmax(axis=1)
+        i_min = values.argmin(axis=1)
+        rows = np.arange(len(values))
+        current = {
+            "max": values[rows, i_max], "maxPosition": lead_position[i_max],
+            "maxDirection": np.full(len(values), direction),
+            "min": values[rows, i_min], "minPosition": lead_position[i_min],
+            "minDirection": np.full(len(values), direction),
+        }
+        if best is None:
+            best = current
+            continue
+        for bound, better in (("max", np.greater), ("min", np.less)):
+            take = better(current[bound], best[bound])
+            for key in (bound, f"{bound}Position", f"{bound}Direction"):
+                best[key] = np.where(take, current[key], best[key])
+    
+    return best
+
+
+# ============================================================================
+# CHECKPOINTS
+# ============================================================================
+
+CHECKPOINT_INTERVAL_SECONDS = 60.0
+
+# The solver's own directory under the configured one; only its files are removed
+CHECKPOINT_SUBDIRECTORY = "beamlab-checkpoint"
+CHECKPOINT_FILES = ("K.npz", "K_reduced.npz", "C.npz", "P.npz", "system.npz",
+                    "iterate.npy", "meta.json")
+
+
+class Checkpoint:
+    """
+    On-disk state of an iterative solve, for resuming after the process dies.
+    
+    Holds the reduced system (so a resume skips assembly), the preconditioner
+    it was solved with (rebuilt from K on resume) and the latest CG iterate,
+    which is rewritten at most every interval_seconds. Files are replaced
+    atomically, so a kill mid-write leaves the previous checkpoint intact.
+    They live in a subdirectory of the given one, and clearing removes only
+    those files, never anything else under it.
+    """
+    
+    def __init__(self, directory: str, model_hash: str,
+                 interval_seconds: float = CHECKPOINT_INTERVAL_SECONDS):
+        self.directory = os.path.join(directory, CHECKPOINT_SUBDIRECTORY)
+        self.model_hash = model_hash
+        self.interval_seconds = interval_seconds
+        self.last_saved = time.monotonic()
+    
+    def _write(self, name: str, write):
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, name)
+        with open(path + ".tmp", "wb") as f:
+            write(f)
+        os.replace(path + ".tmp", path)
+    
+    def _read_meta(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(os.path.join(self.directory, "meta.json")) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+    
+    def save_system(self, system: ReducedSystem, slave_dofs: set, preconditioner: str):
+        """Store the reduced system at the start of a solve."""
+        for name in ("K", "K_reduced", "C", "P"):
+            matrix = getattr(system, name)
+            if matrix is not None:
+                self._write(f"{name}.npz", lambda f: sparse.save_npz(f, matrix.tocsr()))
+        self._write("system.npz", lambda f: np.savez(
+            f, F=system.F, F_reduced=system.F_reduced, free_dofs=system.free_dofs,
+            constrained_dofs=np.asarray(system.constrained_dofs, dtype=np.int64),
+            inactive_dofs=system.inactive_dofs,
+            slave_dofs=np.array(sorted(slave_dofs), dtype=np.int64)
+        ))
+        self._write_meta({"modelHash": self.model_hash, "preconditioner": preconditioner,
+                          "constraints": system.C is not None, "iterations": 0})
+    
+    def save_iterate(self, x: np.ndarray, iterations: int):
+        """Store the current iterate (the reduced system must be saved already)."""
+        self._write("iterate.npy", lambda f: np.save(f, x))
+        meta = self._read_meta()
+        meta["iterations"] = iterations
+        self._write_meta(meta)
+        self.last_saved = time.monotonic()
+    
+    def _write_meta(self, meta: Dict[str, Any]):
+        self._write("meta.json", lambda f: f.write(json.dumps(meta).encode()))
+    
+    def due(self) -> bool:
+        return time.monotonic() - self.last_saved >= self.interval_seconds
+    
+    def load(self) -> Optional[Tuple[ReducedSystem, set, str, Optional[np.ndarray], int]]:
+        """(system, slave DOFs, preconditioner, iterate, iterations), or None if absent."""
+        meta = self._read_meta()
+        if meta is None:
+            return None
+        if meta["modelHash"] != self.model_hash:
+            raise SolverError("Checkpoint is for a different model",
+                              f"Clear {self.directory} or use another checkpoint directory")
+        
+        def matrix(name):
+            return sparse.load_npz(os.path.join(self.directory, f"{name}.npz")).tocsr()
+        
+        arrays = np.load(os.path.join(self.directory, "system.npz"))
+        C = P = None
+        if meta["constraints"]:
+            C, P = matrix("C").tocsc(), matrix("P").tocsc()
+        system = ReducedSystem(
+            K=matrix("K"), F=arrays["F"], K_reduced=matrix("K_reduced"),
+            F_reduced=arrays["F_reduced"], free_dofs=arrays["free_dofs"],
+            constrained_dofs=arrays["constrained_dofs"].tolist(),
+            inactive_dofs=arrays["inactive_dofs"], C=C, P=P
+        )
+        x = None
+        if meta["iterations"]:
+            x = np.load(os.path.join(self.directory, "iterate.npy"))
+        return system, set(arrays["slave_dofs"].tolist()), meta["preconditioner"], x, meta["iterations"]
+    
+    def clear(self):
+        for name in CHECKPOINT_FILES:
+            for path in (os.path.join(self.directory, name),
+                         os.path.join(self.directory, name + ".tmp")):
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(path)
+        with contextlib.suppress(OSError):
+            os.rmdir(self.directory)
+
+
+# ============================================================================
+# TIME HISTORY
+# ============================================================================
+
+def newmark_coefficients(dt: float, beta: float, gamma: float) -> np.ndarray:
+    """Newmark-beta integration constants a0..a7 (Bathe's notation)."""
+    return np.array([
+        1 / (beta * dt * dt), gamma / (beta * dt), 1 / (beta * dt), 1 / (2 * beta) - 1,
+        gamma / beta - 1, dt / 2 * (gamma / beta - 2), dt * (1 - gamma), gamma * dt
+    ])
+
+
+def rayleigh_coefficients(ratio: float, f1: float, f2: float) -> Tuple[float, float]:
+    """(alpha, beta) of C = alpha M + beta K giving the damping ratio at frequencies f1, f2 (Hz)."""
+    w1, w2 = 2 * np.pi * f1, 2 * np.pi * f2
+    return 2 * ratio * w1 * w2 / (w1 + w2), 2 * ratio / (w1 + w2)
+
+
+# ============================================================================
+# RESPONSE SPECTRUM
+# ============================================================================
+
+MODAL_COMBINATIONS = ("cqc", "srss")
+
+# Reduced systems up to this size are solved for modes as dense matrices
+DENSE_EIGEN_SIZE = 500
+
+# Modes whose 1/omega² is below this fraction of the largest one are
+# massless DOFs (infinite frequency) and dropped
+MODE_TOL = 1e-12
+
+# Entries (rows x modes) of the modal response blocks combined at a time
+SPECTRUM_CHUNK_ENTRIES = 1 << 22
+
+
+def cqc_correlation(omega: np.ndarray, damping: float) -> np.ndarray:
+    """CQC modal correlation coefficients for equal modal damping (Der Kiureghian)."""
+    r = omega[None, :] / omega[:, None]
+    z2 = damping * damping
+    return 8 * z2 * (1 + r) * r ** 1.5 / ((1 - r * r) ** 2 + 4 * z2 * r * (1 + r) ** 2)
+
+
+def combine_modal_responses(X: np.ndarray, Q: np.ndarray, rho: np.ndarray) -> np.ndarray:
+    """
+    Combined peak responses sqrt(x_r diag(q) rho diag(q) x_r^T).
+    
+    X holds the responses (rows, modes) to unit modal amplitudes and Q the
+    modal amplitudes (directions, modes); every direction is one matrix
+    product, so the quadratic form over all modes costs one GEMM per row block.
+    
+    Returns:
+        Combined responses (rows, directions)
+    """
+    d, m = Q.shape
+    A = Q[:, :, None] * rho[None] * Q[:, None, :]
+    Y = (X @ A.transpose(1, 0, 2).reshape(m, d * m)).reshape(len(X), d, m)
+    return np.sqrt(np.maximum(np.einsum('rdm,rm->rd', Y, X), 0.0))
+
+
+class FrameOutput:
+    """
+    Sink for decimated time-history frames (nodal displacements).
+    
+    Frames are streamed to a CSV file (one row per frame) or a callback as
+    they are computed; only without either are they kept for the result.
+    """
+    
+    def __init__(self, node_ids: List[str], path: Optional[str] = None,
+                 callback: Optional[FrameCallback] = None):
+        self.node_ids = node_ids
+        self.path = path
+        self.callback = callback
+        self.frames = 0
+        self.times: List[float] = []
+        self.values: List[np.ndarray] = []
+        self.file = None
+        if path is not None:
+            self.file = open(path, "w")
+            columns = [f"{node}:{dof}" for node in node_ids for dof in DOF_NAMES]
+            self.file.write(",".join(["time"] + columns) + "\n")
+    
+    def write(self, time_s: float, u: np.ndarray):
+        """Output one frame: u is (len(node_ids), 6)."""
+        self.frames += 1
+        if self.file is not None:
+            self.file.write(",".join(map(repr, [time_s] + u.ravel().tolist())) + "\n")
+        elif self.callback is not None:
+            self.callback(time_s, dict(zip(self.node_ids, u.tolist())))
+        else:
+            self.times.append(time_s)
+            self.values.append(u.copy())
+    
+    def close(self) -> Dict[str, Any]:
+        """Finish output; returns the frame count and file, or the frames kept."""
+        summary: Dict[str, Any] = {"frames": self.frames}
+        if self.file is not None:
+            self.file.close()
+            summary["file"] = self.path
+        elif self.callback is None:
+            values = np.array(self.values).reshape(self.frames, len(self.node_ids), 6)
+            summary["time"] = self.times
+            summary["displacements"] = {node: values[:, i].tolist()
+                                        for i, node in enumerate(self.node_ids)}
+        return summary
+
+
+# ============================================================================
+# MIRROR SYMMETRY
+# ============================================================================
+
+# Mirror node positions match to this fraction of the model's extent
+SYMMETRY_TOL = 1e-6
+
+# Stiffness and loads must be invariant under a reflection to this
+# fraction of their largest entry
+SYMMETRY_RTOL = 1e-10
+
+
+def mirror_nodes(coords: np.ndarray, axis: int) -> Optional[np.ndarray]:
+    """Mirror image of every node in the mid-plane normal to a global axis.
+    
+    Returns node indices (n,), or None unless the reflection maps the node
+    set onto itself and moves at least one node.
+    """
+    low, high = coords[:, axis].min(), coords[:, axis].max()
+    if high - low <= 0:
+        return None
+    tol = SYMMETRY_TOL * max(np.ptp(coords, axis=0).max(), 1.0)
+    mirrored = coords.copy()
+    mirrored[:, axis] = (low + high) - coords[:, axis]
+    
+    keys = np.round(np.vstack([coords, mirrored]) / tol).astype(np.int64)
+    first, inverse = unique_element_groups(keys)
+    node_of_group = np.full(len(first), -1, dtype=np.int64)
+    node_of_group[inverse[:len(coords)]] = np.arange(len(coords))
+    mirror = node_of_group[inverse[len(coords):]]
+    if np.any(mirror < 0):
+        return None
+    return mirror
+
+
+def reflection_dofs(mirror: np.ndarray, axis: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Signed DOF permutation (target, sign) of a reflection, (Q u)[target] = sign * u.
+    
+    The translation normal to the plane and the rotations about the two
+    in-plane axes change sign (rotations are axial vectors).
+    """
+    sign = -np.ones(6)
+    sign[:3] = 1.0
+    sign[axis] = -1.0
+    sign[3 + axis] = 1.0
+    target = (mirror[:, None] * 6 + np.arange(6)).ravel()
+    return target, np.tile(sign, len(mirror))
+
+
+def symmetric_basis(generators: List[Tuple[np.ndarray, np.ndarray]],
+                    parities: List[int]) -> sparse.csc_matrix:
+    """Basis B of the displacements u = B v with Q_i u = parity_i u for every reflection.
+    
+    Each column sums one DOF's images over the group generated by the
+    reflections, weighted by the group character; DOFs a reflection maps
+    onto themselves with the wrong sign (e.g. normal translations on the
+    plane of a symmetric load case) drop out.
+    """
+    n = len(generators[0][0])
+    group = [(np.arange(n), np.ones(n), 1)]
+    for (target, sign), parity in zip(generators, parities):
+        group += [(t[target], sign * s[target], c * parity) for t, s, c in group]
+    
+    representative = np.min([t for t, _, _ in group], axis=0) == np.arange(n)
+    dofs = np.flatnonzero(representative)
+    columns = np.arange(len(dofs))
+    B = sparse.coo_matrix((
+        np.concatenate([c * s[dofs] for _, s, c in group]),
+        (np.concatenate([t[dofs] for t, _, _ in group]), np.tile(columns, len(group)))
+    ), shape=(n, len(dofs))).tocsc()
+    B.eliminate_zeros()
+    return B[:, np.flatnonzero(np.diff(B.indptr))]
+
+
+# ============================================================================
+# SOLVER
+# ============================================================================
+
+class StructuralSolver:
+    """
+    High-performance structural solver using scipy.sparse.
+    
+    Solver selection:
+    - Direct (SuperLU): Default, robust for most problems
+    - Iterative (CG): For very large sparse systems (>10000 DOFs)
+    """
+    
+    def __init__(self, nodes: List[Node], members: List[Member], 
+                 supports: List[Support], loads: List[Load],
+                 constraints: Optional[List[Constraint]] = None,
+                 progress_callback: Optional[ProgressCallback] = None):
+        self.nodes = {n.id: n for n in nodes}
+        self.node_list = nodes
+        self.members = members
+        self.supports = {s.node_id: s for s in supports}
+        self.loads = loads
+        self.constraints = constraints or []
+        
+        self.num_nodes = len(nodes)
+        self.num_dofs = self.num_nodes * 6
+        
+        # DOFs eliminated by constraints (filled by _build_constraint_matrix)
+        self.slave_dofs: set = set()
+        
+        # State kept from the last solve for reuse
+        self.system: Optional[ReducedSystem] = None
+        self.u_reduced: Optional[np.ndarray] = None
+        self.lu: Optional[SymmetricLU] = None  # Set by direct solves only
+        self.precision = "double"  # Factorization precision, one of PRECISIONS
+        # Pin-jointed truss elements: True forces them, False disables
+        # detection, None uses them when every member is pinned
+        self.truss: Optional[bool] = None
+        # Plane-frame elements for models in a global xy-plane; False disables
+        self.planar = True
+        # Solve mirror-symmetric models on a half or quarter model
+        self.symmetry = True
+        self._symmetric_solve = False  # Last solve left no full factorization
+        # Element stiffness at factorization time, for members changed since
+        self._base_element_k: Dict[int, np.ndarray] = {}
+        self._base_kernel = "frame"  # Element formulation of _base_element_k
+        self._elements: Optional[ElementSet] = None
+        self._element_position: Optional[Dict[str, int]] = None
+        # Element stiffness matrices requested vs computed since the last assembly
+        self.element_cache = {"elements": 0, "unique": 0}
+        
+        # Timing, progress, and optional per-stage profiling
+        self.timing: Dict[str, float] = {}
+        self.progress_callback = progress_callback
+        self.profiler: Optional[Profiler] = None
+    
+    def _progress(self, stage: str, progress: int, message: str):
+        """Forward a progress update to the callback, if any."""
+        if self.progress_callback is not None:
+            self.progress_callback(stage, progress, message)
+    
+    @contextlib.contextmanager
+    def _stage(self, name: str):
+        """Time the enclosed block into self.timing[name] (and profile it if enabled)."""
+        with self.profiler.stage(name) if self.profiler else contextlib.nullcontext():
+            start = time.perf_counter()
+            yield
+            self.timing[name] = (time.perf_counter() - start) * 1000
+    
+    def solve(self, use_iterative: Optional[bool] = None, preconditioner: str = "ilu",
+              tolerance: float = 1e-8, max_iterations: int = 2000,
+              precision: Optional[str] = None,
+              out_of_core: Optional[OutOfCoreOptions] = None,
+              checkpoint: Optional[Checkpoint] = None, resume: bool = False,
+              matrix_free: bool = False, threads: int = 1) -> Dict[str, Any]:
+        """
+        Solve the structural system.
+        
+        Args:
+            use_iterative: Use iterative solver (CG) instead of direct (SuperLU);
+                None picks CG above ITERATIVE_THRESHOLD_DOFS free DOFs
+            preconditioner: CG preconditioner, one of PRECONDITIONERS
+            tolerance: CG relative residual tolerance
+            max_iterations: CG iteration limit
+            precision: Direct factorization precision, one of PRECISIONS
+                ("mixed": float32 factors refined in float64); None keeps the current
+            out_of_core: Assemble and solve (Jacobi CG) through memory-mapped
+                scratch files in blocks bounded by its memory limit
+            checkpoint: Periodically save an in-memory CG solve here
+            resume: Continue from the checkpoint's system and iterate, if any
+            matrix_free: Solve with CG on the unassembled element matrices
+                (block-Jacobi preconditioned unless "jacobi" or "none")
+            threads: Worker threads for the CG matrix product and
+                preconditioner (row chunks; 1 runs serially)
+        
+        Returns:
+            Solution dictionary with displacements, reactions, and timing info
+        """
+        if precision is not None:
+            if precision not in PRECISIONS:
+                raise SolverError(f"Unknown precision: {precision}",
+                                  f"Use one of: {', '.join(PRECISIONS)}")
+            self.precision = precision
+        if matrix_free:
+            if out_of_core:
+                raise SolverError("Choose either a matrix-free or an out-of-core solve")
+            use_iterative = True
+            checkpoint = None  # Checkpoints hold assembled matrices
+        total_start = time.perf_counter()
+        resumed = checkpoint.load() if checkpoint is not None and resume else None
+        scratch = ScratchDirectory(out_of_core.scratch_dir) if out_of_core and resumed is None else None
+        
+        try:
+            x0, start_iteration = None, 0
+            if resumed is not None:
+                # Reduced system from the checkpoint: no assembly
+                system, self.slave_dofs, preconditioner, x0, start_iteration = resumed
+                use_iterative = True
+                self._progress("solving", 50,
+                    f"Resumed from checkpoint at iteration {start_iteration}")
+            else:
+                # Stage 1: Assembly
+                self._progress("assembling", 10, f"Assembling {len(self.members)} members...")
+                
+                with self._stage("assembly"):
+                    if matrix_free:
+                        K = self._element_operator()
+                    elif scratch is None:
+                        K = self._assemble_global_stiffness()
+                    else:
+                        K = self._assemble_out_of_core(scratch, out_of_core.block_entries)
+                
+                self._progress("assembling", 40, 
+                    f"Assembled matrix: {K.shape[0]} DOFs, {K.nnz} non-zeros")
+                
+                # Build force vector
+                F = self._build_force_vector()
+                
+                # Stage 2: Apply boundary conditions
+                self._progress("solving", 50, "Applying boundary conditions...")
+                
+                with self._stage("boundary_conditions"):
+                    if matrix_free:
+                        system = self._reduce_matrix_free(K, F)
+                    elif scratch is None:
+                        system = self._reduce_system(K, F)
+                    else:
+                        system = self._reduce_out_of_core(K, F, scratch)
+            
+            # Stage 3: Solve
+            self._progress("solving", 60, 
+                f"Solving {len(system.free_dofs)} equations...")
+            
+            solver_info = {}
+            if use_iterative is None:
+                use_iterative = len(system.free_dofs) > ITERATIVE_THRESHOLD_DOFS
+            if scratch is not None or not use_iterative:
+                checkpoint = None  # Only in-memory CG solves are checkpointed
+            if checkpoint is not None and resumed is None:
+                checkpoint.save_system(system, self.slave_dofs, preconditioner)
+            self.lu = None  # Only a direct solve leaves a reusable factorization
+            
+            # Mirror-symmetric models solve for the symmetric (or
+            # antisymmetric) part only: u_reduced = B v
+            K_solve, F_solve, symmetry = system.K_reduced, system.F_reduced, None
+            if self.symmetry and scratch is None and checkpoint is None and not matrix_free:
+                with self._stage("symmetry"):
+                    symmetry = self._symmetry_subspace(system)
+                if symmetry is not None:
+                    B = symmetry[0]
+                    K_solve = (B.T @ system.K_reduced.tocsr() @ B).tocsr()
+                    K_solve.sum_duplicates()  # Sorted indices, as the float32 factorization needs
+                    F_solve = B.T @ system.F_reduced
+                    self._progress("solving", 62,
+                        f"Symmetric model: solving {B.shape[1]} equations...")
+            
+            with self._stage("solve"):
+                if scratch is not None:
+                    # Streaming Jacobi CG over the memory-mapped matrix
+                    u_reduced, solver_info = self._solve_out_of_core(
+                        system.K_reduced, system.F_reduced, scratch, tolerance, max_iterations
+                    )
+                    solver_info["memoryLimitMB"] = out_of_core.memory_limit_mb
+                    solver_info["scratchMB"] = scratch.size_mb()
+                elif use_iterative:
+                    # Use preconditioned conjugate gradients
+                    u_reduced, solver_info = self._solve_iterative(
+                        K_solve, F_solve, preconditioner, tolerance, max_iterations,
+                        x0=x0, start_iteration=start_iteration, checkpoint=checkpoint,
+                        free_dofs=system.free_dofs if symmetry is None else None,
+                        threads=threads
+                    )
+                    if matrix_free:
+                        solver_info["method"] = "matrix-free-cg"
+                        solver_info["operatorMB"] = K_solve.memory_mb
+                else:
+                    # Use direct solver (SuperLU)
+                    u_reduced, solver_info = self._solve_direct(K_solve, F_solve)
+            
+            self._symmetric_solve = symmetry is not None
+            if symmetry is not None:
+                B, planes = symmetry
+                u_reduced = B @ u_reduced
+                residual = system.K_reduced @ u_reduced - system.F_reduced
+                solver_info["symmetry"] = {
+                    "planes": planes,
+                    "equations": B.shape[1],
+                    "residual": float(np.linalg.norm(residual)
+                                      / max(np.linalg.norm(system.F_reduced), 1e-300))
+                }
+                self.lu = None  # Factors only the symmetric part
+            
+            if checkpoint is not None:
+                if solver_info["converged"]:
+                    checkpoint.clear()
+                else:
+                    # Out of iterations: a resume continues from here
+                    checkpoint.save_iterate(u_reduced, solver_info["iterations"])
+            
+            self._progress("solving", 85, 
+                f"Solved using {solver_info.get('method', 'unknown')}")
+            
+            # Stage 4: Post-processing
+            self._progress("postprocessing", 90, "Calculating reactions...")
+            
+            with self.profiler.stage("postprocessing") if self.profiler else contextlib.nullcontext():
+                result = self._build_result(system, u_reduced, solver_info)
+        finally:
+            if scratch is not None:
+                scratch.close()
+        
+        # An out-of-core system is gone with its scratch files, and a
+        # matrix-free one cannot be factorized; later analyses reassemble
+        keep = scratch is None and not matrix_free
+        self.system = system if keep else None
+        self.u_reduced = u_reduced if keep else None
+        self._base_element_k = {}
+        self.timing["total"] = (time.perf_counter() - total_start) * 1000
+        
+        self._progress("postprocessing", 100, "Complete!")
+        
+        return result
+    
+    def _reduce_matrix_free(self, K: ElementOperator, F: np.ndarray) -> ReducedSystem:
+        """_reduce_system for an element operator: K_reduced is the operator on the free DOFs."""
+        if self.constraints:
+            raise SolverError("Matrix-free solves do not support constraints",
+                              "Remove diaphragm/equalDof constraints or use an assembled solve")
+        free_dofs, constrained_dofs = self._identify_dofs()
+        if len(free_dofs) == 0:
+            raise SolverError("Structure is fully constrained - no free DOFs")
+        free_dofs = np.array(free_dofs, dtype=np.int64)
+        
+        diagonal = K.diagonal()[free_dofs]
+        inactive = diagonal <= ZERO_STIFFNESS_TOL * max(diagonal.max(initial=0.0), 0.0)
+        if inactive.any() and np.any(F[free_dofs[inactive]] != 0):
+            raise SolverError("Load applied to a DOF with no stiffness",
+                              "Check member releases and supports for mechanisms")
+        active = free_dofs[~inactive]
+        
+        return ReducedSystem(
+            K=K, F=F, K_reduced=K.restrict(active), F_reduced=F[active],
+            free_dofs=active, constrained_dofs=constrained_dofs,
+            inactive_dofs=free_dofs[inactive]
+        )
+    
+    def _symmetry_subspace(self, system: ReducedSystem
+                           ) -> Optional[Tuple[sparse.csc_matrix, List[Dict[str, Any]]]]:
+        """Mirror symmetries of a reduced system, as a basis of its solution space.
+        
+        Tries the mid-plane normal to each global axis. A plane is used when
+        the nodes, the reduced stiffness (members, properties, releases and
+        supports) and the loads (symmetric or antisymmetric) all map onto
+        themselves. Models with multi-point constraints are not reduced.
+        
+        Returns:
+            (B, planes) with u_reduced = B v, or None without a usable plane
+        """
+        if system.C is not None:
+            return None
+        coords = np.array([(n.x, n.y, n.z) for n in self.node_list], dtype=float).reshape(-1, 3)
+        position = np.full(self.num_dofs, -1, dtype=np.int64)
+        position[system.free_dofs] = np.arange(len(system.free_dofs))
+        K, F = None, system.F_reduced  # Scalar copy of K_reduced, made on first use
+        f_tol = SYMMETRY_RTOL * np.abs(F).max(initial=0.0)
+        
+        generators, parities, planes = [], [], []
+        for axis in range(3):
+            mirror = mirror_nodes(coords, axis)
+            if mirror is None:
+                continue
+            target, sign = reflection_dofs(mirror, axis)
+            target, sign = position[target[system.free_dofs]], sign[system.free_dofs]
+            if np.any(target < 0):
+                continue  # Supports (or inactive DOFs) are not symmetric
+            if K is None:
+                K = system.K_reduced.tocsr()
+                k_tol = SYMMETRY_RTOL * abs(K).max()
+            Q = sparse.csr_matrix((sign, (target, np.arange(len(target)))), shape=K.shape)
+            if abs(Q @ K @ Q.T - K).max() > k_tol:
+                continue
+            QF = Q @ F
+            if np.abs(QF - F).max(initial=0.0) <= f_tol:
+                parity = 1
+            elif np.abs(QF + F).max(initial=0.0) <= f_tol:
+                parity = -1
+            else:
+                continue
+            generators.append((target, sign))
+            parities.append(parity)
+            planes.append({
+                "axis": "xyz"[axis],
+                "position": float(coords[:, axis].min() + coords[:, axis].max()) / 2,
+                "loads": "symmetric" if parity > 0 else "antisymmetric"
+            })
+        
+        if not generators:
+            return None
+        return symmetric_basis(generators, parities), planes
+    
+    def _reduce_system(self, K: sparse.spmatrix, F: np.ndarray) -> ReducedSystem:
+        """Apply supports and constraints, reducing K and F to the free DOFs.
+        
+        A block (BSR) K without constraints stays in block storage as a
+        BlockReducedMatrix; otherwise K_reduced is scalar CSR.
+        """
+        C = self._build_constraint_matrix()
+        free_dofs, constrained_dofs = self._identify_dofs()
+        
+        if len(free_dofs) == 0:
+            raise SolverError("Structure is fully constrained - no free DOFs")
+        free_dofs = np.array(free_dofs, dtype=np.int64)
+        
+        # Extract reduced system; with constraints, u = P @ u_reduced
+        # eliminates slave DOFs via K_reduced = P^T K P
+        P = None
+        if C is None and isinstance(K, sparse.bsr_matrix):
+            K_reduced = BlockReducedMatrix(K, free_dofs)
+            F_reduced = F[free_dofs]
+        elif C is None:
+            K_reduced = K[free_dofs][:, free_dofs]
+            F_reduced = F[free_dofs]
+        else:
+            P = C[:, free_dofs]
+            K_reduced = (P.T @ K @ P).tocsr()
+            F_reduced = P.T @ F
+        
+        # Free DOFs without stiffness (e.g. rotations at nodes where every
+        # member end is released) are restrained instead of left singular
+        diagonal = K_reduced.diagonal()
+        inactive = diagonal <= ZERO_STIFFNESS_TOL * max(diagonal.max(initial=0.0), 0.0)
+        if inactive.any():
+            if np.any(F_reduced[inactive] != 0):
+                raise SolverError("Load applied to a DOF with no stiffness",
+                                  "Check member releases and supports for mechanisms")
+            active = np.flatnonzero(~inactive)
+            if isinstance(K_reduced, BlockReducedMatrix):
+                K_reduced = BlockReducedMatrix(K, free_dofs[active])
+            else:
+                K_reduced = K_reduced[active][:, active]
+            F_reduced = F_reduced[active]
+            if P is not None:
+                P = P[:, active]
+        
+        return ReducedSystem(
+            K=K, F=F, K_reduced=K_reduced, F_reduced=F_reduced,
+            free_dofs=free_dofs[~inactive], constrained_dofs=constrained_dofs,
+            inactive_dofs=free_dofs[inactive], C=C, P=P
+        )
+    
+    def _assemble_out_of_core(self, scratch: ScratchDirectory, block_entries: int) -> TripletFile:
+        """Stream element stiffness triplets to scratch files in bounded chunks."""
+        K = TripletFile(scratch, "K", (self.num_dofs, self.num_dofs), block_entries)
+        elements = self._get_elements()
+        m = len(elements)
+        kernel = self._element_kernel()
+        width = 12 if kernel == "frame" else 6
+        chunk_size = max(1, min(ASSEMBLY_CHUNK_SIZE, block_entries // width ** 2))
+        self.element_cache = {"elements": 0, "unique": 0}
+        
+        for start in range(0, m, chunk_size):
+            chunk = slice(start, min(start + chunk_size, m))
+            dof_maps, k_global = self._assembly_blocks(elements, chunk, kernel)
+            rows = np.repeat(dof_maps, width, axis=1).ravel()
+            cols = np.tile(dof_maps, (1, width)).ravel()
+            values = k_global.ravel()
+            keep = np.abs(values) > ZERO_ENTRY_TOL
+            K.append(rows[keep], cols[keep], values[keep])
+            
+            if m > chunk_size:
+                self._progress("assembling", 10 + int(30 * chunk.stop / m),
+                    f"Streamed {chunk.stop}/{m} members to disk...")
+        
+        return K
+    
+    def _reduce_out_of_core(self, K: TripletFile, F: np.ndarray,
+                            scratch: ScratchDirectory) -> ReducedSystem:
+        """_reduce_system for a triplet file: streams P^T K P into an out-of-core CSR."""
+        C = self._build_constraint_matrix()
+        free_dofs, constrained_dofs = self._identify_dofs()
+        
+        if len(free_dofs) == 0:
+            raise SolverError("Structure is fully constrained - no free DOFs")
+        free_dofs = np.array(free_dofs, dtype=np.int64)
+        n_free = len(free_dofs)
+        
+        if C is None:
+            P = sparse.csr_matrix((np.ones(n_free), (free_dofs, np.arange(n_free))),
+                                  shape=(self.num_dofs, n_free))
+        else:
+            P = C[:, free_dofs].tocsr()
+        F_reduced = P.T @ F
+        
+        # Projected triplets, and the reduced diagonal for the stiffness check
+        projected = TripletFile(scratch, "K_projected", (n_free, n_free), K.block_entries)
+        diagonal = np.zeros(n_free)
+        for rows, cols, values in K.blocks():
+            rows, cols, values = project_triplets(P, rows, cols, values)
+            projected.append(rows, cols, values)
+            on = rows == cols
+            diagonal += np.bincount(rows[on], weights=values[on], minlength=n_free)
+        
+        inactive = diagonal <= ZERO_STIFFNESS_TOL * max(diagonal.max(initial=0.0), 0.0)
+        if inactive.any() and np.any(F_reduced[inactive] != 0):
+            raise SolverError("Load applied to a DOF with no stiffness",
+                              "Check member releases and supports for mechanisms")
+        active_index = np.full(n_free, -1, dtype=np.int64)
+        active_index[~inactive] = np.arange(np.count_nonzero(~inactive))
+        K_reduced = OutOfCoreCSR(scratch, "K_reduced", projected, active_index)
+        projected.remove()
+        
+        return ReducedSystem(
+            K=K, F=F, K_reduced=K_reduced, F_reduced=F_reduced[~inactive],
+            free_dofs=free_dofs[~inactive], constrained_dofs=constrained_dofs,
+            inactive_dofs=free_dofs[inactive], C=C,
+            P=P[:, np.flatnonzero(~inactive)].tocsc() if C is not None else None
+        )
+    
+    def _build_result(self, system: ReducedSystem, u_reduced: np.ndarray,
+                      solver_info: Dict[str, Any]) -> Dict[str, Any]:
+        """Expand a reduced solution and build the result dictionary."""
+        post_start = time.perf_counter()
+        
+        if system.C is not None:
+            solver_info["eliminatedDofs"] = len(self.slave_dofs)
+        if len(system.inactive_dofs):
+            solver_info["inactiveDofs"] = len(system.inactive_dofs)
+        kernel = self._element_kernel()
+        if kernel != "frame":
+            solver_info["elementType"] = kernel
+        
+        # Expand solution to full DOF vector (recovering slave DOFs)
+        u_full = system.expand(u_reduced)
+        
+        # Calculate reactions; with constraints, fold slave DOF residuals
+        # back onto their masters
+        reactions = system.K @ u_full - system.F
+        if system.C is not None:
+            reactions = system.C.T @ reactions
+        
+        # Build result dictionaries
+        nodal_displacements = self._build_nodal_displacements(u_full)
+        nodal_reactions = self._build_nodal_reactions(reactions, system.constrained_dofs)
+        
+        self.timing["postprocessing"] = (time.perf_counter() - post_start) * 1000
+        
+        return {
+            "success": True,
+            "displacements": u_full.tolist(),
+            "reactions": reactions.tolist(),
+            "nodalDisplacements": nodal_displacements,
+            "nodalReactions": nodal_reactions,
+            "timing": self.timing,
+            "solverInfo": solver_info,
+            "matrixStats": self._get_matrix_stats(system.K)
+        }
+    
+    def update_members(self, updates: Dict[str, Dict[str, Any]],
+                       max_rank: int = INCREMENTAL_MAX_RANK) -> Dict[str, Any]:
+        """
+        Re-solve after changing the properties of a few members.
+        
+        The stiffness change is a low-rank update of the factored matrix and
+        is solved with Sherman-Morrison-Woodbury, reusing the factorization
+        from the last direct solve. Changes accumulate against that
+        factorization across calls; once their rank exceeds max_rank, or the
+        update touches DOFs outside the factored system, the updated matrix
+        is refactored instead.
+        
+        Args:
+            updates: Member ID -> changed properties (E, A, Iy, Iz, G, J,
+                beta, releases)
+            max_rank: Largest update rank solved with Woodbury
+        
+        Returns:
+            Solution dictionary as returned by solve()
+        """
+        if self.lu is None and self._symmetric_solve:
+            self._factorize()  # The last solve factored the symmetric part only
+        if self.system is None or self.lu is None:
+            # Nothing to reuse (no solve yet, or the last one was iterative)
+            self._apply_member_updates(updates)
+            return self.solve(use_iterative=True if self.system is not None else None)
+        
+        total_start = time.perf_counter()
+        self.timing = {}
+        system = self.system
+        
+        assembly_start = time.perf_counter()
+        self._apply_member_updates(updates)
+        delta_K = self._stiffness_delta()
+        self.timing["assembly"] = (time.perf_counter() - assembly_start) * 1000
+        
+        solve_start = time.perf_counter()
+        dofs, V, lam = low_rank_factors(system.restrict_matrix(delta_K))
+        rank = len(lam)
+        
+        # Stiffness added to DOFs restrained for lack of it changes the
+        # reduced system's size, which a low-rank update cannot express
+        touches_inactive = len(system.inactive_dofs) and np.any(
+            abs(delta_K[system.inactive_dofs]).sum(axis=1) > 0
+        )
+        
+        woodbury = None
+        if rank <= max_rank and not touches_inactive:
+            try:
+                woodbury = WoodburySolver(self.lu, dofs, V, lam)
+            except np.linalg.LinAlgError:
+                woodbury = None
+        
+        if woodbury is not None:
+            self._progress("solving", 60, f"Applying rank-{rank} update...")
+            u_reduced = woodbury.solve(system.F_reduced, self.u_reduced)
+            solver_info = {"method": "incremental-woodbury", "rank": rank, "success": True}
+            self.timing["solve"] = (time.perf_counter() - solve_start) * 1000
+            result_system = ReducedSystem(
+                K=system.K + delta_K, F=system.F,
+                K_reduced=system.K_reduced, F_reduced=system.F_reduced,
+                free_dofs=system.free_dofs, constrained_dofs=system.constrained_dofs,
+                inactive_dofs=system.inactive_dofs, C=system.C, P=system.P
+            )
+        else:
+            self._progress("solving", 60, f"Update rank {rank} - refactoring...")
+            result_system = self._reduce_system(system.K + delta_K, system.F)
+            u_reduced, solver_info = self._solve_direct(result_system.K_reduced,
+                                                        result_system.F_reduced)
+            solver_info.update({"method": "incremental-refactor", "rank": rank})
+            self.timing["solve"] = (time.perf_counter() - solve_start) * 1000
+            self.system = result_system
+            self.u_reduced = u_reduced
+            self._base_element_k = {}
+        
+        solver_info["updatedMembers"] = len(updates)
+        result = self._build_result(result_system, u_reduced, solver_info)
+        self.timing["total"] = (time.perf_counter() - total_start) * 1000
+        self._progress("postprocessing", 100, "Complete!")
+        return result
+    
+    def _apply_member_updates(self, updates: Dict[str, Dict[str, Any]]):
+        """Apply property changes to members and the cached element arrays."""
+        elements = self._get_elements()
+        position = self._get_element_positions()
+        
+        for member_id, changes in updates.items():
+            p = position.get(member_id)
+            if p is None:
+                raise SolverError(f"Cannot update member {member_id}: not in the model")
+            if not self._base_element_k:
+                self._base_kernel = self._element_kernel()
+            if p not in self._base_element_k:
+                self._base_element_k[p] = self._assembly_blocks(elements, [p], self._base_kernel)[1][0]
+            
+            member = self.members[elements.member_index[p]]
+            for key, value in changes.items():
+                if key in UPDATABLE_MEMBER_FIELDS:
+                    setattr(member, key, float(value))
+                    getattr(elements, key)[p] = float(value)
+                elif key == "beta":
+                    member.beta = float(value)
+                    start, end = self.node_list[elements.start[p]], self.node_list[elements.end[p]]
+                    delta = np.array([[end.x - start.x, end.y - start.y, end.z - start.z]])
+                    elements.R[p] = get_rotation_matrices(delta, np.array([member.beta]))[1][0]
+                elif key == "releases":
+                    member.releases = parse_releases(value)
+                    elements.released[p] = False
+                    elements.released[p, list(member.releases)] = True
+                    check_release_stability(elements.released[[p]], [member.id])
+                else:
+                    raise SolverError(f"Cannot update member {member_id}: unknown property '{key}'")
+    
+    def _stiffness_delta(self) -> sparse.csr_matrix:
+        """Global stiffness change of members updated since the last factorization.
+        
+        An update that changes the element formulation (e.g. unpinning a
+        truss member) reassembles the whole matrix.
+        """
+        kernel = self._element_kernel()
+        if kernel != self._base_kernel:
+            return self._assemble_global_stiffness() - self.system.K
+        
+        elements = self._get_elements()
+        positions = np.array(sorted(self._base_element_k), dtype=np.int64)
+        k_base = np.stack([self._base_element_k[p] for p in positions])
+        
+        dof_maps, k_global = self._assembly_blocks(elements, positions, kernel)
+        assembler = SparseAssembler(self.num_dofs)
+        assembler.add_elements(dof_maps, k_global - k_base)
+        return assembler.to_csr()
+    
+    def _factorize(self) -> Tuple[ReducedSystem, SymmetricLU]:
+        """Reduced system and its LU factorization for the current members.
+        
+        Assembles and factorizes on first use (or after an iterative solve),
+        folding in member updates still pending as low-rank corrections.
+        """
+        if self.system is None:
+            K = self._assemble_global_stiffness()
+            self.system = self._reduce_system(K, self._build_force_vector())
+        if self._base_element_k:
+            self.system = self._reduce_system(self.system.K + self._stiffness_delta(), self.system.F)
+            self._base_element_k = {}
+            self.u_reduced = None
+            self.lu = None
+        if self.lu is None:
+            self.lu = self._new_lu(self.system.K_reduced)
+        return self.system, self.lu
+    
+    def solve_active_set(self, max_iterations: int = ACTIVE_SET_MAX_ITERATIONS,
+                         max_rank: int = INCREMENTAL_MAX_RANK) -> Dict[str, Any]:
+        """
+        Solve with tension-/compression-only members and compression-only supports.
+        
+        Starts from the factored system, where every such member is active
+        and every such support engaged, and iterates: members whose
+        elongation has the wrong sign are switched off (or back on), and
+        supports pulling on their node are lifted (or re-engaged where the
+        node moves into them). Each state is solved with the one
+        factorization: switched-off members are a Woodbury update, and
+        lifted support DOFs border the reduced system and are eliminated
+        through a small Schur complement. A state whose member update
+        exceeds max_rank is factored afresh.
+        
+        Returns:
+            Solution dictionary as returned by solve(), with
+            solverInfo.activeSet holding iterations and final states
+        """
+        total_start = time.perf_counter()
+        self.timing = {}
+        with self._stage("assembly"):
+            system, lu = self._factorize()
+        
+        elements = self._get_elements()
+        position = self._get_element_positions()
+        one_way = [m for m in self.members if m.only and m.id in position]
+        members = np.array([position[m.id] for m in one_way], dtype=np.int64)
+        member_sign = np.array([1.0 if m.only == "tension" else -1.0 for m in one_way])
+        dof_maps, k_global = self._assembly_blocks(elements, members, self._element_kernel())
+        axis = elements.R[members, 0]  # Local x axis in global coordinates
+        start_dofs = 6 * elements.start[members][:, None] + np.arange(3)
+        end_dofs = 6 * elements.end[members][:, None] + np.arange(3)
+        
+        node_index = {node.id: node.index for node in self.node_list}
+        bearings = [(node_id, component, sign) for node_id, support in self.supports.items()
+                    for component, sign in support.unilateral]
+        support_dofs = np.array([6 * node_index[node_id] + component
+                                 for node_id, component, _ in bearings], dtype=np.int64)
+        support_sign = np.array([float(sign) for _, _, sign in bearings])
+        
+        y_base = lu.solve(system.F_reduced)
+        active = np.ones(len(members), dtype=bool)
+        engaged = np.ones(len(support_dofs), dtype=bool)
+        history, refactorizations, converged = [], 0, False
+        
+        self._progress("solving", 60, f"Active-set iteration for {len(members)} members, "
+                                      f"{len(support_dofs)} supports...")
+        solve_start = time.perf_counter()
+        for iteration in range(1, max_iterations + 1):
+            # Stiffness of the members switched off, relative to the factored system
+            assembler = SparseAssembler(self.num_dofs)
+            assembler.add_elements(dof_maps[~active], -k_global[~active])
+            delta_K = assembler.to_csr()
+            K = system.K + delta_K
+            
+            dofs, V, lam = low_rank_factors(system.restrict_matrix(delta_K))
+            try:
+                if len(lam) <= max_rank:
+                    solver, method = WoodburySolver(lu, dofs, V, lam), "woodbury"
+                    y = solver.solve(system.F_reduced, y_base)
+                else:
+                    solver, method = self._new_lu(system.restrict_matrix(K)), "refactor"
+                    y = solver.solve(system.F_reduced)
+                    refactorizations += 1
+                u_reduced, lifted = y, support_dofs[~engaged]
+                if len(lifted):
+                    u_reduced = self._bordered_solve(system, K, solver, y, lifted)
+            except (np.linalg.LinAlgError, RuntimeError):
+                raise SolverError(
+                    "Structure is unstable with the current member and support states",
+                    f"Active-set iteration {iteration}: "
+                    f"{int((~active).sum())} members inactive, {int((~engaged).sum())} supports lifted")
+            
+            result_system = self._active_set_system(system, K, support_dofs[~engaged])
+            u_full = result_system.expand(u_reduced)
+            reactions = K @ u_full - system.F
+            if system.C is not None:
+                reactions = system.C.T @ reactions
+            history.append({"iteration": iteration, "inactiveMembers": int((~active).sum()),
+                            "liftedSupports": int((~engaged).sum()), "rank": len(lam),
+                            "method": method})
+            
+            # States the solution calls for; a switch needs the response to
+            # exceed the tolerance, so states at zero do not flip back and forth
+            u_tol = ACTIVE_SET_TOL * np.abs(u_full).max(initial=0.0)
+            f_tol = ACTIVE_SET_TOL * np.abs(system.F).max(initial=0.0)
+            elongation = member_sign * np.einsum('mi,mi->m', axis, u_full[end_dofs] - u_full[start_dofs])
+            want_active = elongation >= np.where(active, -u_tol, u_tol)
+            want_engaged = np.where(engaged, support_sign * reactions[support_dofs] >= -f_tol,
+                                    support_sign * u_full[support_dofs] < -u_tol)
+            if np.array_equal(want_active, active) and np.array_equal(want_engaged, engaged):
+                converged = True
+                break
+            if iteration == max_iterations:
+                break  # Report the last solved state
+            active, engaged = want_active, want_engaged
+            self._progress("solving", 60 + min(iteration, 25),
+                f"Iteration {iteration}: {int((~active).sum())} members inactive, "
+                f"{int((~engaged).sum())} supports lifted")
+        self.timing["solve"] = (time.perf_counter() - solve_start) * 1000
+        
+        axial = np.where(active, elements.E[members] * elements.A[members] / elements.L[members]
+                         * member_sign * elongation, 0.0)
+        solver_info = {
+            "method": "active-set",
+            "success": True,
+            "activeSet": {
+                "iterations": len(history),
+                "converged": converged,
+                "refactorizations": refactorizations,
+                "history": history,
+                "members": [{"id": m.id, "behaviour": m.only, "active": bool(a), "axialForce": float(n)}
+                            for m, a, n in zip(one_way, active, axial)],
+                "supports": [{"nodeId": node_id, "dof": DOF_NAMES[component],
+                              "engaged": bool(e), "reaction": float(reactions[dof]) if e else 0.0}
+                             for (node_id, component, _), e, dof in zip(bearings, engaged, support_dofs)]
+            }
+        }
+        result = self._build_result(result_system, u_reduced, solver_info)
+        self.timing["total"] = (time.perf_counter() - total_start) * 1000
+        self._progress("postprocessing", 100, "Complete!")
+        return result
+    
+    def _bordered_solve(self, system: ReducedSystem, K: sparse.spmatrix, solver,
+                        y: np.ndarray, lifted: np.ndarray) -> np.ndarray:
+        """
+        Reduced solution with lifted support DOFs added as unknowns.
+        
+        With A the (updated) reduced matrix, B its coupling to the lifted
+        DOFs and D theirs, the bordered system [A B; B^T D] is solved by
+        the Schur complement S = D - B^T A^-1 B: rank(lifted) extra
+        back-substitutions, no refactorization. y = A^-1 F_reduced.
+        
+        Returns:
+            (free DOF values, lifted DOF values) concatenated
+        """
+        E = self._support_columns(system, lifted)
+        KE = K @ E
+        B = system.restrict(KE.toarray())
+        D = (E.T @ KE).toarray()
+        Z = solver.solve(B)
+        S = D - B.T @ Z
+        if np.linalg.cond(S) > 1e12:
+            raise np.linalg.LinAlgError("Lifted supports leave the system singular")
+        v = np.linalg.solve(S, E.T @ system.F - B.T @ y)
+        return np.concatenate([y - Z @ v, v])
+    
+    def _support_columns(self, system: ReducedSystem, dofs: np.ndarray) -> sparse.csc_matrix:
+        """Global displacement per unit value of each listed support DOF (columns)."""
+        if system.C is not None:
+            return system.C[:, dofs].tocsc()
+        return sparse.csc_matrix((np.ones(len(dofs)), (dofs, np.arange(len(dofs)))),
+                                 shape=(self.num_dofs, len(dofs)))
+    
+    def _active_set_system(self, system: ReducedSystem, K: sparse.spmatrix,
+                           lifted: np.ndarray) -> ReducedSystem:
+        """The reduced system extended by lifted support DOFs, for expanding results."""
+        P, lifted_set = system.P, set(lifted.tolist())
+        if P is not None and len(lifted):
+            P = sparse.hstack([P, self._support_columns(system, lifted)]).tocsc()
+        return ReducedSystem(
+            K=K, F=system.F, K_reduced=system.K_reduced, F_reduced=system.F_reduced,
+            free_dofs=np.concatenate([system.free_dofs, lifted]),
+            constrained_dofs=[d for d in system.constrained_dofs if d not in lifted_set],
+            inactive_dofs=system.inactive_dofs, C=system.C, P=P
+        )
+    
+    def _response_operator(self, responses: List[Response]) -> Tuple[sparse.csr_matrix, sparse.csr_matrix]:
+        """
+        Linear maps G, H with response values = G @ u - H @ F (full DOF vectors).
+        
+        Displacements pick a DOF, reactions take rows of C^T K and C^T,
+        and member end forces take rows of the condensed local stiffness
+        k T. Loads acting within a member must still be subtracted from its
+        end forces (k T u - q).
+        """
+        system = self.system
+        node_index = {node.id: node.index for node in self.node_list}
+        constrained = set(system.constrained_dofs)
+        position = self._get_element_positions()
+        
+        picks, reactions, member_forces = [], [], []
+        for i, response in enumerate(responses):
+            if response.type == "memberForce":
+                if response.target_id not in position:
+                    raise SolverError(f"Response member not found: {response.target_id}")
+                member_forces.append((i, position[response.target_id], response.component))
+                continue
+            
+            if response.target_id not in node_index:
+                raise SolverError(f"Response node not found: {response.target_id}")
+            dof = node_index[response.target_id] * 6 + response.component
+            if response.type == "displacement":
+                picks.append((i, dof))
+            elif dof in constrained:
+                reactions.append((i, dof))
+            else:
+                raise SolverError(f"Reaction response at an unsupported DOF: {response.key}")
+        
+        shape = (len(responses), self.num_dofs)
+        G = sparse.csr_matrix(shape)
+        H = sparse.csr_matrix(shape)
+        
+        def selector(pairs):
+            rows, dofs = np.array(pairs, dtype=np.int64).reshape(-1, 2).T
+            return sparse.csr_matrix((np.ones(len(rows)), (rows, dofs)), shape=shape)
+        
+        if picks:
+            G = G + selector(picks)
+        if reactions:
+            H = selector(reactions)
+            if system.C is not None:
+                H = H @ system.C.T
+            G = G + H @ system.K
+        if member_forces:
+            rows, positions, components = np.array(member_forces, dtype=np.int64).T
+            elements = self._get_elements()
+            k_local = self._local_element_stiffness(elements, positions)
+            k_rows = k_local[np.arange(len(positions)), components].reshape(-1, 4, 3)
+            values = np.einsum('mbi,mij->mbj', k_rows, elements.R[positions])
+            G = G + sparse.csr_matrix(
+                (values.ravel(), (np.repeat(rows, 12), elements.dof_map[positions].ravel())),
+                shape=shape
+            )
+        
+        return G.tocsr(), H.tocsr()
+    
+    def moving_load_analysis(self, spec: MovingLoad,
+                             chunk_size: int = MOVING_LOAD_CHUNK_SIZE) -> Dict[str, Any]:
+        """
+        Influence lines and axle-train envelopes along a path of members.
+        
+        A unit load at every station of the path gives one sparse block of
+        right-hand sides, solved with a single factorization. When there
+        are fewer responses than stations, the (symmetric) system is solved
+        for the responses instead and the ordinates are read off with one
+        sparse product (Maxwell-Betti reciprocity).
+        """
+        start_time = time.perf_counter()
+        self._progress("influence", 0, f"Moving load over {len(spec.path)} members...")
+        
+        system, lu = self._factorize()
+        elements = self._get_elements()
+        position = self._get_element_positions()
+        
+        # Walk the path, orienting each member along the direction of travel
+        path, flipped = [], []
+        entry = None
+        for k, member_id in enumerate(spec.path):
+            if member_id not in position:
+                raise SolverError(f"Moving load path member not found: {member_id}")
+            p = position[member_id]
+            start, end = elements.start[p], elements.end[p]
+            if entry is None:
+                # Orient the first member towards the second
+                if len(spec.path) > 1:
+                    following = position.get(spec.path[1], -1)
+                    entry = end if start in (elements.start[following], elements.end[following]) else start
+                else:
+                    entry = start
+            if entry not in (start, end):
+                raise SolverError(f"Moving load path is not continuous at member {member_id}")
+            path.append(p)
+            flipped.append(entry == end)
+            entry = start if entry == end else end
+        
+        # Unit-load stations; joints between members are loaded once
+        idx, a, stations = [], [], []
+        offset = 0.0
+        for k, (p, flip) in enumerate(zip(path, flipped)):
+            L = elements.L[p]
+            t = np.linspace(0.0, L, max(1, int(np.ceil(L / spec.step - 1e-9))) + 1)[(k > 0):]
+            idx.append(np.full(len(t), p))
+            a.append(L - t if flip else t)
+            stations.append(offset + t)
+            offset += L
+        idx, a, stations = np.concatenate(idx), np.concatenate(a), np.concatenate(stations)
+        n_stations = len(stations)
+        
+        # Consistent nodal loads of each unit load, as one sparse RHS block
+        q_local = point_load_vectors(elements.L[idx], a, elements.R[idx][:, :, spec.direction])
+        released = elements.released[idx]
+        if released.any():
+            k_local = get_local_stiffness_matrices(
+                elements.E[idx], elements.Iy[idx], elements.Iz[idx],
+                elements.A[idx], elements.L[idx], elements.G[idx], elements.J[idx]
+            )
+            _, q_local = condense_releases(k_local, released, q_local)
+        q_global = local_to_global_vectors(q_local, elements.R[idx])
+        F_block = sparse.csr_matrix(
+            (q_global.ravel(), (elements.dof_map[idx].ravel(), np.repeat(np.arange(n_stations), 12))),
+            shape=(self.num_dofs, n_stations)
+        )
+        F_reduced = sparse.csr_matrix(system.restrict(F_block))
+        
+        G, H = self._response_operator(spec.responses)
+        G_reduced = sparse.csr_matrix(system.restrict(G.T.tocsr())).T.tocsr()
+        
+        if len(spec.responses) < n_stations:
+            method = "adjoint"
+            W = lu.solve(G_reduced.T.toarray())
+            ordinates = np.asarray((F_reduced.T @ W).T)
+        else:
+            method = "block"
+            ordinates = np.empty((len(spec.responses), n_stations))
+            for first in range(0, n_stations, chunk_size):
+                cols = slice(first, first + chunk_size)
+                ordinates[:, cols] = G_reduced @ lu.solve(F_reduced[:, cols].toarray())
+                self._progress("influence", int(90 * min(first + chunk_size, n_stations) / n_stations),
+                    f"Solved {min(first + chunk_size, n_stations)}/{n_stations} load positions")
+        ordinates -= (H @ F_block).toarray()
+        
+        # Loads on a member also act within its own end forces
+        for i, response in enumerate(spec.responses):
+            if response.type == "memberForce":
+                on_member = idx == position[response.target_id]
+                ordinates[i, on_member] -= q_local[on_member, response.component]
+        
+        envelopes = train_envelopes(stations, ordinates, spec.axles, spec.step, spec.both_directions)
+        
+        self._progress("influence", 100, f"Influence lines for {n_stations} load positions")
+        
+        return {
+            "method": method,
+            "loadPositions": n_stations,
+            "stations": stations.tolist(),
+            "influenceLines": {
+                r.key: ordinates[i].tolist() for i, r in enumerate(spec.responses)
+            },
+            "envelopes": {
+                r.key: {
+                    key: (float(values[i]) if not key.endswith("Direction")
+                          else ("forward" if values[i] > 0 else "reverse"))
+                    for key, values in envelopes.items()
+                }
+                for i, r in enumerate(spec.responses)
+            },
+            "timeMs": (time.perf_counter() - start_time) * 1000
+        }
+    
+    def combination_analysis(self, combinations: List[LoadCombination]) -> Dict[str, Any]:
+        """
+        Load combinations and their envelopes by superposition.
+        
+        Every load case is back-substituted once as a single block with the
+        factorization of the main solve. Combination displacements, reactions
+        and member end forces are then one product of each per-case block
+        with the (cases x combinations) factor matrix, and the envelopes are
+        max/min reductions over the combination axis.
+        """
+        start_time = time.perf_counter()
+        cases = list(dict.fromkeys(load.case for load in self.loads))
+        for combination in combinations:
+            unknown = set(combination.factors) - set(cases)
+            if unknown:
+                raise SolverError(f"Load combination {combination.id} uses unknown load cases: "
+                                  f"{', '.join(sorted(unknown))}")
+        self._progress("combinations", 0,
+            f"{len(cases)} load cases, {len(combinations)} combinations...")
+        
+        system, lu = self._factorize()
+        
+        # Per-case result blocks (one column per load case)
+        F = self._build_case_forces(cases)
+        U = system.expand(lu.solve(system.restrict(F)))
+        R = system.K @ U - F
+        if system.C is not None:
+            R = system.C.T @ R
+        Q = self._member_end_forces(U)
+        
+        # Combinations as one product per block
+        W = np.array([[c.factors.get(case, 0.0) for c in combinations] for case in cases])
+        U, R, Q = U @ W, R @ W, Q @ W
+        
+        ids = [c.id for c in combinations]
+        elements = self._get_elements()
+        member_ids = [self.members[i].id for i in elements.member_index]
+        node_ids = [node.id for node in self.node_list]
+        supported = sorted({dof // 6 for dof in system.constrained_dofs})
+        reaction_mask = np.zeros(R.shape[0], dtype=bool)
+        reaction_mask[system.constrained_dofs] = True
+        R = np.where(reaction_mask[:, None], R, 0.0)
+        force_names = [end + name for end in ("start", "end") for name in RELEASE_COMPONENTS]
+        
+        def envelope(values: np.ndarray, keys: List[str], names: List[str]) -> Dict[str, Any]:
+            """Max/min over the last (combination) axis of values (items, components, k)."""
+            i_max, i_min = values.argmax(axis=2), values.argmin(axis=2)
+            v_max = np.take_along_axis(values, i_max[..., None], axis=2)[..., 0]
+            v_min = np.take_along_axis(values, i_min[..., None], axis=2)[..., 0]
+            return {
+                key: {
+                    name: {"max": float(v_max[i, j]), "min": float(v_min[i, j]),
+                           "maxCombination": ids[i_max[i, j]], "minCombination": ids[i_min[i, j]]}
+                    for j, name in enumerate(names)
+                }
+                for i, key in enumerate(keys)
+            }
+        
+        displacements = U.reshape(self.num_nodes, 6, -1)
+        reactions = R.reshape(self.num_nodes, 6, -1)
+        
+        self._progress("combinations", 100, f"{len(combinations)} combinations")
+        
+        return {
+            "cases": cases,
+            "memberForceComponents": force_names,
+            "results": {
+                combination_id: {
+                    "displacements": U[:, k].tolist(),
+                    "reactions": R[:, k].tolist(),
+                    "memberForces": dict(zip(member_ids, Q[:, :, k].tolist()))
+                }
+                for k, combination_id in enumerate(ids)
+            },
+            "envelopes": {
+                "nodalDisplacements": envelope(displacements, node_ids, DOF_NAMES),
+                "nodalReactions": envelope(reactions[supported], [node_ids[i] for i in supported],
+                                           REACTION_NAMES),
+                "memberForces": envelope(Q, member_ids, force_names)
+            },
+            "timeMs": (time.perf_counter() - start_time) * 1000
+        }
+    
+    def response_sensitivities(self, responses: List[Response]) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """
+        Adjoint sensitivities of responses to member A, Iy and Iz.
+        
+        For a response J = G u - H F, dJ/dp = (dG/dp) u - lam^T (dK/dp) u
+        with K lam = G^T, i.e. one back-substitution per response with the
+        existing factorization. Each local stiffness block is linear in one
+        property (also after condensing releases), so dk/dp = k_block / p
+        and every member's sensitivity is a batched product of local vectors.
+        
+        Returns:
+            Tuple of response values (r,) and property -> (r, m) sensitivities,
+            columns in element order
+        """
+        system, lu = self._factorize()
+        if self.u_reduced is None:
+            self.u_reduced = lu.solve(system.F_reduced)
+        u_full = system.expand(self.u_reduced)
+        
+        G, H = self._response_operator(responses)
+        values = G @ u_full - H @ system.F
+        
+        # Adjoint solves; reactions also carry H dK u
+        G_reduced = sparse.csr_matrix(system.restrict(G.T.tocsr())).toarray()
+        W = H.T.toarray() - system.expand(lu.solve(G_reduced))
+        
+        elements = self._get_elements()
+        m = len(elements)
+        sensitivities = {name: np.zeros((len(responses), m)) for name in SENSITIVITY_BLOCKS}
+        
+        for first in range(0, m, ASSEMBLY_CHUNK_SIZE):
+            idx = np.arange(first, min(first + ASSEMBLY_CHUNK_SIZE, m))
+            dof_map = elements.dof_map[idx]
+            k_local = self._local_element_stiffness(elements, idx)
+            u_local = global_to_local_vectors(u_full[dof_map], elements.R[idx])
+            w_local = global_to_local_vectors(W[dof_map], elements.R[idx])
+            
+            for name, b in SENSITIVITY_BLOCKS.items():
+                block = LOCAL_STIFFNESS_BLOCKS[b]
+                f = np.einsum('mij,mj->mi', k_local[:, block[:, None], block], u_local[:, block])
+                p = getattr(elements, name)[idx]
+                scale = np.divide(1.0, p, out=np.zeros_like(p), where=p != 0)
+                sensitivities[name][:, idx] = np.einsum('mir,mi->rm', w_local[:, block], f) * scale
+        
+        # Member end forces also depend on their own member's properties
+        position = self._get_element_positions()
+        for i, response in enumerate(responses):
+            if response.type != "memberForce":
+                continue
+            e = position[response.target_id]
+            k_local = self._local_element_stiffness(elements, [e])[0]
+            u_local = global_to_local_vectors(u_full[elements.dof_map[[e]]], elements.R[[e]])[0]
+            for name, b in SENSITIVITY_BLOCKS.items():
+                block = LOCAL_STIFFNESS_BLOCKS[b]
+                p = getattr(elements, name)[e]
+                if response.component in block and p != 0:
+                    sensitivities[name][i, e] += k_local[response.component, block] @ u_local[block] / p
+        
+        return values, sensitivities
+    
+    def time_history_analysis(self, spec: TimeHistory,
+                              frame_callback: Optional[FrameCallback] = None) -> Dict[str, Any]:
+        """
+        Linear transient response by Newmark-beta integration.
+        
+        Stiffness K and consistent mass M (plus lumped nodal masses) are
+        assembled on one sparsity pattern, so Rayleigh damping
+        C = alpha M + beta K and the effective stiffness K + a0 M + a1 C
+        are combinations of their value arrays. The effective stiffness is
+        factorized once; each step costs two sparse products and one
+        back-substitution. Loads are static load cases scaled by
+        piecewise-linear time functions, plus -M r a_g(t) for a ground
+        motion (displacements are then relative to the ground). Every
+        output_every-th step goes to the frame output; peak displacements
+        are tracked over all steps.
+        """
+        start_time = time.perf_counter()
+        self._progress("timeHistory", 0, f"Assembling K and M for {spec.steps} steps...")
+        K, M, system, restrict = self._mass_system(spec.density, spec.nodal_masses)
+        
+        # Effective stiffness, and K and M on the reduced DOFs
+        a = newmark_coefficients(spec.dt, spec.beta, spec.gamma)
+        alpha, beta = spec.rayleigh
+        K_eff = (1 + a[1] * beta) * K.data + (a[0] + a[1] * alpha) * M.data
+        K_r, M_r, K_eff = restrict(K.data), restrict(M.data), restrict(K_eff)
+        
+        # Load history: reduced load columns B times factors W (columns x steps)
+        cases = list(dict.fromkeys(load.case for load in self.loads))
+        unknown = {case for case, _, _ in spec.load_functions if case is not None} - set(cases)
+        if unknown:
+            raise SolverError(f"Time-history loads use unknown load cases: {', '.join(sorted(unknown))}")
+        times = spec.dt * np.arange(spec.steps + 1)
+        function_cases = [case for case, _, _ in spec.load_functions]
+        distinct = list(dict.fromkeys(function_cases))
+        case_forces = self._build_case_forces(distinct)
+        columns = [case_forces[:, [distinct.index(case) for case in function_cases]]]
+        factors = [np.interp(times, t, f) for _, t, f in spec.load_functions]
+        influence = np.zeros((self.num_dofs, 3))
+        for direction in range(3):
+            influence[direction::6, direction] = 1.0
+        if spec.ground_motion is not None:
+            direction, t, acceleration = spec.ground_motion
+            columns.append(-(M @ influence[:, [direction]]))
+            factors.append(np.interp(times, t, acceleration, right=0.0))
+        B = system.restrict(np.hstack(columns))
+        W = np.array(factors).reshape(-1, spec.steps + 1)
+        
+        with self._stage("factorization"):
+            lu = self._new_lu(K_eff)
+        
+        # At rest initially; a load at t = 0 accelerates the DOFs with mass
+        n = K_eff.shape[0]
+        u, v, acc = np.zeros(n), np.zeros(n), np.zeros(n)
+        F0 = B @ W[:, 0]
+        if np.any(F0):
+            massive = np.flatnonzero(M_r.diagonal() > 0)
+            acc[massive] = spla.spsolve(M_r[massive][:, massive].tocsc(), F0[massive])
+        
+        output_nodes = spec.output_nodes or [node.id for node in self.node_list]
+        missing = [node_id for node_id in output_nodes if node_id not in self.nodes]
+        if missing:
+            raise SolverError(f"Time-history output nodes not found: {', '.join(missing)}")
+        output_index = np.array([self.nodes[node_id].index for node_id in output_nodes], dtype=np.int64)
+        output = FrameOutput(output_nodes, spec.output_file, frame_callback)
+        try:
+            output.write(0.0, np.zeros((len(output_index), 6)))
+            peak = np.zeros(self.num_dofs)
+            peak_step = np.zeros(self.num_dofs, dtype=np.int64)
+            
+            march_start = time.perf_counter()
+            report_every = max(1, spec.steps // 20)
+            for step in range(1, spec.steps + 1):
+                damped = a[1] * u + a[4] * v + a[5] * acc
+                rhs = B @ W[:, step] + M_r @ (a[0] * u + a[2] * v + a[3] * acc + alpha * damped)
+                if beta:
+                    rhs += beta * (K_r @ damped)
+                u_next = lu.solve(rhs)
+                acc_next = a[0] * (u_next - u) - a[2] * v - a[3] * acc
+                v = v + a[6] * acc + a[7] * acc_next
+                u, acc = u_next, acc_next
+                
+                u_full = system.expand(u)
+                if step % spec.output_every == 0:
+                    output.write(float(times[step]), u_full.reshape(-1, 6)[output_index])
+                magnitude = np.abs(u_full)
+                larger = magnitude > peak
+                peak[larger] = magnitude[larger]
+                peak_step[larger] = step
+                if step % report_every == 0:
+                    self._progress("timeHistory", int(100 * step / spec.steps),
+                        f"Step {step}/{spec.steps} (t = {times[step]:.3f} s)")
+            march_ms = (time.perf_counter() - march_start) * 1000
+        finally:
+            output_summary = output.close()
+        
+        peak, peak_time = peak.reshape(-1, 6), times[peak_step].reshape(-1, 6)
+        total_mass = np.einsum('ij,ij->j', influence, M @ influence)
+        return {
+            "dt": spec.dt,
+            "steps": spec.steps,
+            "duration": float(times[-1]),
+            "newmark": {"beta": spec.beta, "gamma": spec.gamma},
+            "rayleigh": {"alpha": alpha, "beta": beta},
+            "equations": n,
+            "totalMass": dict(zip(REACTION_NAMES[:3], total_mass.tolist())),
+            "factorMB": lu.factor_mb,
+            "output": dict(output_summary, every=spec.output_every),
+            "peakDisplacements": {node.id: dict(zip(DOF_NAMES, peak[node.index].tolist()))
+                                  for node in self.node_list},
+            "peakTimes": {node.id: dict(zip(DOF_NAMES, peak_time[node.index].tolist()))
+                          for node in self.node_list},
+            "stepMs": march_ms / spec.steps,
+            "timeMs": (time.perf_counter() - start_time) * 1000
+        }
+    
+    def response_spectrum_analysis(self, spec: ResponseSpectrum) -> Dict[str, Any]:
+        """
+        Peak seismic response by modal response-spectrum analysis.
+        
+        A mode's amplitude in a direction is Gamma Sa(T) / omega² with the
+        participation factor Gamma = phi^T M r of the mass-normalized shape
+        on the free DOFs, so the effective mass ratios of all modes sum to one.
+        Displacements, reactions, member end forces and base shears under
+        unit modal amplitudes form (responses x modes) blocks, combined over
+        the modes by CQC or SRSS in row chunks (combine_modal_responses),
+        and over the directions by SRSS. Member forces are recovered chunk
+        by chunk, so the largest block held is one chunk's.
+        """
+        start_time = time.perf_counter()
+        self._progress("responseSpectrum", 0, f"Assembling K and M for {spec.modes} modes...")
+        K, M, system, restrict = self._mass_system(spec.density, spec.nodal_masses)
+        K_r, M_r = restrict(K.data), restrict(M.data)
+        
+        eigen_start = time.perf_counter()
+        self._progress("responseSpectrum", 10, f"Solving {K_r.shape[0]} equations for modes...")
+        omega2, Phi, eigen_solver = self._modes(K_r, M_r, spec.modes)
+        eigen_ms = (time.perf_counter() - eigen_start) * 1000
+        omega = np.sqrt(omega2)
+        periods = 2 * np.pi / omega
+        n_modes = len(omega)
+        
+        # Participation, effective mass ratios and modal amplitudes (directions x modes)
+        influence = np.zeros((self.num_dofs, 3))
+        for direction in range(3):
+            influence[direction::6, direction] = 1.0
+        inertia = M_r @ influence[system.free_dofs]
+        participation = Phi.T @ inertia
+        movable_mass = np.einsum('ij,ij->j', influence[system.free_dofs], inertia)
+        mass_ratio = participation ** 2 / np.where(movable_mass > 0, movable_mass, 1.0)
+        spectral = np.interp(periods, spec.periods, spec.accelerations)
+        Q = np.array([scale * participation[:, direction] * spectral / omega2
+                      for direction, scale in spec.directions])
+        rho = cqc_correlation(omega, spec.damping) if spec.method == "cqc" else np.eye(n_modes)
+        
+        self._progress("responseSpectrum", 60, f"Combining {n_modes} modes ({spec.method.upper()})...")
+        combination_start = time.perf_counter()
+        rows = max(1, SPECTRUM_CHUNK_ENTRIES // n_modes)
+        
+        def combine(X: np.ndarray) -> np.ndarray:
+            """Peak of each response row, over modes and then directions."""
+            peak = np.empty(len(X))
+            for first in range(0, len(X), rows):
+                combined = combine_modal_responses(X[first:first + rows], Q, rho)
+                peak[first:first + rows] = np.sqrt((combined ** 2).sum(axis=1))
+            return peak
+        
+        U = system.expand(Phi)
+        R = K @ U
+        if system.C is not None:
+            R = system.C.T @ R
+        supported = np.array(system.constrained_dofs, dtype=np.int64)
+        R = R[supported]
+        base_shear = combine(np.array([R[supported % 6 == d].sum(axis=0) for d in range(3)]))
+        displacements = combine(U)
+        reactions = np.zeros(self.num_dofs)
+        reactions[supported] = combine(R)
+        
+        elements = self._get_elements()
+        member_forces = np.empty((len(elements), 12))
+        per_chunk = max(1, rows // 12)
+        for first in range(0, len(elements), per_chunk):
+            idx = np.arange(first, min(first + per_chunk, len(elements)))
+            forces = self._member_end_forces(U, idx)
+            member_forces[idx] = combine(forces.reshape(-1, n_modes)).reshape(-1, 12)
+        combination_ms = (time.perf_counter() - combination_start) * 1000
+        
+        self._progress("responseSpectrum", 100, f"{n_modes} modes, T1 = {periods[0]:.3f} s")
+        
+        return {
+            "method": spec.method,
+            "damping": spec.damping,
+            "eigenSolver": eigen_solver,
+            "modes": [
+                {
+                    "mode": j + 1,
+                    "period": float(periods[j]),
+                    "frequency": float(omega[j] / (2 * np.pi)),
+                    "participation": dict(zip(DOF_NAMES[:3], participation[j].tolist())),
+                    "massRatio": dict(zip(DOF_NAMES[:3], mass_ratio[j].tolist()))
+                }
+                for j in range(n_modes)
+            ],
+            "cumulativeMassRatio": dict(zip(DOF_NAMES[:3], mass_ratio.sum(axis=0).tolist())),
+            "baseShear": dict(zip(REACTION_NAMES[:3], base_shear.tolist())),
+            "displacements": displacements.tolist(),
+            "nodalDisplacements": self._build_nodal_displacements(displacements),
+            "nodalReactions": self._build_nodal_reactions(reactions, system.constrained_dofs),
+            "memberForceComponents": [end + name for end in ("start", "end") for name in RELEASE_COMPONENTS],
+            "memberForces": dict(zip([self.members[i].id for i in elements.member_index],
+                                     member_forces.tolist())),
+            "eigenMs": eigen_ms,
+            "combinationMs": combination_ms,
+            "timeMs": (time.perf_counter() - start_time) * 1000
+        }
+    
+    def pushover_analysis(self, spec: Pushover, max_rank: int = INCREMENTAL_MAX_RANK) -> Dict[str, Any]:
+        """
+        Event-to-event pushover with elastic-perfectly-plastic end hinges.
+        
+        Gravity loads are applied first and held; the lateral pattern is
+        then scaled up event by event. Within an event the response is
+        linear, so one solve for the unit pattern gives the load factor at
+        which the next member end moment reaches its plastic moment. That
+        end is then released (the hinge carries its plastic moment from
+        then on), a rank-one change of the member stiffness. The hinges
+        formed since the last factorization are a Woodbury update of it,
+        factored afresh once their rank exceeds max_rank, so no event
+        reassembles the model. Joints left without rotational stiffness
+        (every member end hinged) are held by a spring of their former
+        stiffness, which carries nothing. Stops at the target displacement,
+        a mechanism, or max_events.
+        """
+        start_time = time.perf_counter()
+        node = self.nodes.get(spec.control_node)
+        if node is None:
+            raise SolverError(f"Pushover control node not found: {spec.control_node}")
+        control = 6 * node.index + spec.control_dof
+        cases = list(dict.fromkeys(load.case for load in self.loads))
+        for case in (spec.pattern_case, spec.gravity_case):
+            if case is not None and case not in cases:
+                raise SolverError(f"Pushover uses an unknown load case: {case}")
+        pattern_cases = ([spec.pattern_case] if spec.pattern_case is not None
+                         else [case for case in cases if case != spec.gravity_case])
+        case_forces = self._build_case_forces(cases)
+        pattern = case_forces[:, [cases.index(case) for case in pattern_cases]].sum(axis=1)
+        gravity = (case_forces[:, cases.index(spec.gravity_case)] if spec.gravity_case is not None
+                   else np.zeros(self.num_dofs))
+        pattern_resultant = pattern[spec.control_dof::6].sum()
+        
+        system, lu = self._factorize()
+        elements = self._get_elements()
+        kernel = self._element_kernel()
+        position = self._get_element_positions()
+        hinged_members = [m for m in self.members if m.plastic_moment is not None and m.id in position]
+        members = np.array([position[m.id] for m in hinged_members], dtype=np.int64)
+        capacity = np.array([m.plastic_moment * 2 for m in hinged_members]).reshape(-1, 4)
+        released = elements.released.copy()
+        # Ends already released cannot hinge
+        can_hinge = ~released[members][:, HINGE_COMPONENTS] & np.isfinite(capacity)
+        hinged = np.zeros_like(can_hinge)
+        
+        dof_maps, k_current = self._assembly_blocks(elements, members, kernel)
+        k_factored = k_current.copy()  # Member stiffness in the factored matrix
+        K_factored, springs_factored = system.K, np.zeros(len(system.free_dofs))
+        base_diagonal = factored_diagonal = system.K_reduced.diagonal()
+        pattern_reduced = system.restrict(pattern)
+        y_factored = lu.solve(pattern_reduced)
+        
+        # Gravity state
+        u = system.expand(lu.solve(system.restrict(gravity))) if spec.gravity_case is not None \
+            else np.zeros(self.num_dofs)
+        moments = self._member_end_forces(u, members)[:, HINGE_COMPONENTS] if len(members) \
+            else np.zeros((0, 4))
+        if np.any(np.abs(moments) >= capacity * (1 - HINGE_TOL)):
+            raise SolverError("Gravity loads alone reach a plastic moment",
+                              "Pushover starts from an elastic gravity state")
+        load_factor = 0.0
+        curve = [{"event": 0, "loadFactor": 0.0, "baseShear": 0.0,
+                  "displacement": float(u[control]), "hinges": 0}]
+        hinges, woodbury_updates, refactorizations = [], 0, 0
+        initial_flexibility = None
+        termination = "maxEvents"
+        
+        self._progress("pushover", 0, f"Pushover of {len(members)} members with plastic moments...")
+        try:
+            for event in range(1, spec.max_events + 1):
+                # Current stiffness relative to the factored one
+                changed = np.flatnonzero(np.any(k_current != k_factored, axis=(1, 2)))
+                assembler = SparseAssembler(self.num_dofs)
+                assembler.add_elements(dof_maps[changed], k_current[changed] - k_factored[changed])
+                delta_K = assembler.to_csr()
+                delta_reduced = system.restrict_matrix(delta_K)
+                diagonal = factored_diagonal + delta_reduced.diagonal()
+                springs = np.where(diagonal <= HINGE_TOL * base_diagonal, base_diagonal, 0.0)
+                delta_reduced = delta_reduced + sparse.diags(springs - springs_factored)
+                dofs, V, lam = low_rank_factors(delta_reduced)
+                try:
+                    if len(lam) <= max_rank:
+                        solver = WoodburySolver(lu, dofs, V, lam)
+                        du = system.expand(solver.solve(pattern_reduced, y_factored))
+                        woodbury_updates += bool(len(lam))
+                    else:
+                        K_factored = K_factored + delta_K
+                        factored_diagonal = diagonal
+                        lu = self._new_lu(system.restrict_matrix(K_factored) + sparse.diags(springs))
+                        k_factored, springs_factored = k_current.copy(), springs
+                        y_factored = lu.solve(pattern_reduced)
+                        du = system.expand(y_factored)
+                        refactorizations += 1
+                except (np.linalg.LinAlgError, RuntimeError):
+                    termination = "mechanism"
+                    break
+            
+                flexibility = du[control]
+                if initial_flexibility is None:
+                    initial_flexibility = flexibility
+                    if flexibility == 0:
+                        raise SolverError("The pushover pattern does not move the control DOF")
+                if flexibility / initial_flexibility <= 0 or initial_flexibility / flexibility < MECHANISM_TOL:
+                    termination = "mechanism"
+                    break
+            
+                # Load factor step to the next hinge, or to the target displacement
+                d_moments = self._member_end_forces(du, members)[:, HINGE_COMPONENTS] if len(members) \
+                    else np.zeros((0, 4))
+                open_ends = can_hinge & ~hinged & (d_moments != 0)
+                steps = np.full(d_moments.shape, np.inf)
+                steps[open_ends] = ((np.sign(d_moments) * capacity - moments)[open_ends]
+                                    / d_moments[open_ends])
+                step = max(steps.min(initial=np.inf), 0.0)
+                reached = False
+                if spec.target_displacement is not None:
+                    to_target = (spec.target_displacement - u[control]) / flexibility
+                    if 0 <= to_target <= step:
+                        step, reached = to_target, True
+                if not np.isfinite(step):
+                    termination = "elastic"
+                    break
+            
+                load_factor += step
+                u += step * du
+                moments += step * d_moments
+                new = np.argwhere(open_ends & (np.abs(moments) >= capacity * (1 - HINGE_TOL)))
+                for i, c in new:
+                    hinged[i, c] = True
+                    elements.released[members[i], HINGE_COMPONENTS[c]] = True
+                    hinges.append({"event": event, "memberId": hinged_members[i].id,
+                                   "end": "start" if c < 2 else "end", "axis": "yz"[c % 2],
+                                   "moment": float(moments[i, c]), "loadFactor": float(load_factor),
+                                   "displacement": float(u[control])})
+                if len(new):
+                    rows = np.unique(new[:, 0])
+                    k_current[rows] = self._assembly_blocks(elements, members[rows], kernel)[1]
+                curve.append({"event": event, "loadFactor": float(load_factor),
+                              "baseShear": float(load_factor * pattern_resultant),
+                              "displacement": float(u[control]), "hinges": len(hinges)})
+                self._progress("pushover", min(99, event * 100 // spec.max_events),
+                    f"Event {event}: load factor {load_factor:.4g}, {len(hinges)} hinges")
+                if reached:
+                    termination = "target"
+                    break
+        
+        finally:
+            # Hinges were inserted as releases of the shared element arrays
+            elements.released[:] = released
+        self._progress("pushover", 100, f"{len(hinges)} hinges, stopped at {termination}")
+        
+        return {
+            "control": {"nodeId": spec.control_node, "dof": DOF_NAMES[spec.control_dof]},
+            "termination": termination,
+            "events": len(curve) - 1,
+            "curve": curve,
+            "hinges": hinges,
+            "displacements": u.tolist(),
+            "nodalDisplacements": self._build_nodal_displacements(u),
+            "woodburyUpdates": woodbury_updates,
+            "refactorizations": refactorizations,
+            "timeMs": (time.perf_counter() - start_time) * 1000
+        }
+    
+    def sensitivity_analysis(self, responses: List[Response]) -> Dict[str, Any]:
+        """Response values and per-member sensitivities, keyed by response."""
+        start_time = time.perf_counter()
+        self._progress("sensitivity", 0, f"Adjoint sensitivities of {len(responses)} responses...")
+        
+        values, sensitivities = self.response_sensitivities(responses)
+        elements = self._get_elements()
+        
+        self._progress("sensitivity", 100, f"Sensitivities for {len(elements)} members")
+        
+        return {
+            "memberIds": [self.members[i].id for i in elements.member_index],
+            "responses": {
+                r.key: dict(
+                    {"value": float(values[i])},
+                    **{name: sens[i].tolist() for name, sens in sensitivities.items()}
+                )
+                for i, r in enumerate(responses)
+            },
+            "timeMs": (time.perf_counter() - start_time) * 1000
+        }
+    
+    def optimize_sections(self, problem: SizingProblem) -> Dict[str, Any]:
+        """
+        Minimum-weight sizing of member groups from a section catalogue.
+        
+        Every iteration reassembles into a fixed sparsity pattern, refactors
+        with the ordering found in the first iteration and solves. Each
+        group then takes the lightest section meeting the utilization limit
+        under the current member forces (fully stressed design), and is
+        upgraded greedily, by predicted benefit per added weight, while
+        displacement limits are predicted violated. Predictions use the
+        adjoint sensitivities in reciprocal variables,
+        J ~ J0 + dJ/dp p0 (1 - p0 / p). Stops once a design repeats, and
+        leaves the lightest feasible design assigned to the members.
+        """
+        start_time = time.perf_counter()
+        elements = self._get_elements()
+        position = self._get_element_positions()
+        
+        catalogue = problem.catalogue
+        section_props = {name: np.array([getattr(sec, name) for sec in catalogue])
+                         for name in ("A", "Iy", "Iz", "J", "Zy", "Zz", "mass")}
+        n_sections = len(catalogue)
+        # Stress per unit axial force, moment about y, moment about z
+        stress_factors = 1.0 / (np.stack([section_props["A"], section_props["Zy"],
+                                          section_props["Zz"]], axis=1) * problem.yield_stress)
+        
+        group_ids = list(problem.groups)
+        n_groups = len(group_ids)
+        group_of = np.full(len(elements), -1, dtype=np.int64)
+        for g, group_id in enumerate(group_ids):
+            for member_id in problem.groups[group_id]:
+                if member_id not in position:
+                    raise SolverError(f"Sizing group {group_id}: member not found: {member_id}")
+                group_of[position[member_id]] = g
+        grouped = np.flatnonzero(group_of >= 0)
+        membership = sparse.csr_matrix(
+            (np.ones(len(grouped)), (np.arange(len(grouped)), group_of[grouped])),
+            shape=(len(grouped), n_groups)
+        )
+        group_length = membership.T @ elements.L[grouped]
+        
+        responses = [response for response, _ in problem.displacement_limits]
+        limits = np.array([limit for _, limit in problem.displacement_limits])
+        
+        kernel = self._element_kernel()
+        pattern = StiffnessPattern(self._kernel_dof_map(elements, kernel), self.num_dofs)
+        F = self._build_force_vector()
+        ordering = None
+        choice = np.zeros(n_groups, dtype=np.int64)
+        seen = set()
+        history = []
+        best = None
+        converged = False
+        
+        for iteration in range(1, problem.max_iterations + 1):
+            self._assign_sections(choice, grouped, group_of, section_props)
+            system = self._reduce_system(self._assemble_with_pattern(pattern, kernel), F)
+            lu = self._new_lu(system.K_reduced, ordering)
+            ordering = lu.ordering
+            self.system, self.lu, self._base_element_k = system, lu, {}
+            self.u_reduced = lu.solve(system.F_reduced)
+            
+            # Utilization of every group for every section, member forces held fixed
+            forces = self._member_end_forces(system.expand(self.u_reduced))
+            demand = np.abs(forces[grouped].reshape(-1, 2, 6)[:, :, [0, 4, 5]])
+            group_utilization = np.zeros((n_groups, n_sections))
+            for first in range(0, len(grouped), ASSEMBLY_CHUNK_SIZE):
+                chunk = slice(first, first + ASSEMBLY_CHUNK_SIZE)
+                utilization = (demand[chunk] @ stress_factors.T).max(axis=1)
+                np.maximum.at(group_utilization, group_of[grouped[chunk]], utilization)
+            utilization = group_utilization[np.arange(n_groups), choice]
+            
+            if responses:
+                values, sensitivities = self.response_sensitivities(responses)
+                ratios = np.abs(values) / limits
+            else:
+                ratios = np.zeros(0)
+            
+            weight = float(group_length @ section_props["mass"][choice])
+            max_utilization = float(utilization.max(initial=0.0))
+            max_ratio = float(ratios.max(initial=0.0))
+            feasible = (max_utilization <= problem.max_utilization * (1 + 1e-9)
+                        and max_ratio <= 1 + 1e-9)
+            if feasible and (best is None or weight < best[0]):
+                best = (weight, choice.copy())
+            
+            # Fully stressed resize, then upgrades for displacement limits
+            fits = group_utilization <= problem.max_utilization
+            new_choice = np.where(fits.any(axis=1), fits.argmax(axis=1), n_sections - 1)
+            if responses:
+                group_sensitivities = {name: sensitivities[name][:, grouped] @ membership
+                                       for name in SENSITIVITY_BLOCKS}
+                new_choice = self._upgrade_for_displacements(
+                    new_choice, choice, values, limits, group_sensitivities,
+                    section_props, group_length
+                )
+            
+            changed = int((new_choice != choice).sum())
+            history.append({
+                "iteration": iteration,
+                "weight": weight,
+                "maxUtilization": max_utilization,
+                "maxDisplacementRatio": max_ratio,
+                "feasible": feasible,
+                "changedGroups": changed
+            })
+            self._progress("optimizing", min(99, int(100 * iteration / problem.max_iterations)),
+                f"Iteration {iteration}: weight {weight:.1f}, utilization {max_utilization:.3f}, "
+                f"displacement ratio {max_ratio:.3f}, {changed} groups resized")
+            
+            seen.add(choice.tobytes())
+            if changed == 0:
+                converged = feasible
+                break
+            if new_choice.tobytes() in seen:
+                break
+            choice = new_choice
+        
+        final = best[1] if best is not None else choice
+        if not np.array_equal(final, choice):
+            self._assign_sections(final, grouped, group_of, section_props)
+            self.system, self.lu, self.u_reduced = None, None, None
+        for p in grouped:
+            member = self.members[elements.member_index[p]]
+            for name in ("A", "Iy", "Iz", "J"):
+                setattr(member, name, float(getattr(elements, name)[p]))
+        
+        self._progress("optimizing", 100, f"Sizing finished after {len(history)} iterations")
+        
+        return {
+            "converged": converged,
+            "feasible": best is not None,
+            "iterations": len(history),
+            "weight": float(group_length @ section_props["mass"][final]),
+            "sections": {group_id: catalogue[final[g]].name for g, group_id in enumerate(group_ids)},
+            "history": history,
+            "timeMs": (time.perf_counter() - start_time) * 1000
+        }
+    
+    def _assign_sections(self, choice: np.ndarray, grouped: np.ndarray, group_of: np.ndarray,
+                         section_props: Dict[str, np.ndarray]):
+        """Write the chosen sections' properties into the element arrays."""
+        elements = self._get_elements()
+        sections = choice[group_of[grouped]]
+        for name in ("A", "Iy", "Iz", "J"):
+            values = section_props[name][sections]
+            current = getattr(elements, name)
+            current[grouped] = np.where(np.isnan(values), current[grouped], values)
+    
+    @staticmethod
+    def _upgrade_for_displacements(choice: np.ndarray, current: np.ndarray, values: np.ndarray,
+                                   limits: np.ndarray, group_sensitivities: Dict[str, np.ndarray],
+                                   section_props: Dict[str, np.ndarray],
+                                   group_length: np.ndarray) -> np.ndarray:
+        """Greedily upgrade groups until predicted displacements meet their limits."""
+        choice = choice.copy()
+        heaviest = len(section_props["mass"]) - 1
+        p0 = {name: section_props[name][current] for name in group_sensitivities}
+        
+        def change(sections: np.ndarray) -> np.ndarray:
+            """Predicted response change per group (r, groups) at the given sections."""
+            return sum(
+                group_sensitivities[name] * (p0[name] * (1 - p0[name] / section_props[name][sections]))
+                for name in group_sensitivities
+            )
+        
+        predicted = values + change(choice).sum(axis=1)
+        for _ in range(len(choice) * heaviest):
+            violated = np.abs(predicted) > limits
+            if not violated.any():
+                break
+            
+            upgrade = np.minimum(choice + 1, heaviest)
+            candidates = predicted[:, None] + change(upgrade) - change(choice)
+            benefit = ((np.abs(predicted[violated, None]) - np.abs(candidates[violated]))
+                       / limits[violated, None]).sum(axis=0)
+            cost = group_length * (section_props["mass"][upgrade] - section_props["mass"][choice])
+            score = np.where((choice < heaviest) & (benefit > 0),
+                             benefit / np.maximum(cost, 1e-12), -np.inf)
+            g = int(score.argmax())
+            if not np.isfinite(score[g]):
+                break
+            predicted = candidates[:, g]
+            choice[g] += 1
+        
+        return choice
+    
+    def _assemble_with_pattern(self, pattern: StiffnessPattern,
+                               kernel: str = "frame") -> sparse.csr_matrix:
+        """Reassemble the global stiffness into a precomputed pattern."""
+        elements = self._get_elements()
+        
+        def chunks():
+            for first in range(0, len(elements), ASSEMBLY_CHUNK_SIZE):
+                idx = np.arange(first, min(first + ASSEMBLY_CHUNK_SIZE, len(elements)))
+                yield first, self._assembly_blocks(elements, idx, kernel)[1]
+        
+        return pattern.assemble(chunks())
+    
+    def _assemble_mass(self, pattern: StiffnessPattern, kernel: str,
+                       default_density: float) -> sparse.csr_matrix:
+        """Assemble the consistent global mass matrix into a precomputed pattern."""
+        elements = self._get_elements()
+        density = np.array([default_density if m.density is None else m.density
+                            for m in self.members], dtype=float)[elements.member_index]
+        
+        def chunks():
+            for first in range(0, len(elements), ASSEMBLY_CHUNK_SIZE):
+                idx = np.arange(first, min(first + ASSEMBLY_CHUNK_SIZE, len(elements)))
+                yield first, self._element_mass(elements, idx, kernel, density)
+        
+        return pattern.assemble(chunks())
+    
+    def _mass_system(self, density: float, nodal_masses: Dict[str, float]
+                     ) -> Tuple[sparse.csr_matrix, sparse.csr_matrix, ReducedSystem,
+                                Callable[[np.ndarray], sparse.csr_matrix]]:
+        """
+        Stiffness and consistent mass (plus lumped nodal masses) on one pattern.
+        
+        Returns:
+            Tuple of (K, M, reduced system, map from value arrays on the
+            shared pattern to matrices on the reduced DOFs)
+        """
+        elements = self._get_elements()
+        kernel = self._element_kernel()
+        pattern = StiffnessPattern(self._kernel_dof_map(elements, kernel), self.num_dofs)
+        K = self._assemble_with_pattern(pattern, kernel)
+        M = self._assemble_mass(pattern, kernel, density)
+        for node_id, mass in nodal_masses.items():
+            node = self.nodes.get(node_id)
+            if node is None:
+                raise SolverError(f"Mass node not found: {node_id}")
+            positions = pattern.diagonal_positions(6 * node.index + np.arange(3))
+            M.data[positions[positions >= 0]] += mass
+        
+        system = self._reduce_system(K, np.zeros(self.num_dofs))
+        if system.C is None:
+            restrict = pattern.restriction(system.free_dofs)
+        else:
+            def restrict(data: np.ndarray) -> sparse.csr_matrix:
+                return system.restrict_matrix(pattern.matrix(data))
+        return K, M, system, restrict
+    
+    def _modes(self, K: sparse.csr_matrix, M: sparse.csr_matrix,
+               count: int) -> Tuple[np.ndarray, np.ndarray, str]:
+        """
+        Lowest free-vibration modes, K phi = omega² M phi.
+        
+        Solved as M phi = mu K phi for the largest mu = 1/omega²: K is
+        positive definite where M may be singular (massless rotations), and
+        the largest mu converge first in Lanczos (ARPACK), with a single
+        factorization of K applying K^-1. Small systems are solved densely.
+        Massless (infinite-frequency) modes are dropped.
+        
+        Returns:
+            Tuple of (omega² ascending, M-normalized shapes (n, modes), eigensolver)
+        """
+        n = K.shape[0]
+        if n <= DENSE_EIGEN_SIZE or count >= n - 1:
+            mu, Phi = linalg.eigh(M.toarray(), K.toarray(),
+                                  subset_by_index=[max(n - count, 0), n - 1])
+            eigen_solver = "dense"
+        else:
+            with self._stage("factorization"):
+                lu = self._new_lu(K)
+            K_inv = spla.LinearOperator(K.shape, matvec=lu.solve, dtype=np.float64)
+            mu, Phi = spla.eigsh(M, k=count, M=K, Minv=K_inv, which="LA")
+            eigen_solver = "lanczos"
+        
+        order = np.argsort(mu)[::-1]
+        mu, Phi = mu[order], Phi[:, order]
+        if len(mu) == 0 or mu[0] <= 0:
+            raise SolverError("The model has no mass for modal analysis",
+                              "Give members a density or add nodal masses")
+        keep = mu > MODE_TOL * mu[0]
+        mu, Phi = mu[keep], Phi[:, keep]
+        Phi /= np.sqrt(np.einsum('ij,ij->j', Phi, M @ Phi))
+        return 1.0 / mu, Phi, eigen_solver
+    
+    def _member_end_forces(self, u_full: np.ndarray, idx=None) -> np.ndarray:
+        """Local end forces k T u (m, 12) of every element (or a subset) from nodal displacements.
+        
+        A displacement block (num_dofs, r) gives forces (m, 12, r).
+        """
+        elements = self._get_elements()
+        idx = np.arange(len(elements)) if idx is None else np.asarray(idx)
+        kernel = self._element_kernel()
+        if kernel == "truss":
+            u_ends = u_full[elements.translation_dof_map[idx]]
+            elongation = np.einsum('mi,mi...->m...', elements.R[idx, 0, :],
+                                   u_ends[:, 3:] - u_ends[:, :3])
+            axial = (elements.E[idx] * elements.A[idx] / elements.L[idx]).reshape(
+                (-1,) + (1,) * (u_full.ndim - 1))
+            forces = np.zeros((len(idx), 12) + u_full.shape[1:])
+            forces[:, 0] = -axial * elongation
+            forces[:, 6] = axial * elongation
+            return forces
+        
+        if kernel == "plane":
+            dof_map, local_stiffness = elements.plane_dof_map, self._local_plane_stiffness
+            forces = np.zeros((len(idx), 12) + u_full.shape[1:])
+            components = forces[:, PLANE_DOFS]
+        else:
+            dof_map, local_stiffness = elements.dof_map, self._local_element_stiffness
+            forces = components = np.empty((len(idx), 12) + u_full.shape[1:])
+        for first in range(0, len(idx), ASSEMBLY_CHUNK_SIZE):
+            chunk = idx[first:first + ASSEMBLY_CHUNK_SIZE]
+            u_local = global_to_local_vectors(u_full[dof_map[chunk]], elements.R[chunk])
+            components[first:first + len(chunk)] = np.einsum(
+                'mij,mj...->mi...', local_stiffness(elements, chunk), u_local)
+        if kernel == "plane":
+            forces[:, PLANE_DOFS] = components
+        return forces
+    
+    def _assemble_global_stiffness(self) -> sparse.spmatrix:
+        """Assemble global stiffness matrix in sparse format.
+        
+        Frame elements assemble in 6x6 nodal blocks, kept as BSR when the
+        blocks are at least BLOCK_MIN_FILL full (skew members) and
+        converted to CSR otherwise. Truss and plane-frame elements use 3
+        DOFs per node and assemble to CSR directly.
+        """
+        elements = self._get_elements()
+        m = len(elements)
+        kernel = self._element_kernel()
+        if kernel == "frame":
+            assembler = BlockAssembler(self.num_nodes)
+        else:
+            assembler = SparseAssembler(self.num_dofs)
+        self.element_cache = {"elements": 0, "unique": 0}
+        
+        for start in range(0, m, ASSEMBLY_CHUNK_SIZE):
+            chunk = slice(start, min(start + ASSEMBLY_CHUNK_SIZE, m))
+            assembler.add_elements(*self._assembly_blocks(elements, chunk, kernel))
+            
+            # Report progress per chunk
+            if m > ASSEMBLY_CHUNK_SIZE:
+                done = chunk.stop
+                progress = 10 + int(30 * done / m)
+                self._progress("assembling", progress,
+                    f"Processed {done}/{m} members...")
+        
+        if isinstance(assembler, BlockAssembler):
+            K = assembler.to_bsr()
+            nonzero = np.abs(K.data) > ZERO_ENTRY_TOL
+            if nonzero.sum() >= BLOCK_MIN_FILL * K.data.size:
+                return K
+            K.data[~nonzero] = 0.0
+            K = K.tocsr()
+            K.eliminate_zeros()
+            return K
+        return assembler.to_csr()
+    
+    def _get_elements(self) -> ElementSet:
+        """Stack member data for the batched kernels (cached).
         
-        # Build result dictionaries
-        nodal_displacements = self._build_nodal_displacements(u_full)
-        nodal_reactions = self._build_nodal_reactions(reactions, constrained_dofs)
+        Members with missing nodes or zero length are skipped.
+        """
+        if self._elements is not None:
+            return self._elements
         
-        self.timing["postprocessing"] = (time.perf_counter() - post_start) * 1000
-        self.timing["total"] = (time.perf_counter() - total_start) * 1000
+        index = {n.id: n.index for n in self.node_list}
+        coords = np.array([(n.x, n.y, n.z) for n in self.node_list], dtype=float).reshape(-1, 3)
         
-        report_progress("postprocessing", 100, "Complete!")
+        start = np.array([index.get(m.start_node_id, -1) for m in self.members], dtype=np.int64)
+        end = np.array([index.get(m.end_node_id, -1) for m in self.members], dtype=np.int64)
+        valid = (start >= 0) & (end >= 0)
         
-        # Build result
-        result = {
-            "success": True,
-            "displacements": u_full.tolist(),
-            "reactions": reactions.tolist(),
-            "nodalDisplacements": nodal_displacements,
-            "nodalReactions": nodal_reactions,
-            "timing": self.timing,
-            "solverInfo": solver_info,
-            "matrixStats": self._get_matrix_stats(K)
-        }
+        props = np.array(
+            [(m.E, m.A, m.Iy, m.Iz, m.G, m.J, m.beta) for m in self.members], dtype=float
+        ).reshape(-1, 7)
+        released = np.zeros((len(self.members), 12), dtype=bool)
+        released.reshape(-1)[np.fromiter(
+            (i * 12 + d for i, m in enumerate(self.members) for d in m.releases), dtype=np.int64
+        )] = True
+        if self.truss:
+            released[:, TRUSS_RELEASES] = True
         
-        return result
+        delta = coords[end] - coords[start]
+        delta[~valid] = 0.0
+        valid &= np.sqrt(np.einsum('ij,ij->i', delta, delta)) >= 1e-10
+        
+        member_index = np.flatnonzero(valid)
+        L, R = get_rotation_matrices(delta[valid], props[valid, 6])
+        E, A, Iy, Iz, G, J = props[valid, :6].T
+        
+        if released.any():
+            check_release_stability(released[valid], [self.members[i].id for i in member_index])
+        
+        self._elements = ElementSet(
+            member_index=member_index, start=start[valid], end=end[valid],
+            L=L, R=R, E=E, A=A, Iy=Iy, Iz=Iz, G=G, J=J,
+            released=released[valid]
+        )
+        return self._elements
     
-    def _assemble_global_stiffness(self) -> sparse.csr_matrix:
-        """Assemble global stiffness matrix in sparse format."""
-        assembler = SparseAssembler(self.num_dofs)
+    def _get_element_positions(self) -> Dict[str, int]:
+        """Member ID -> position in the element set (cached)."""
+        if self._element_position is None:
+            elements = self._get_elements()
+            self._element_position = {
+                self.members[i].id: p for p, i in enumerate(elements.member_index)
+            }
+        return self._element_position
+    
+    def _local_element_stiffness(self, elements: ElementSet, idx) -> np.ndarray:
+        """Condensed local element stiffness matrices (m, 12, 12) for a subset of elements."""
+        k_local = get_local_stiffness_matrices(
+            elements.E[idx], elements.Iy[idx], elements.Iz[idx],
+            elements.A[idx], elements.L[idx], elements.G[idx], elements.J[idx]
+        )
+        return condense_releases(k_local, elements.released[idx])
+    
+    def _local_plane_stiffness(self, elements: ElementSet, idx) -> np.ndarray:
+        """Condensed local plane-frame stiffness matrices (m, 6, 6) for a subset of elements."""
+        k_local = get_plane_frame_stiffness_matrices(
+            elements.E[idx], elements.A[idx], elements.Iz[idx], elements.L[idx]
+        )
+        return condense_releases(k_local, elements.released[idx][:, PLANE_DOFS],
+                                 blocks=PLANE_STIFFNESS_BLOCKS)
+    
+    def _element_kernel(self) -> str:
+        """Element formulation used for assembly: "truss", "plane" or "frame".
         
-        for i, member in enumerate(self.members):
-            # Get nodes
-            node_a = self.nodes.get(member.start_node_id)
-            node_b = self.nodes.get(member.end_node_id)
-            
-            if not node_a or not node_b:
-                continue
-            
-            # Calculate member length
-            L = get_member_length(node_a, node_b)
-            if L < 1e-10:
-                continue
-            
-            # Calculate local stiffness matrix
-            k_local = get_local_stiffness_matrix(
-                member.E, member.Iy, member.Iz, 
-                member.A, L, member.G, member.J
+        Pin-jointed models use axial truss elements. Models whose members
+        and loads all lie in a global xy-plane, without multi-point
+        constraints, use plane-frame elements; their out-of-plane DOFs are
+        left without stiffness and unloaded, so they solve to zero.
+        """
+        elements = self._get_elements()
+        if not len(elements):
+            return "frame"
+        if self.truss is not False and elements.axial_only.all():
+            return "truss"
+        if (self.planar and not self.constraints and elements.in_plane.all()
+                and not any(load.fz or load.mx or load.my for load in self.loads)):
+            return "plane"
+        return "frame"
+    
+    def _kernel_dof_map(self, elements: ElementSet, kernel: str) -> np.ndarray:
+        """Element DOF maps (m, w) of an element formulation (see _element_kernel)."""
+        if kernel == "truss":
+            return elements.translation_dof_map
+        if kernel == "plane":
+            return elements.plane_dof_map
+        return elements.dof_map
+    
+    def _kernel_stiffness(self, elements: ElementSet, idx, kernel: str) -> np.ndarray:
+        """Global stiffness matrices (m, w, w) of a subset of elements in an element formulation."""
+        if kernel == "truss":
+            return get_truss_stiffness_matrices(
+                elements.E[idx], elements.A[idx], elements.L[idx], elements.R[idx]
             )
-            
-            # Calculate transformation matrix
-            R = get_rotation_matrix(node_a, node_b, member.beta)
-            T = get_transformation_matrix(R)
-            
-            # Get DOF mapping
-            dof_map = self._get_member_dof_map(node_a, node_b)
-            
-            # Add to global matrix
-            assembler.add_element(dof_map, k_local, T)
-            
-            # Report progress periodically
-            if (i + 1) % 500 == 0:
-                progress = 10 + int(30 * (i + 1) / len(self.members))
-                report_progress("assembling", progress, 
-                    f"Processed {i + 1}/{len(self.members)} members...")
+        local = self._local_plane_stiffness if kernel == "plane" else self._local_element_stiffness
+        return transform_to_global(local(elements, idx), elements.R[idx])
+    
+    def _assembly_blocks(self, elements: ElementSet, idx,
+                         kernel: str) -> Tuple[np.ndarray, np.ndarray]:
+        """DOF maps and global stiffness matrices of a subset of elements for assembly.
         
-        return assembler.to_csr()
+        Truss and plane-frame elements are 6x6 over the translational and
+        in-plane DOFs; the remaining DOFs carry no stiffness and drop out
+        of the reduced system as inactive.
+        """
+        dof_maps = self._kernel_dof_map(elements, kernel)[idx]
+        if kernel == "truss":
+            # Cheaper to compute than to group
+            self.element_cache["elements"] += len(dof_maps)
+            self.element_cache["unique"] += len(dof_maps)
+            return dof_maps, self._kernel_stiffness(elements, idx, kernel)
+        return dof_maps, self._deduplicated_stiffness(
+            elements, idx, lambda e: self._kernel_stiffness(elements, e, kernel))
+    
+    def _element_stiffness(self, elements: ElementSet, idx) -> np.ndarray:
+        """Global element stiffness matrices (m, 12, 12) for a subset of elements."""
+        return self._deduplicated_stiffness(
+            elements, idx, lambda e: self._kernel_stiffness(elements, e, "frame"))
+    
+    def _element_mass(self, elements: ElementSet, idx, kernel: str,
+                      density: np.ndarray) -> np.ndarray:
+        """Global consistent mass matrices (m, w, w) of a subset of elements in an element formulation."""
+        rho = density[idx]
+        if kernel == "truss":
+            return get_truss_mass_matrices(rho, elements.A[idx], elements.L[idx])
+        m_local = get_local_mass_matrices(rho, elements.A[idx], elements.Iy[idx] + elements.Iz[idx],
+                                          elements.L[idx])
+        if kernel == "plane":
+            m_local = m_local[:, PLANE_DOFS][:, :, PLANE_DOFS]
+        return transform_to_global(m_local, elements.R[idx])
+    
+    def _element_groups(self, elements: ElementSet, idx) -> Tuple[np.ndarray, np.ndarray]:
+        """Group a subset of elements by equal stiffness: (first, inverse) as unique_element_groups."""
+        return unique_element_groups(element_keys(
+            elements.E[idx], elements.A[idx], elements.Iy[idx], elements.Iz[idx],
+            elements.G[idx], elements.J[idx], elements.L[idx], elements.R[idx],
+            elements.released[idx]
+        ))
+    
+    def _deduplicated_stiffness(self, elements: ElementSet, idx,
+                                kernel: Callable[[np.ndarray], np.ndarray]) -> np.ndarray:
+        """Apply a stiffness kernel to a subset of elements, once per group of equal members.
+        
+        Members with the same quantized properties, length, orientation and
+        releases share one matrix: each group is computed once and scattered.
+        """
+        idx = np.arange(len(elements))[idx]
+        first, inverse = self._element_groups(elements, idx)
+        self.element_cache["elements"] += len(idx)
+        self.element_cache["unique"] += len(first)
+        
+        # Mostly distinct members: gathering from the groups costs more than it saves
+        if 2 * len(first) > len(idx):
+            return kernel(idx)
+        return kernel(idx[first])[inverse]
+    
+    def _element_operator(self) -> ElementOperator:
+        """Unassembled global stiffness for matrix-free solves, one matrix per distinct element."""
+        elements = self._get_elements()
+        kernel = self._element_kernel()
+        dof_maps = self._kernel_dof_map(elements, kernel)
+        first, group = self._element_groups(elements, slice(None))
+        self.element_cache = {"elements": len(elements), "unique": len(first)}
+        
+        width = dof_maps.shape[1]
+        k = [np.empty((0, width, width))]
+        for start in range(0, len(first), ASSEMBLY_CHUNK_SIZE):
+            k.append(self._kernel_stiffness(elements, first[start:start + ASSEMBLY_CHUNK_SIZE], kernel))
+        return ElementOperator(dof_maps, np.concatenate(k), group, self.num_dofs)
     
     def _get_member_dof_map(self, node_a: Node, node_b: Node) -> List[int]:
         """Get DOF indices for a member (12 DOFs total)."""
@@ -506,25 +4411,35 @@ class StructuralSolver:
     
     def _build_force_vector(self) -> np.ndarray:
         """Build the global force vector from loads."""
-        F = np.zeros(self.num_dofs)
+        return self._build_case_forces([None])[:, 0]
+    
+    def _build_case_forces(self, cases: List[Optional[str]]) -> np.ndarray:
+        """Global force vectors (num_dofs, len(cases)); a None case takes every load."""
+        F = np.zeros((self.num_dofs, len(cases)))
+        column = {case: j for j, case in enumerate(cases)}
         
         for load in self.loads:
             node = self.nodes.get(load.node_id)
-            if not node:
+            j = column.get(None, column.get(load.case))
+            if not node or j is None:
                 continue
             
             base = node.index * 6
-            F[base + 0] = load.fx
-            F[base + 1] = load.fy
-            F[base + 2] = load.fz
-            F[base + 3] = load.mx
-            F[base + 4] = load.my
-            F[base + 5] = load.mz
+            F[base + 0, j] += load.fx
+            F[base + 1, j] += load.fy
+            F[base + 2, j] += load.fz
+            F[base + 3, j] += load.mx
+            F[base + 4, j] += load.my
+            F[base + 5, j] += load.mz
         
         return F
     
     def _identify_dofs(self) -> Tuple[List[int], List[int]]:
-        """Identify free and constrained DOFs based on supports."""
+        """Identify free and constrained DOFs based on supports.
+        
+        Slave DOFs of multi-point constraints are neither: they are
+        eliminated and recovered from their masters.
+        """
         free_dofs = []
         constrained_dofs = []
         
@@ -538,54 +4453,332 @@ class StructuralSolver:
                     support.rx, support.ry, support.rz
                 ]
                 for i, is_constrained in enumerate(constraints):
-                    if is_constrained:
+                    if base + i in self.slave_dofs:
+                        if is_constrained:
+                            raise SolverError(f"Support {DOF_NAMES[i]} at node {node.id} "
+                                              f"conflicts with a constraint slaving that DOF")
+                    elif is_constrained:
                         constrained_dofs.append(base + i)
                     else:
                         free_dofs.append(base + i)
             else:
-                free_dofs.extend([base + i for i in range(6)])
+                free_dofs.extend([base + i for i in range(6)
+                                  if base + i not in self.slave_dofs])
         
         return free_dofs, constrained_dofs
     
+    def _build_constraint_matrix(self) -> Optional[sparse.csc_matrix]:
+        """
+        Build the constraint transformation C with u = C @ u.
+        
+        Columns are indexed by global DOF: retained DOFs map to themselves,
+        slave DOFs have empty columns and rows expressing them in terms of
+        master DOFs. Returns None when the model has no constraints.
+        """
+        if not self.constraints:
+            return None
+        
+        slave_terms: Dict[int, List[Tuple[int, float]]] = {}
+        
+        def tie(slave_dof: int, terms: List[Tuple[int, float]], node_id: str):
+            if slave_dof in slave_terms:
+                raise SolverError(f"DOF {DOF_NAMES[slave_dof % 6]} at node {node_id} "
+                                  f"is slaved by more than one constraint")
+            slave_terms[slave_dof] = terms
+        
+        for constraint in self.constraints:
+            master = self.nodes.get(constraint.master_node_id)
+            if not master:
+                raise SolverError(f"Constraint master node not found: {constraint.master_node_id}")
+            m_base = master.index * 6
+            
+            for slave_id in constraint.slave_node_ids:
+                slave = self.nodes.get(slave_id)
+                if not slave:
+                    raise SolverError(f"Constraint slave node not found: {slave_id}")
+                s_base = slave.index * 6
+                
+                if constraint.type == "diaphragm":
+                    # In-plane rigid body motion: u_s = u_m + θn e_n × (x_s - x_m)
+                    normal = PLANE_NORMAL_AXIS[constraint.plane]
+                    arm = np.cross(
+                        np.eye(3)[normal],
+                        [slave.x - master.x, slave.y - master.y, slave.z - master.z]
+                    )
+                    rotation_dof = m_base + 3 + normal
+                    for axis in range(3):
+                        if axis == normal:
+                            continue
+                        terms = [(m_base + axis, 1.0)]
+                        if arm[axis] != 0.0:
+                            terms.append((rotation_dof, float(arm[axis])))
+                        tie(s_base + axis, terms, slave_id)
+                    tie(s_base + 3 + normal, [(rotation_dof, 1.0)], slave_id)
+                else:
+                    for dof in constraint.dofs:
+                        i = DOF_NAMES.index(dof)
+                        tie(s_base + i, [(m_base + i, 1.0)], slave_id)
+        
+        # Masters must be independent DOFs (no constraint chains)
+        for slave_dof, terms in slave_terms.items():
+            for master_dof, _ in terms:
+                if master_dof in slave_terms:
+                    raise SolverError(f"Constraint master DOF {DOF_NAMES[master_dof % 6]} at node "
+                                      f"{self.node_list[master_dof // 6].id} is itself a slave")
+        
+        self.slave_dofs = set(slave_terms)
+        
+        is_retained = np.ones(self.num_dofs, dtype=bool)
+        is_retained[list(slave_terms)] = False
+        retained = np.flatnonzero(is_retained)
+        rows = [retained]
+        cols = [retained]
+        vals = [np.ones(len(retained))]
+        for slave_dof, terms in slave_terms.items():
+            rows.append(np.full(len(terms), slave_dof))
+            cols.append(np.array([t[0] for t in terms]))
+            vals.append(np.array([t[1] for t in terms]))
+        
+        return sparse.csc_matrix(
+            (np.concatenate(vals), (np.concatenate(rows), np.concatenate(cols))),
+            shape=(self.num_dofs, self.num_dofs)
+        )
+    
+    def _new_lu(self, K: sparse.spmatrix, ordering: Optional[np.ndarray] = None):
+        """Factorize K in the configured precision."""
+        if self.precision == "mixed":
+            return MixedPrecisionLU(K, ordering)
+        return SymmetricLU(K, ordering)
+    
     def _solve_direct(self, K: sparse.csr_matrix, F: np.ndarray) -> Tuple[np.ndarray, Dict]:
-        """Solve using direct method (SuperLU via spsolve)."""
+        """Solve using direct method (SuperLU), keeping the factorization."""
         try:
-            u = spla.spsolve(K, F)
-            return u, {
+            self.lu = self._new_lu(K)
+            u = self.lu.solve(F)
+            info = {
                 "method": "direct-superlu",
                 "success": True
             }
+            if isinstance(self.lu, MixedPrecisionLU):
+                if self.lu.fallback is None:
+                    info["method"] = "direct-superlu-mixed"
+                else:
+                    info["fallback"] = self.lu.fallback_reason
+                info["refinementSteps"] = self.lu.steps
+                info["relativeResidual"] = self.lu.residual
+            info["factorMB"] = self.lu.factor_mb
+            return u, info
+        except SolverError:
+            raise
         except Exception as e:
-            report_error(f"Direct solver failed: {str(e)}")
-            return np.zeros(len(F)), {"method": "direct-superlu", "success": False}
+            raise SolverError(f"Direct solver failed: {str(e)}") from e
     
-    def _solve_iterative(self, K: sparse.csr_matrix, F: np.ndarray) -> Tuple[np.ndarray, Dict]:
-        """Solve using Conjugate Gradient with ILU preconditioner."""
-        # Build ILU preconditioner
+    def _solve_iterative(self, K: sparse.csr_matrix, F: np.ndarray, preconditioner: str = "ilu",
+                         tolerance: float = 1e-8, max_iterations: int = 2000,
+                         x0: Optional[np.ndarray] = None, start_iteration: int = 0,
+                         checkpoint: Optional[Checkpoint] = None,
+                         free_dofs: Optional[np.ndarray] = None,
+                         threads: int = 1) -> Tuple[np.ndarray, Dict]:
+        """Solve using Conjugate Gradient with one of PRECONDITIONERS.
+        
+        Starting from x0 (a checkpointed iterate) continues a solve that had
+        run start_iteration iterations; max_iterations counts both runs.
+        Block-Jacobi needs the global DOF of each equation (free_dofs) and
+        falls back to Jacobi without it. An element operator K has no
+        entries to factor incompletely, so ILU becomes block-Jacobi.
+        With threads > 1 the matrix product and the (block-)Jacobi
+        application run in row chunks on a thread pool, where measured
+        faster than serially (see _parallel_kernels).
+        """
+        if preconditioner not in PRECONDITIONERS:
+            raise SolverError(f"Unknown preconditioner: {preconditioner}",
+                              f"Use one of: {', '.join(PRECONDITIONERS)}")
+        if preconditioner == "ilu" and isinstance(K, ElementOperator):
+            preconditioner = "block-jacobi"
+        if preconditioner == "block-jacobi" and free_dofs is None:
+            preconditioner = "jacobi"
+        
+        pool = ThreadPoolExecutor(threads) if threads > 1 else None
         try:
-            ilu = spla.spilu(K.tocsc())
-            M = spla.LinearOperator(K.shape, ilu.solve)
-        except Exception:
-            M = None  # Fall back to no preconditioner
+            M = None
+            if preconditioner == "block-jacobi":
+                if isinstance(K, (ElementOperator, BlockReducedMatrix)):
+                    rows, cols, values = K.node_block_triplets()
+                else:
+                    coo = K.tocoo()
+                    rows, cols, values = coo.row, coo.col, coo.data
+                M = block_jacobi(rows, cols, values, free_dofs)
+            elif preconditioner == "ilu":
+                try:
+                    ilu = spla.spilu(K.tocsc())
+                    M = spla.LinearOperator(K.shape, ilu.solve)
+                except Exception:
+                    preconditioner = "none"  # Fall back to no preconditioner
+            elif preconditioner == "jacobi":
+                inverse_diagonal = 1.0 / K.diagonal()
+                M = spla.LinearOperator(K.shape, lambda x: inverse_diagonal * x)
+            
+            A, parallel_info = K, None
+            if pool is not None:
+                A, M, parallel_info = self._parallel_kernels(
+                    K, M, preconditioner, F, pool, threads,
+                    block_triplets=(rows, cols, values) if preconditioner == "block-jacobi" else None,
+                    free_dofs=free_dofs)
+            
+            # Solve with CG
+            iterations = [start_iteration]
+            
+            def callback(xk):
+                iterations[0] += 1
+                if checkpoint is not None and checkpoint.due():
+                    checkpoint.save_iterate(xk, iterations[0])
+            
+            try:
+                u, info = spla.cg(A, F, x0=x0, M=M, maxiter=max(max_iterations - start_iteration, 1),
+                                  callback=callback, **{CG_TOL_KWARG: tolerance})
+                
+                solver_info = {
+                    "method": "iterative-cg",
+                    "preconditioner": preconditioner,
+                    "success": info == 0,
+                    "iterations": iterations[0],
+                    "converged": info == 0
+                }
+                if start_iteration:
+                    solver_info["resumedFromIteration"] = start_iteration
+                if parallel_info is not None:
+                    solver_info["parallel"] = parallel_info
+                return u, solver_info
+            except SolverError:
+                raise
+            except Exception as e:
+                raise SolverError(f"Iterative solver failed: {str(e)}") from e
+        finally:
+            if pool is not None:
+                pool.shutdown()
+    
+    def _parallel_kernels(self, K, M: Optional[spla.LinearOperator], preconditioner: str,
+                          x: np.ndarray, pool: ThreadPoolExecutor, threads: int,
+                          block_triplets: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None,
+                          free_dofs: Optional[np.ndarray] = None
+                          ) -> Tuple[Any, Optional[spla.LinearOperator], Dict[str, Any]]:
+        """
+        Thread-parallel CG matrix product and preconditioner, where faster.
+        
+        Each kernel is split into row chunks and timed against its serial
+        form on x; the faster form is used. ILU's triangular solves are
+        sequential and element products scatter into shared DOFs, so
+        those stay serial.
         
-        # Solve with CG
-        iterations = [0]
+        Returns:
+            Tuple of (operator for CG, preconditioner, solverInfo.parallel)
+        """
+        def measured(serial, parallel, chunks: int) -> Tuple[bool, Dict[str, Any]]:
+            serial_ms, parallel_ms = time_kernel(serial, x), time_kernel(parallel, x)
+            used = parallel_ms < serial_ms
+            return used, {"chunks": chunks, "serialMs": serial_ms, "parallelMs": parallel_ms,
+                          "speedup": serial_ms / parallel_ms if parallel_ms > 0 else 1.0,
+                          "used": used}
         
-        def callback(xk):
-            iterations[0] += 1
+        info: Dict[str, Any] = {"threads": threads}
+        A = K
+        chunks = chunk_count(K.nnz, threads) if not isinstance(K, ElementOperator) else 1
+        if isinstance(K, ElementOperator):
+            info["matvec"] = {"used": False, "reason": "element products scatter into shared DOFs"}
+        elif chunks < 2:
+            info["matvec"] = {"used": False, "chunks": 1, "reason": "too few entries to split"}
+        else:
+            product = (K.parallel_matvec(pool, chunks) if isinstance(K, BlockReducedMatrix)
+                       else parallel_matvec(K.tocsr(), pool, chunks))
+            used, info["matvec"] = measured(lambda v: K @ v, product, chunks)
+            if used:
+                A = spla.LinearOperator(K.shape, matvec=product, dtype=np.float64)
         
-        try:
-            u, info = spla.cg(K, F, M=M, tol=1e-8, maxiter=2000, callback=callback)
+        n = K.shape[0]
+        if preconditioner == "block-jacobi":
+            chunks = chunk_count(6 * n, threads)
+            if chunks > 1:
+                parallel = block_jacobi(*block_triplets, free_dofs, pool=pool, chunks=chunks)
+                used, info["preconditioner"] = measured(M.matvec, parallel.matvec, chunks)
+                M = parallel if used else M
+        elif preconditioner == "jacobi":
+            chunks = chunk_count(n, threads)
+            if chunks > 1:
+                inverse_diagonal = 1.0 / K.diagonal()
+                bounds = even_chunks(n, chunks)
+                
+                def apply(r: np.ndarray) -> np.ndarray:
+                    r, z = np.ravel(r), np.empty(n)
+                    
+                    def work(first: int, last: int):
+                        np.multiply(inverse_diagonal[first:last], r[first:last], out=z[first:last])
+                    
+                    run_chunks(pool, bounds, work)
+                    return z
+                
+                used, info["preconditioner"] = measured(M.matvec, apply, chunks)
+                if used:
+                    M = spla.LinearOperator(K.shape, apply)
+        elif preconditioner == "ilu":
+            info["preconditioner"] = {"used": False, "reason": "ILU triangular solves are sequential"}
+        if preconditioner in ("block-jacobi", "jacobi") and "preconditioner" not in info:
+            info["preconditioner"] = {"used": False, "chunks": 1, "reason": "too few equations to split"}
+        return A, M, info
+    
+    def _solve_out_of_core(self, K: OutOfCoreCSR, F: np.ndarray, scratch: ScratchDirectory,
+                           tolerance: float = 1e-8, max_iterations: int = 2000) -> Tuple[np.ndarray, Dict]:
+        """
+        Jacobi-preconditioned CG streaming K and the Krylov vectors from disk.
+        
+        Every pass walks K's row blocks once; the vector updates and dot
+        products of an iteration are fused into blocked sweeps over the
+        memory-mapped x, r, p and K p, so only one block is resident.
+        """
+        n = K.shape[0]
+        inverse_diagonal = scratch.array("inverse_diagonal", (n,))
+        x, r, p, q = (scratch.array(name, (n,)) for name in ("x", "r", "p", "q"))
+        blocks = K.row_blocks
+        
+        rz = 0.0
+        for start, stop in blocks:
+            inverse_diagonal[start:stop] = 1.0 / K.block(start, stop).diagonal(start)
+            r[start:stop] = F[start:stop]
+            p[start:stop] = inverse_diagonal[start:stop] * r[start:stop]
+            rz += float(r[start:stop] @ p[start:stop])
+        
+        target = tolerance * np.linalg.norm(F)
+        residual = np.linalg.norm(F)
+        iterations = 0
+        while residual > target and iterations < max_iterations:
+            pq = 0.0
+            for start, stop in blocks:
+                q[start:stop] = K.block(start, stop) @ p
+                pq += float(p[start:stop] @ q[start:stop])
+            alpha = rz / pq
             
-            return u, {
-                "method": "iterative-cg",
-                "success": info == 0,
-                "iterations": iterations[0],
-                "converged": info == 0
-            }
-        except Exception as e:
-            report_error(f"Iterative solver failed: {str(e)}")
-            return np.zeros(len(F)), {"method": "iterative-cg", "success": False}
+            rz_next = rr = 0.0
+            for start, stop in blocks:
+                x[start:stop] += alpha * p[start:stop]
+                r[start:stop] -= alpha * q[start:stop]
+                rz_next += float(r[start:stop] @ (inverse_diagonal[start:stop] * r[start:stop]))
+                rr += float(r[start:stop] @ r[start:stop])
+            residual = np.sqrt(rr)
+            iterations += 1
+            
+            beta, rz = rz_next / rz, rz_next
+            for start, stop in blocks:
+                p[start:stop] = inverse_diagonal[start:stop] * r[start:stop] + beta * p[start:stop]
+        
+        converged = bool(residual <= target)
+        return np.array(x), {
+            "method": "out-of-core-cg",
+            "preconditioner": "jacobi",
+            "success": converged,
+            "iterations": iterations,
+            "converged": converged,
+            "relativeResidual": float(residual / max(np.linalg.norm(F), 1e-300)),
+            "blocks": len(blocks)
+        }
     
     def _build_nodal_displacements(self, u: np.ndarray) -> Dict[str, Dict[str, float]]:
         """Build nodal displacement dictionary."""
@@ -622,20 +4815,301 @@ class StructuralSolver:
                 }
         return result
     
-    def _get_matrix_stats(self, K: sparse.csr_matrix) -> Dict[str, Any]:
+    def _get_matrix_stats(self, K: sparse.spmatrix) -> Dict[str, Any]:
         """Get matrix statistics."""
-        return {
+        computed = self.element_cache["elements"]
+        unique = self.element_cache["unique"]
+        stats = {
             "size": K.shape[0],
             "nnz": K.nnz,
             "density": K.nnz / (K.shape[0] ** 2),
-            "memorySavedMB": (K.shape[0] ** 2 - K.nnz) * 8 / (1024 ** 2)
+            "memorySavedMB": (K.shape[0] ** 2 - K.nnz) * 8 / (1024 ** 2),
+            "elementCache": {
+                "elements": computed,
+                "unique": unique,
+                "hitRate": (computed - unique) / computed if computed else 0.0
+            }
+        }
+        if isinstance(K, (sparse.csr_matrix, sparse.bsr_matrix)):
+            # Block storage keeps one column index per 6x6 block
+            stats["format"] = K.format
+            stats["indexMB"] = (K.indices.nbytes + K.indptr.nbytes) / (1024 ** 2)
+        return stats
+
+
+# ============================================================================
+# MODEL CLEANUP
+# ============================================================================
+
+# Large primes for the spatial hash (Teschner et al. 2003)
+HASH_PRIMES = np.array([73856093, 19349663, 83492791], dtype=np.int64)
+
+# Self cell plus the 13 neighbour cells that are lexicographically "ahead",
+# so each unordered pair of adjacent cells is visited exactly once
+HALF_NEIGHBOUR_OFFSETS = [np.zeros(3, dtype=np.int64)] + [
+    np.array([i, j, k], dtype=np.int64)
+    for i in (-1, 0, 1) for j in (-1, 0, 1) for k in (-1, 0, 1)
+    if (i, j, k) > (0, 0, 0)
+]
+
+
+def _spatial_hash(cells: np.ndarray) -> np.ndarray:
+    """Hash integer grid cells (n x 3) to int64 keys. Collisions are harmless."""
+    h = cells * HASH_PRIMES
+    return h[:, 0] ^ h[:, 1] ^ h[:, 2]
+
+
+def find_coincident_nodes(coords: np.ndarray, tolerance: float) -> np.ndarray:
+    """
+    Find nodes lying within `tolerance` of each other.
+    
+    Nodes are bucketed into a grid of cell size `tolerance`, so any two nodes
+    closer than the tolerance share a cell or sit in adjacent cells. Candidate
+    pairs are drawn from each node's own and forward-neighbour buckets and
+    confirmed by exact distance. Groups connected by close pairs collapse onto
+    their lowest index.
+    
+    Returns:
+        Array mapping each node index to the index of the node it merges into
+    """
+    n = len(coords)
+    if n == 0:
+        return np.zeros(0, dtype=np.int64)
+    
+    cells = np.floor(coords / tolerance).astype(np.int64)
+    
+    # Open hash table with ~4 slots per node; nodes are counting-sorted by slot
+    num_slots = 1 << int(np.ceil(np.log2(4 * n)))
+    slot_mask = num_slots - 1
+    slots = _spatial_hash(cells) & slot_mask
+    order = np.argsort(slots, kind='stable')
+    slot_count = np.bincount(slots, minlength=num_slots)
+    slot_start = np.cumsum(slot_count) - slot_count
+    node_ids = np.arange(n)
+    
+    pairs_i = []
+    pairs_j = []
+    for offset in HALF_NEIGHBOUR_OFFSETS:
+        target = _spatial_hash(cells + offset) & slot_mask
+        counts = slot_count[target]
+        total = int(counts.sum())
+        if total == 0:
+            continue
+        
+        # Expand each node's slot into explicit candidate pairs
+        src = np.repeat(node_ids, counts)
+        run_start = np.repeat(np.cumsum(counts) - counts, counts)
+        dst = order[np.repeat(slot_start[target], counts) + np.arange(total) - run_start]
+        
+        keep = src < dst if not offset.any() else src != dst
+        src, dst = src[keep], dst[keep]
+        
+        # Slot collisions and neighbour cells both land here; exact distance decides
+        delta = coords[src] - coords[dst]
+        close = np.einsum('ij,ij->i', delta, delta) <= tolerance * tolerance
+        pairs_i.append(src[close])
+        pairs_j.append(dst[close])
+    
+    if not pairs_i or sum(len(p) for p in pairs_i) == 0:
+        return node_ids
+    
+    i = np.concatenate(pairs_i)
+    j = np.concatenate(pairs_j)
+    graph = sparse.coo_matrix((np.ones(len(i), dtype=np.int8), (i, j)), shape=(n, n))
+    _, labels = connected_components(graph, directed=False)
+    
+    # Representative of each group is its lowest node index
+    representative = np.full(labels.max() + 1, n, dtype=np.int64)
+    np.minimum.at(representative, labels, node_ids)
+    return representative[labels]
+
+
+def clean_model(data: Dict[str, Any], tolerance: float = 1e-6) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Merge coincident nodes and drop degenerate members ahead of parsing.
+    
+    Member endpoints, supports and loads are remapped onto the surviving
+    node of each group. Supports landing on the same node are combined,
+    loads are kept (they accumulate in the force vector). Members that
+    collapse to zero length or duplicate an earlier member's endpoints
+    are removed.
+    
+    Returns:
+        Tuple of (cleaned input data, cleanup report)
+    """
+    if tolerance <= 0:
+        raise SolverError(f"Merge tolerance must be positive, got {tolerance}")
+    
+    nodes = data.get("nodes", [])
+    coords = np.array(
+        [(n["x"], n["y"], n["z"]) for n in nodes], dtype=float
+    ).reshape(-1, 3)
+    
+    if len(coords) and np.abs(coords).max() / tolerance > 2 ** 60:
+        raise SolverError(f"Merge tolerance {tolerance} is too small for model extents")
+    
+    target = find_coincident_nodes(coords, tolerance)
+    node_ids = [n["id"] for n in nodes]
+    
+    merged_nodes = {
+        node_ids[i]: node_ids[target[i]]
+        for i in np.flatnonzero(target != np.arange(len(nodes)))
+    }
+    kept_nodes = [nodes[i] for i in np.flatnonzero(target == np.arange(len(nodes)))]
+    index_of = {node_id: i for i, node_id in enumerate(node_ids)}
+    
+    # Remap member endpoints onto surviving nodes (-1 marks unknown nodes)
+    raw_members = data.get("members", [])
+    start_ids = [merged_nodes.get(m["startNodeId"], m["startNodeId"]) for m in raw_members]
+    end_ids = [merged_nodes.get(m["endNodeId"], m["endNodeId"]) for m in raw_members]
+    start_idx = np.array([index_of.get(i, -1) for i in start_ids], dtype=np.int64)
+    end_idx = np.array([index_of.get(i, -1) for i in end_ids], dtype=np.int64)
+    known = (start_idx >= 0) & (end_idx >= 0)
+    
+    # Zero-length: collapsed onto one node or shorter than the tolerance
+    delta = coords[end_idx] - coords[start_idx] if len(coords) else np.zeros((len(raw_members), 3))
+    collapsed = known & (np.einsum('ij,ij->i', delta, delta) <= tolerance * tolerance)
+    collapsed |= np.array([a == b for a, b in zip(start_ids, end_ids)], dtype=bool)
+    
+    # Duplicates: same unordered endpoint pair as an earlier surviving member
+    duplicated = np.zeros(len(raw_members), dtype=bool)
+    candidates = np.flatnonzero(known & ~collapsed)
+    if len(candidates):
+        lo = np.minimum(start_idx[candidates], end_idx[candidates])
+        hi = np.maximum(start_idx[candidates], end_idx[candidates])
+        _, first = np.unique(lo * len(nodes) + hi, return_index=True)
+        duplicated[candidates] = True
+        duplicated[candidates[first]] = False
+    
+    members = []
+    zero_length = []
+    duplicate = []
+    for i, m in enumerate(raw_members):
+        if collapsed[i]:
+            zero_length.append(m["id"])
+        elif duplicated[i]:
+            duplicate.append(m["id"])
+        elif start_ids[i] != m["startNodeId"] or end_ids[i] != m["endNodeId"]:
+            members.append({**m, "startNodeId": start_ids[i], "endNodeId": end_ids[i]})
+        else:
+            members.append(m)
+    
+    # Combine supports that now share a node
+    supports: Dict[str, Dict[str, Any]] = {}
+    for s in data.get("supports", []):
+        node_id = merged_nodes.get(s["nodeId"], s["nodeId"])
+        if node_id in supports:
+            combined = supports[node_id]
+            for dof in ("dx", "dy", "dz", "rx", "ry", "rz"):
+                combined[dof] = bool(combined.get(dof, False) or s.get(dof, False))
+        else:
+            supports[node_id] = {**s, "nodeId": node_id}
+    
+    loads = [
+        {**l, "nodeId": merged_nodes[l["nodeId"]]} if l["nodeId"] in merged_nodes else l
+        for l in data.get("loads", [])
+    ]
+    
+    cleaned = {
+        **data,
+        "nodes": kept_nodes,
+        "members": members,
+        "supports": list(supports.values()),
+        "loads": loads
+    }
+    
+    report = {
+        "tolerance": tolerance,
+        "nodesBefore": len(nodes),
+        "nodesAfter": len(kept_nodes),
+        "membersBefore": len(data.get("members", [])),
+        "membersAfter": len(members),
+        "mergedNodes": merged_nodes,
+        "removedMembers": {
+            "zeroLength": zero_length,
+            "duplicate": duplicate
         }
+    }
+    
+    return cleaned, report
 
 
 # ============================================================================
 # INPUT PARSING
 # ============================================================================
 
+def member_end_component(key: str) -> Optional[int]:
+    """Local DOF index of a start/end + component key (e.g. "startMomentZ")."""
+    for end, offset in (("start", 0), ("end", 6)):
+        component = key[len(end):] if key.startswith(end) else None
+        if component in RELEASE_COMPONENTS:
+            return offset + RELEASE_COMPONENTS.index(component)
+    return None
+
+
+def parse_releases(releases: Optional[Dict[str, bool]]) -> Tuple[int, ...]:
+    """
+    Parse member end releases into local DOF indices.
+    
+    Keys follow the shared element schema: start/end + Axial, ShearY,
+    ShearZ, Torsion, MomentY, MomentZ (e.g. "startMomentZ": true).
+    """
+    if not releases:
+        return ()
+    
+    dofs = []
+    for key, value in releases.items():
+        if not value:
+            continue
+        dof = member_end_component(key)
+        if dof is None:
+            raise SolverError(f"Invalid member release: {key}")
+        dofs.append(dof)
+    
+    return tuple(sorted(dofs))
+
+
+def parse_member_behaviour(member: Dict[str, Any]) -> Optional[str]:
+    """Parse "tensionOnly" / "compressionOnly" flags of a member."""
+    tension, compression = bool(member.get("tensionOnly")), bool(member.get("compressionOnly"))
+    if tension and compression:
+        raise SolverError(f"Member {member['id']} is both tension-only and compression-only")
+    return "tension" if tension else "compression" if compression else None
+
+
+def parse_plastic_moment(member: Dict[str, Any]) -> Optional[Tuple[float, float]]:
+    """Parse "plasticMoment": one value for both axes, or {"y": ..., "z": ...}."""
+    value = member.get("plasticMoment")
+    if value is None:
+        return None
+    if isinstance(value, dict):
+        capacity = (float(value.get("y", np.inf)), float(value.get("z", np.inf)))
+    else:
+        capacity = (float(value), float(value))
+    if min(capacity) <= 0:
+        raise SolverError(f"Member {member['id']} plastic moment must be positive")
+    return capacity
+
+
+def parse_unilateral(dofs: Optional[List[str]]) -> Tuple[Tuple[int, int], ...]:
+    """
+    Parse compression-only support DOFs into (component, sign) pairs.
+    
+    A DOF name (e.g. "dy") is a bearing reacting in the positive global
+    direction only; a leading "-" (e.g. "-dy") one reacting in the
+    negative direction only. The DOF is restrained while engaged.
+    """
+    if not dofs:
+        return ()
+    pairs = []
+    for name in dofs:
+        sign = -1 if name.startswith("-") else 1
+        if name.lstrip("-") not in DOF_NAMES:
+            raise SolverError(f"Invalid compression-only support DOF: {name}")
+        pairs.append((DOF_NAMES.index(name.lstrip("-")), sign))
+    return tuple(pairs)
+
+
 def parse_input(data: Dict[str, Any]) -> Tuple[List[Node], List[Member], List[Support], List[Load]]:
     """Parse JSON input into typed objects."""
     
@@ -663,20 +5137,27 @@ def parse_input(data: Dict[str, Any]) -> Tuple[List[Node], List[Member], List[Su
             Iz=float(m["Iz"]),
             G=float(m.get("G", m["E"] / 2.6)),  # Default G if not provided
             J=float(m.get("J", m["Iy"] + m["Iz"])),  # Default J if not provided
-            beta=float(m.get("beta", 0.0))
+            beta=float(m.get("beta", 0.0)),
+            releases=parse_releases(m.get("releases")),
+            only=parse_member_behaviour(m),
+            density=float(m["density"]) if "density" in m else None,
+            plastic_moment=parse_plastic_moment(m)
         ))
     
     # Parse supports
     supports = []
     for s in data.get("supports", []):
+        unilateral = parse_unilateral(s.get("compressionOnly"))
+        restrained = {component for component, _ in unilateral}
         supports.append(Support(
             node_id=s["nodeId"],
-            dx=bool(s.get("dx", False)),
-            dy=bool(s.get("dy", False)),
-            dz=bool(s.get("dz", False)),
-            rx=bool(s.get("rx", False)),
-            ry=bool(s.get("ry", False)),
-            rz=bool(s.get("rz", False))
+            dx=bool(s.get("dx", False)) or 0 in restrained,
+            dy=bool(s.get("dy", False)) or 1 in restrained,
+            dz=bool(s.get("dz", False)) or 2 in restrained,
+            rx=bool(s.get("rx", False)) or 3 in restrained,
+            ry=bool(s.get("ry", False)) or 4 in restrained,
+            rz=bool(s.get("rz", False)) or 5 in restrained,
+            unilateral=unilateral
         ))
     
     # Parse loads
@@ -689,63 +5170,565 @@ def parse_input(data: Dict[str, Any]) -> Tuple[List[Node], List[Member], List[Su
             fz=float(l.get("fz", 0)),
             mx=float(l.get("mx", 0)),
             my=float(l.get("my", 0)),
-            mz=float(l.get("mz", 0))
+            mz=float(l.get("mz", 0)),
+            case=str(l.get("case", "default"))
         ))
     
     return nodes, members, supports, loads
 
 
+def parse_constraints(data: Dict[str, Any]) -> List[Constraint]:
+    """Parse equal-DOF and rigid diaphragm constraints."""
+    constraints = []
+    for c in data.get("constraints", []):
+        constraint_type = c.get("type", "equalDof")
+        
+        if constraint_type == "diaphragm":
+            node_ids = list(c["nodeIds"])
+            master_id = c.get("masterNodeId", node_ids[0])
+            plane = c.get("plane", "xz").lower()
+            if plane not in PLANE_NORMAL_AXIS:
+                raise SolverError(f"Invalid diaphragm plane: {plane}")
+            constraints.append(Constraint(
+                type="diaphragm",
+                master_node_id=master_id,
+                slave_node_ids=[n for n in node_ids if n != master_id],
+                plane=plane
+            ))
+        elif constraint_type == "equalDof":
+            dofs = list(c.get("dofs", DOF_NAMES))
+            invalid = [d for d in dofs if d not in DOF_NAMES]
+            if invalid:
+                raise SolverError(f"Invalid constraint DOFs: {invalid}")
+            constraints.append(Constraint(
+                type="equalDof",
+                master_node_id=c["masterNodeId"],
+                slave_node_ids=list(c.get("slaveNodeIds") or [c["slaveNodeId"]]),
+                dofs=dofs
+            ))
+        else:
+            raise SolverError(f"Unknown constraint type: {constraint_type}")
+    
+    return constraints
+
+
+def parse_responses(items: List[Dict[str, Any]]) -> List[Response]:
+    """
+    Parse response definitions, e.g.
+    {"type": "displacement", "nodeId": "n5", "component": "dy"},
+    {"type": "reaction", "nodeId": "n0", "component": "fy"},
+    {"type": "memberForce", "memberId": "m3", "component": "endMomentZ"}.
+    """
+    responses = []
+    for item in items:
+        response_type = item.get("type", "displacement")
+        name = item.get("component", "dy")
+        
+        if response_type == "memberForce":
+            target_id = item.get("memberId")
+            component = member_end_component(name)
+        elif response_type in ("displacement", "reaction"):
+            target_id = item.get("nodeId")
+            names = DOF_NAMES if response_type == "displacement" else REACTION_NAMES
+            component = names.index(name) if name in names else None
+        else:
+            raise SolverError(f"Unknown response type: {response_type}")
+        
+        if target_id is None or component is None:
+            raise SolverError(f"Invalid {response_type} response: {item}")
+        responses.append(Response(
+            key=item.get("id", f"{response_type}:{target_id}:{name}"),
+            type=response_type,
+            target_id=target_id,
+            component=component
+        ))
+    
+    return responses
+
+
+def parse_moving_load(data: Dict[str, Any]) -> Optional[MovingLoad]:
+    """Parse the optional moving-load (influence line) definition."""
+    spec = data.get("movingLoad")
+    if not spec:
+        return None
+    
+    direction = spec.get("direction", "fy")
+    if direction not in REACTION_NAMES[:3]:
+        raise SolverError(f"Invalid moving load direction: {direction}")
+    if not spec.get("path"):
+        raise SolverError("Moving load path must list at least one member")
+    if not spec.get("responses"):
+        raise SolverError("Moving load needs at least one response")
+    
+    axles = [(float(a.get("offset", 0.0)), float(a["load"]))
+             for a in spec.get("axles", [{"offset": 0.0, "load": 1.0}])]
+    if any(offset < 0 for offset, _ in axles):
+        raise SolverError("Axle offsets are distances behind the lead axle and must be >= 0")
+    step = float(spec.get("step", 0.5))
+    if step <= 0:
+        raise SolverError("Moving load step must be positive")
+    
+    return MovingLoad(
+        path=list(spec["path"]),
+        responses=parse_responses(spec["responses"]),
+        axles=axles,
+        direction=REACTION_NAMES.index(direction),
+        step=step,
+        both_directions=bool(spec.get("bothDirections", True))
+    )
+
+
+def parse_time_history(data: Dict[str, Any]) -> Optional[TimeHistory]:
+    """Parse the optional time-history (Newmark) definition."""
+    spec = data.get("timeHistory")
+    if not spec:
+        return None
+    
+    dt = float(spec.get("dt", 0.0))
+    if dt <= 0:
+        raise SolverError("Time-history dt must be positive")
+    steps = int(spec["steps"]) if "steps" in spec else int(round(float(spec.get("duration", 0.0)) / dt))
+    if steps < 1:
+        raise SolverError("Time history needs steps or a duration of at least one step")
+    
+    def table(item: Dict[str, Any], values_key: str, name: str) -> Tuple[np.ndarray, np.ndarray]:
+        """(times, values) of a function given by "time" or a sampling "dt"."""
+        values = np.asarray(item.get(values_key, []), dtype=float)
+        if "time" in item:
+            times = np.asarray(item["time"], dtype=float)
+        else:
+            times = float(item.get("dt", dt)) * np.arange(len(values))
+        if not len(values) or times.shape != values.shape or np.any(np.diff(times) <= 0):
+            raise SolverError(f"Invalid {name}",
+                              f"Give increasing \"time\" (or \"dt\") and \"{values_key}\" of equal length")
+        return times, values
+    
+    load_functions = []
+    for item in spec.get("loads", []):
+        times, factors = table(item, "factor", "time-history load function")
+        load_functions.append((item.get("case"), times, factors))
+    
+    ground_motion = None
+    ground = spec.get("groundMotion")
+    if ground:
+        direction = ground.get("direction", "dx")
+        if direction not in DOF_NAMES[:3]:
+            raise SolverError(f"Invalid ground motion direction: {direction}")
+        times, acceleration = table(ground, "acceleration", "ground motion record")
+        ground_motion = (DOF_NAMES.index(direction), times, acceleration * float(ground.get("scale", 1.0)))
+    if not load_functions and ground_motion is None:
+        raise SolverError("Time history needs load functions or a ground motion")
+    
+    damping = spec.get("damping", {})
+    if "ratio" in damping:
+        frequencies = damping.get("frequencies", [])
+        if len(frequencies) != 2 or min(frequencies) <= 0:
+            raise SolverError("Rayleigh damping by ratio needs two positive frequencies (Hz)")
+        rayleigh = rayleigh_coefficients(float(damping["ratio"]), *map(float, frequencies))
+    else:
+        rayleigh = (float(damping.get("alpha", 0.0)), float(damping.get("beta", 0.0)))
+    
+    newmark = spec.get("newmark", {})
+    beta, gamma = float(newmark.get("beta", 0.25)), float(newmark.get("gamma", 0.5))
+    if beta <= 0 or gamma < 0.5:
+        raise SolverError("Newmark parameters need beta > 0 and gamma >= 0.5")
+    
+    output = spec.get("output", {})
+    every = int(output.get("every", 1))
+    if every < 1:
+        raise SolverError("Time-history output interval must be at least one step")
+    
+    return TimeHistory(
+        dt=dt,
+        steps=steps,
+        load_functions=load_functions,
+        ground_motion=ground_motion,
+        nodal_masses={str(m["nodeId"]): float(m["mass"]) for m in spec.get("masses", [])},
+        density=float(spec.get("density", 7850.0)),
+        rayleigh=rayleigh,
+        beta=beta,
+        gamma=gamma,
+        output_every=every,
+        output_nodes=list(output["nodeIds"]) if output.get("nodeIds") else None,
+        output_file=output.get("file")
+    )
+
+
+def parse_response_spectrum(data: Dict[str, Any]) -> Optional[ResponseSpectrum]:
+    """Parse the optional response-spectrum definition."""
+    spec = data.get("responseSpectrum")
+    if not spec:
+        return None
+    
+    table = spec.get("spectrum", {})
+    periods = np.asarray(table.get("period", []), dtype=float)
+    accelerations = np.asarray(table.get("acceleration", []), dtype=float) * float(table.get("scale", 1.0))
+    if not len(periods) or periods.shape != accelerations.shape or np.any(np.diff(periods) <= 0):
+        raise SolverError("Invalid response spectrum",
+                          "Give increasing \"period\" and \"acceleration\" of equal length")
+    
+    directions = []
+    for item in spec.get("directions", [{"direction": "dx"}]):
+        direction = item.get("direction")
+        if direction not in DOF_NAMES[:3]:
+            raise SolverError(f"Invalid response spectrum direction: {direction}")
+        directions.append((DOF_NAMES.index(direction), float(item.get("scale", 1.0))))
+    if not directions:
+        raise SolverError("Response spectrum needs at least one direction")
+    
+    method = spec.get("combination", "cqc")
+    if method not in MODAL_COMBINATIONS:
+        raise SolverError(f"Unknown modal combination: {method}",
+                          f"Use one of: {', '.join(MODAL_COMBINATIONS)}")
+    modes = int(spec.get("modes", 12))
+    damping = float(spec.get("damping", 0.05))
+    if modes < 1:
+        raise SolverError("Response spectrum needs at least one mode")
+    if not 0 < damping < 1:
+        raise SolverError("Modal damping ratio must be between 0 and 1")
+    
+    return ResponseSpectrum(
+        periods=periods,
+        accelerations=accelerations,
+        directions=directions,
+        nodal_masses={str(m["nodeId"]): float(m["mass"]) for m in spec.get("masses", [])},
+        modes=modes,
+        damping=damping,
+        method=method,
+        density=float(spec.get("density", 7850.0))
+    )
+
+
+def parse_pushover(data: Dict[str, Any]) -> Optional[Pushover]:
+    """Parse the optional pushover definition."""
+    spec = data.get("pushover")
+    if not spec:
+        return None
+    
+    control_dof = spec.get("controlDof", "dx")
+    if control_dof not in DOF_NAMES[:3]:
+        raise SolverError(f"Invalid pushover control DOF: {control_dof}",
+                          "The control DOF is a translation: dx, dy or dz")
+    if "controlNodeId" not in spec:
+        raise SolverError("Pushover needs a controlNodeId")
+    max_events = int(spec.get("maxEvents", 200))
+    if max_events < 1:
+        raise SolverError("Pushover needs maxEvents of at least one")
+    target = spec.get("targetDisplacement")
+    return Pushover(
+        control_node=str(spec["controlNodeId"]),
+        control_dof=DOF_NAMES.index(control_dof),
+        pattern_case=spec.get("case"),
+        gravity_case=spec.get("gravityCase"),
+        target_displacement=float(target) if target is not None else None,
+        max_events=max_events
+    )
+
+
+def parse_combinations(data: Dict[str, Any]) -> List[LoadCombination]:
+    """Parse the optional load combinations."""
+    combinations = []
+    for spec in data.get("combinations", []):
+        if not spec.get("factors"):
+            raise SolverError(f"Load combination {spec.get('id')} has no factors")
+        combinations.append(LoadCombination(
+            id=str(spec["id"]),
+            factors={case: float(factor) for case, factor in spec["factors"].items()}
+        ))
+    if len({c.id for c in combinations}) < len(combinations):
+        raise SolverError("Load combination IDs must be unique")
+    return combinations
+
+
+def parse_optimization(data: Dict[str, Any]) -> Optional[SizingProblem]:
+    """Parse the optional section-sizing problem."""
+    spec = data.get("optimization")
+    if not spec:
+        return None
+    
+    density = float(spec.get("density", 7850.0))
+    catalogue = []
+    for item in spec.get("catalogue", []):
+        name = str(item.get("name", f"S{len(catalogue) + 1}"))
+        missing = [key for key in ("A", "Iy", "Iz", "Zy", "Zz") if key not in item]
+        if missing:
+            raise SolverError(f"Catalogue section {name} is missing {', '.join(missing)}")
+        catalogue.append(Section(
+            name=name,
+            A=float(item["A"]),
+            Iy=float(item["Iy"]),
+            Iz=float(item["Iz"]),
+            J=float(item.get("J", np.nan)),
+            Zy=float(item["Zy"]),
+            Zz=float(item["Zz"]),
+            mass=float(item.get("mass", density * float(item["A"])))
+        ))
+    if not catalogue:
+        raise SolverError("Optimization needs a section catalogue")
+    catalogue.sort(key=lambda section: section.mass)
+    
+    if spec.get("groups"):
+        groups = {str(g["id"]): list(g["memberIds"]) for g in spec["groups"]}
+    else:
+        groups = {m["id"]: [m["id"]] for m in data["members"]}
+    
+    limits = spec.get("displacementLimits", [])
+    responses = parse_responses(limits)
+    if any(r.type != "displacement" for r in responses):
+        raise SolverError("Displacement limits must be displacement responses")
+    
+    return SizingProblem(
+        catalogue=catalogue,
+        groups=groups,
+        displacement_limits=[(r, abs(float(item["limit"]))) for r, item in zip(responses, limits)],
+        max_utilization=float(spec.get("maxUtilization", 1.0)),
+        yield_stress=float(spec.get("yieldStress", 355e6)),
+        max_iterations=int(spec.get("maxIterations", 30))
+    )
+
+
 # ============================================================================
 # MAIN
 # ============================================================================
 
+def parse_out_of_core(config: Dict[str, Any]) -> Optional[OutOfCoreOptions]:
+    """config.outOfCore: true, or {"scratchDir": ..., "memoryLimitMB": ...}."""
+    spec = config.get("outOfCore")
+    if not spec:
+        return None
+    if spec is True:
+        return OutOfCoreOptions()
+    options = OutOfCoreOptions(
+        scratch_dir=spec.get("scratchDir"),
+        memory_limit_mb=float(spec.get("memoryLimitMB", OutOfCoreOptions.memory_limit_mb))
+    )
+    if options.memory_limit_mb <= 0:
+        raise SolverError(f"Out-of-core memory limit must be positive, got {options.memory_limit_mb}")
+    return options
+
+
+def parse_checkpoint(input_data: Dict[str, Any]) -> Optional[Checkpoint]:
+    """config.checkpoint: {"dir": ..., "intervalSeconds": 60}, keyed to the model."""
+    config = input_data.get("config", {})
+    spec = config.get("checkpoint")
+    if not spec:
+        return None
+    if not spec.get("dir"):
+        raise SolverError("Checkpoint directory missing", "Set config.checkpoint.dir")
+    # Solver settings may change between runs; the model and its cleanup may not
+    model = {key: value for key, value in input_data.items() if key != "config"}
+    model["cleanup"] = [config.get("mergeNodes", False), config.get("mergeTolerance", 1e-6)]
+    model_hash = hashlib.sha256(json.dumps(model, sort_keys=True).encode()).hexdigest()
+    return Checkpoint(spec["dir"], model_hash,
+                      float(spec.get("intervalSeconds", CHECKPOINT_INTERVAL_SECONDS)))
+
+
+def analyze(input_data: Dict[str, Any], progress_callback: Optional[ProgressCallback] = None,
+            profile: bool = False, resume: bool = False,
+            frame_callback: Optional[FrameCallback] = None) -> Dict[str, Any]:
+    """
+    Run a full analysis in-process.
+    
+    Args:
+        input_data: Model in the input JSON format (see module docstring)
+        progress_callback: Called as (stage, progress, message) while solving
+        profile: Profile every stage even if config.profile is not set
+        resume: Continue an iterative solve from config.checkpoint
+        frame_callback: Receives time-history output frames as they are
+            computed instead of the result holding them
+    
+    Returns:
+        Result dictionary; with profiling enabled it also holds "profile"
+    
+    Raises:
+        SolverError: Invalid input or failed analysis
+    """
+    def progress(stage: str, percent: int, message: str):
+        if progress_callback is not None:
+            progress_callback(stage, percent, message)
+    
+    # Validate input
+    if not input_data.get("nodes"):
+        raise SolverError("No nodes provided in input")
+    if not input_data.get("members"):
+        raise SolverError("No members provided in input")
+    if not input_data.get("supports"):
+        raise SolverError("No supports provided in input")
+    if not (input_data.get("loads") or input_data.get("movingLoad")
+            or input_data.get("timeHistory", {}).get("groundMotion")
+            or input_data.get("responseSpectrum")):
+        raise SolverError("No loads provided in input")
+    
+    config = input_data.get("config", {})
+    checkpoint = parse_checkpoint(input_data)
+    if resume and checkpoint is None:
+        raise SolverError("Nothing to resume from", "Resuming needs config.checkpoint.dir")
+    
+    # Optional profiling: config.profile = true / {"topN": 30}
+    profile_config = config.get("profile", False)
+    profiler = None
+    if profile_config or profile:
+        top_n = profile_config.get("topN", 20) if isinstance(profile_config, dict) else 20
+        profiler = Profiler(top_n=int(top_n))
+    
+    def stage(name: str):
+        return profiler.stage(name) if profiler else contextlib.nullcontext()
+    
+    try:
+        # Optional cleanup: merge coincident nodes, drop degenerate members
+        cleanup_report = None
+        if config.get("mergeNodes", False):
+            progress("initializing", 3, "Merging coincident nodes...")
+            cleanup_start = time.perf_counter()
+            with stage("cleanup"):
+                input_data, cleanup_report = clean_model(
+                    input_data, float(config.get("mergeTolerance", 1e-6))
+                )
+            cleanup_report["timeMs"] = (time.perf_counter() - cleanup_start) * 1000
+            progress("initializing", 4,
+                f"Merged {len(cleanup_report['mergedNodes'])} nodes, "
+                f"removed {cleanup_report['membersBefore'] - cleanup_report['membersAfter']} members")
+        
+        # Parse input
+        progress("initializing", 5, "Parsing input data...")
+        with stage("parse"):
+            nodes, members, supports, loads = parse_input(input_data)
+            constraints = parse_constraints(input_data)
+            moving_load = parse_moving_load(input_data)
+            sensitivity_responses = parse_responses(input_data.get("sensitivity", {}).get("responses", []))
+            optimization = parse_optimization(input_data)
+            combinations = parse_combinations(input_data)
+            time_history = parse_time_history(input_data)
+            response_spectrum = parse_response_spectrum(input_data)
+            pushover = parse_pushover(input_data)
+        
+        progress("initializing", 8, 
+            f"Loaded {len(nodes)} nodes, {len(members)} members")
+        
+        # Create solver
+        solver = StructuralSolver(nodes, members, supports, loads, constraints,
+                                  progress_callback=progress_callback)
+        solver.profiler = profiler
+        
+        # Determine solver type
+        use_iterative = config.get("useIterative")
+        if len(nodes) > 2000:
+            use_iterative = True
+        precision = config.get("precision", "double")
+        if precision not in PRECISIONS:
+            raise SolverError(f"Unknown precision: {precision}",
+                              f"Use one of: {', '.join(PRECISIONS)}")
+        solver.precision = precision  # Also used by optimization below
+        if config.get("truss") is not None:
+            solver.truss = bool(config["truss"])
+        # Mirror symmetry only helps a single solve: the analyses below
+        # reuse a factorization of the whole model
+        solver.symmetry = bool(config.get("symmetry", True)) and not (
+            combinations or moving_load or sensitivity_responses or time_history
+            or response_spectrum or pushover)
+        # Out-of-plane moving loads and ground motions need the full 3D formulation
+        solver.planar = bool(config.get("planar", True)) and (
+            moving_load is None or moving_load.direction != 2) and (
+            time_history is None or time_history.ground_motion is None
+            or time_history.ground_motion[0] != 2) and (
+            response_spectrum is None or all(d != 2 for d, _ in response_spectrum.directions))
+        out_of_core = parse_out_of_core(config)
+        # Tension-/compression-only members and supports: config.activeSet =
+        # false analyses them as ordinary (linear) members and supports
+        active_set = bool(config.get("activeSet", True)) and (
+            any(m.only for m in members) or any(s.unilateral for s in supports))
+        if active_set and (combinations or moving_load or sensitivity_responses or optimization
+                           or time_history or response_spectrum or pushover):
+            raise SolverError("Tension-/compression-only members and supports need a nonlinear solve",
+                              "Combinations, moving loads, sensitivities, sizing, dynamic analyses "
+                              "and pushover assume a linear model; set config.activeSet = false to analyze it as linear")
+        
+        # Size sections first so the results below are for the final design
+        optimization_report = None
+        if optimization is not None:
+            with stage("optimization"):
+                optimization_report = solver.optimize_sections(optimization)
+        
+        # Solve
+        if active_set:
+            result = solver.solve_active_set(
+                max_iterations=int(config.get("activeSetIterations", ACTIVE_SET_MAX_ITERATIONS)))
+        else:
+            result = solver.solve(
+                use_iterative=use_iterative,
+                preconditioner=config.get("preconditioner", "ilu"),
+                tolerance=float(config.get("tolerance", 1e-8)),
+                max_iterations=int(config.get("maxIterations", 2000)),
+                out_of_core=out_of_core,
+                checkpoint=checkpoint,
+                resume=resume,
+                matrix_free=bool(config.get("matrixFree", False)),
+                threads=resolve_threads(config.get("threads", 1))
+            )
+        if optimization_report is not None:
+            result["optimization"] = optimization_report
+        if cleanup_report is not None:
+            result["cleanup"] = cleanup_report
+        if combinations:
+            with stage("combinations"):
+                result["combinations"] = solver.combination_analysis(combinations)
+        if moving_load is not None:
+            with stage("movingLoad"):
+                result["movingLoad"] = solver.moving_load_analysis(moving_load)
+        if sensitivity_responses:
+            with stage("sensitivity"):
+                result["sensitivities"] = solver.sensitivity_analysis(sensitivity_responses)
+        if time_history is not None:
+            with stage("timeHistory"):
+                result["timeHistory"] = solver.time_history_analysis(time_history, frame_callback)
+        if response_spectrum is not None:
+            with stage("responseSpectrum"):
+                result["responseSpectrum"] = solver.response_spectrum_analysis(response_spectrum)
+        if pushover is not None:
+            with stage("pushover"):
+                result["pushover"] = solver.pushover_analysis(pushover)
+    finally:
+        profile_report = profiler.report() if profiler is not None else None
+    
+    if profile_report is not None:
+        result["profile"] = profile_report
+    return result
+
+
 def main():
     """Main entry point."""
     # Parse command line arguments
-    if len(sys.argv) < 2 and sys.stdin.isatty():
-        print("Usage: python solver.py <input.json>", file=sys.stderr)
-        print("       python solver.py --stdin < input.json", file=sys.stderr)
+    flags = {"--profile", "--resume"}
+    args = [arg for arg in sys.argv[1:] if arg not in flags]
+    if not args and sys.stdin.isatty():
+        print("Usage: python solver.py [--profile] [--resume] <input.json>", file=sys.stderr)
+        print("       python solver.py [--profile] [--resume] --stdin < input.json", file=sys.stderr)
         sys.exit(1)
     
     # Read input
     try:
-        if len(sys.argv) >= 2 and sys.argv[1] != "--stdin":
-            with open(sys.argv[1], 'r') as f:
+        if args and args[0] != "--stdin":
+            with open(args[0], 'r') as f:
                 input_data = json.load(f)
         else:
             input_data = json.load(sys.stdin)
     except json.JSONDecodeError as e:
         report_error(f"Invalid JSON input: {str(e)}")
     except FileNotFoundError:
-        report_error(f"Input file not found: {sys.argv[1]}")
-    
-    # Validate input
-    if not input_data.get("nodes"):
-        report_error("No nodes provided in input")
-    if not input_data.get("members"):
-        report_error("No members provided in input")
-    if not input_data.get("supports"):
-        report_error("No supports provided in input")
-    if not input_data.get("loads"):
-        report_error("No loads provided in input")
+        report_error(f"Input file not found: {args[0]}")
     
-    # Parse input
-    report_progress("initializing", 5, "Parsing input data...")
-    nodes, members, supports, loads = parse_input(input_data)
-    
-    report_progress("initializing", 8, 
-        f"Loaded {len(nodes)} nodes, {len(members)} members")
-    
-    # Create solver
-    solver = StructuralSolver(nodes, members, supports, loads)
-    
-    # Determine solver type
-    use_iterative = input_data.get("config", {}).get("useIterative", False)
-    if len(nodes) > 2000:
-        use_iterative = True
+    try:
+        result = analyze(input_data, progress_callback=report_progress,
+                         profile="--profile" in sys.argv[1:],
+                         resume="--resume" in sys.argv[1:],
+                         frame_callback=report_frame)
+    except SolverError as e:
+        report_error(e.error, e.details)
     
-    # Solve
-    result = solver.solve(use_iterative=use_iterative)
+    # Profile report goes out as its own message, ahead of the result
+    profile_report = result.pop("profile", None)
+    if profile_report is not None:
+        print(json.dumps({"type": "profile", "data": profile_report}), flush=True)
     
     # Output result
     print(json.dumps({"type": "result", "data": result}))
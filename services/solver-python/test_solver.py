@@ -6,12 +6,18 @@ Usage:
     python test_solver.py
 """
 
+import contextlib
+import csv
+import io
 import json
 import subprocess
 import sys
+import tempfile
 import time
 from pathlib import Path
 
+import numpy as np
+
 
 def run_test(input_file: str, description: str) -> bool:
     """Run solver on input file and validate output."""
@@ -166,6 +172,1145 @@ def run_stress_test(num_nodes: int) -> bool:
     return run_test(temp_file, f'{num_nodes} nodes stress test')
 
 
+def solve_model(model: dict, name: str) -> dict:
+    """Run the solver on an in-memory model and return the result data."""
+    temp_file = f'/tmp/beamlab_{name}.json'
+    with open(temp_file, 'w') as f:
+        json.dump(model, f)
+    
+    result = subprocess.run(
+        ['python3', 'solver.py', temp_file],
+        capture_output=True,
+        text=True,
+        timeout=60
+    )
+    
+    for line in result.stdout.strip().split('\n'):
+        try:
+            msg = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        if msg.get('type') == 'result':
+            return msg['data']
+        if msg.get('type') == 'error':
+            raise RuntimeError(msg['data'].get('error'))
+    
+    raise RuntimeError(f"No result found in output: {result.stderr}")
+
+
+def build_solver(model: dict):
+    """Build a StructuralSolver in-process for library-level checks."""
+    import solver
+    nodes, members, supports, loads = solver.parse_input(model)
+    return solver.StructuralSolver(nodes, members, supports, loads,
+                                   solver.parse_constraints(model))
+
+
+def run_feature_test(description: str, check) -> bool:
+    """Run a feature check that raises AssertionError on failure."""
+    print(f"\n{'='*60}")
+    print(f"Feature Test: {description}")
+    print('='*60)
+    
+    try:
+        check()
+        print("✅ SUCCESS")
+        return True
+    except Exception as e:
+        print(f"❌ FAILED: {e}")
+        return False
+
+
+def check_node_merging():
+    """Two stitched cantilever halves must behave like one continuous beam."""
+    reference = generate_large_model(11)
+    reference['loads'] = [{'nodeId': 'n10', 'fy': -10000}]
+    
+    stitched = json.loads(json.dumps(reference))
+    # Duplicate n5 and attach the second half to the copy
+    stitched['nodes'].append({'id': 'n5b', 'x': 10.0 + 1e-9, 'y': 0.0, 'z': 0.0})
+    stitched['members'][5]['startNodeId'] = 'n5b'
+    # Duplicate and zero-length members that cleanup must drop
+    stitched['members'].append(dict(stitched['members'][0], id='dup'))
+    stitched['members'].append(dict(stitched['members'][0], id='zero', endNodeId='n0'))
+    stitched['config'] = {'mergeNodes': True, 'mergeTolerance': 1e-6}
+    
+    expected = solve_model(reference, 'merge_reference')
+    merged = solve_model(stitched, 'merge_stitched')
+    
+    cleanup = merged['cleanup']
+    assert cleanup['mergedNodes'] == {'n5b': 'n5'}, cleanup['mergedNodes']
+    assert cleanup['removedMembers'] == {'zeroLength': ['zero'], 'duplicate': ['dup']}
+    
+    tip = merged['nodalDisplacements']['n10']['dy']
+    tip_expected = expected['nodalDisplacements']['n10']['dy']
+    assert abs(tip - tip_expected) <= 1e-9 * abs(tip_expected), (tip, tip_expected)
+    print(f"  Tip deflection: {tip:.6e} (continuous beam: {tip_expected:.6e})")
+
+
+def check_rigid_diaphragm():
+    """Two equal cantilever columns tied by a diaphragm share a lateral load."""
+    E, Iz, L, P = 200e9, 1e-4, 3.0, 10000.0
+    section = {'E': E, 'A': 0.01, 'Iy': 1e-4, 'Iz': Iz, 'G': 80e9, 'J': 1.5e-4}
+    fixed = {'dx': True, 'dy': True, 'dz': True, 'rx': True, 'ry': True, 'rz': True}
+    model = {
+        'nodes': [
+            {'id': 'b1', 'x': 0, 'y': 0, 'z': 0}, {'id': 't1', 'x': 0, 'y': L, 'z': 0},
+            {'id': 'b2', 'x': 4, 'y': 0, 'z': 0}, {'id': 't2', 'x': 4, 'y': L, 'z': 0},
+        ],
+        'members': [
+            dict(section, id='c1', startNodeId='b1', endNodeId='t1'),
+            dict(section, id='c2', startNodeId='b2', endNodeId='t2'),
+        ],
+        'supports': [dict(fixed, nodeId='b1'), dict(fixed, nodeId='b2')],
+        'loads': [{'nodeId': 't1', 'fx': P}],
+        'constraints': [{'type': 'diaphragm', 'nodeIds': ['t1', 't2'], 'plane': 'xz'}],
+    }
+    
+    result = solve_model(model, 'diaphragm')
+    
+    expected = (P / 2) * L**3 / (3 * E * Iz)
+    for node_id in ('t1', 't2'):
+        dx = result['nodalDisplacements'][node_id]['dx']
+        assert abs(dx - expected) <= 1e-9 * expected, (node_id, dx, expected)
+    base_shear = result['nodalReactions']['b1']['fx'] + result['nodalReactions']['b2']['fx']
+    assert abs(base_shear + P) <= 1e-6 * P, base_shear
+    assert result['solverInfo']['eliminatedDofs'] == 3
+    print(f"  Roof drift: {expected:.6e}, eliminated DOFs: 3")
+
+
+def check_member_releases():
+    """Moment releases: hinged beam and a pin-jointed two-bar truss."""
+    E, A, Iz, L, P = 200e9, 0.01, 1e-4, 4.0, 10000.0
+    section = {'E': E, 'A': A, 'Iy': 1e-4, 'Iz': Iz, 'G': 80e9, 'J': 1.5e-4}
+    fixed = {'dx': True, 'dy': True, 'dz': True, 'rx': True, 'ry': True, 'rz': True}
+    
+    # Fixed-fixed beam hinged at midspan: two cantilevers sharing the load
+    beam = {
+        'nodes': [{'id': f'n{i}', 'x': i * L, 'y': 0, 'z': 0} for i in range(3)],
+        'members': [
+            dict(section, id='m1', startNodeId='n0', endNodeId='n1'),
+            dict(section, id='m2', startNodeId='n1', endNodeId='n2',
+                 releases={'startMomentZ': True}),
+        ],
+        'supports': [dict(fixed, nodeId='n0'), dict(fixed, nodeId='n2')],
+        'loads': [{'nodeId': 'n1', 'fy': -P}],
+    }
+    result = solve_model(beam, 'hinged_beam')
+    dy = result['nodalDisplacements']['n1']['dy']
+    expected = -P * L**3 / (6 * E * Iz)
+    assert abs(dy - expected) <= 1e-9 * abs(expected), (dy, expected)
+    print(f"  Hinged beam deflection: {dy:.6e}")
+    
+    # Two-bar truss: pinned everywhere, node rotations carry no stiffness
+    pinned = {'startMomentY': True, 'startMomentZ': True, 'startTorsion': True,
+              'endMomentY': True, 'endMomentZ': True}
+    truss = {
+        'nodes': [
+            {'id': 'a', 'x': 0, 'y': 0, 'z': 0},
+            {'id': 'b', 'x': 6, 'y': 0, 'z': 0},
+            {'id': 'c', 'x': 3, 'y': 4, 'z': 0},
+        ],
+        'members': [
+            dict(section, id='ac', startNodeId='a', endNodeId='c', releases=pinned),
+            dict(section, id='bc', startNodeId='b', endNodeId='c', releases=pinned),
+        ],
+        'supports': [dict(fixed, nodeId='a'), dict(fixed, nodeId='b'),
+                     {'nodeId': 'c', 'dz': True}],
+        'loads': [{'nodeId': 'c', 'fy': -P}],
+    }
+    result = solve_model(truss, 'pinned_truss')
+    dy = result['nodalDisplacements']['c']['dy']
+    sin = 4 / 5
+    expected = -P * 5.0 / (2 * E * A * sin**2)
+    assert abs(dy - expected) <= 1e-9 * abs(expected), (dy, expected)
+    assert result['solverInfo']['inactiveDofs'] == 3
+    
+    # Out-of-core reduction drops the same inactive DOFs
+    result = solve_model(dict(truss, config={'outOfCore': True, 'tolerance': 1e-12}), 'pinned_truss_ooc')
+    assert result['solverInfo']['inactiveDofs'] == 3, result['solverInfo']
+    assert abs(result['nodalDisplacements']['c']['dy'] - expected) <= 1e-9 * abs(expected)
+    print(f"  Truss apex deflection: {dy:.6e}")
+
+
+def check_moving_load():
+    """Influence lines of a simply supported beam against closed forms."""
+    E, Iz, L = 200e9, 1e-4, 10.0
+    section = {'E': E, 'A': 0.01, 'Iy': 1e-4, 'Iz': Iz, 'G': 80e9, 'J': 1.5e-4}
+    model = {
+        'nodes': [{'id': 'a', 'x': 0, 'y': 0, 'z': 0}, {'id': 'c', 'x': L / 2, 'y': 0, 'z': 0},
+                  {'id': 'b', 'x': L, 'y': 0, 'z': 0}],
+        # Second member reversed: the path must orient it along the travel
+        'members': [dict(section, id='m1', startNodeId='a', endNodeId='c'),
+                    dict(section, id='m2', startNodeId='b', endNodeId='c')],
+        'supports': [{'nodeId': 'a', 'dx': True, 'dy': True, 'dz': True, 'rx': True},
+                     {'nodeId': 'b', 'dy': True, 'dz': True}],
+        'movingLoad': {
+            'path': ['m1', 'm2'],
+            'step': 0.25,
+            'axles': [{'offset': 0, 'load': -1}, {'offset': 2, 'load': -1}],
+            'responses': [
+                {'type': 'reaction', 'nodeId': 'a', 'component': 'fy'},
+                {'type': 'displacement', 'nodeId': 'c', 'component': 'dy'},
+                {'type': 'memberForce', 'memberId': 'm1', 'component': 'endMomentZ'},
+            ],
+        },
+    }
+    
+    result = solve_model(model, 'moving_load')['movingLoad']
+    x = np.array(result['stations'])
+    lines = {key: np.array(values) for key, values in result['influenceLines'].items()}
+    near = np.minimum(x, L - x)
+    
+    assert result['loadPositions'] == 41, result['loadPositions']
+    assert abs(lines['reaction:a:fy'] + (1 - x / L)).max() < 1e-12
+    deflection = near * (3 * L**2 - 4 * near**2) / (48 * E * Iz)
+    assert abs(lines['displacement:c:dy'] - deflection).max() < 1e-9 * deflection.max()
+    assert abs(abs(lines['memberForce:m1:endMomentZ']) - near / 2).max() < 1e-12
+    
+    # Two unit axles 2 m apart: peak reaction with both near the support
+    envelope = result['envelopes']['reaction:a:fy']
+    assert abs(envelope['max'] - (2 - 2 / L)) < 1e-12, envelope
+    print(f"  {result['loadPositions']} load positions ({result['method']}), "
+          f"peak reaction {envelope['max']:.3f}")
+
+
+def check_adjoint_sensitivity():
+    """Adjoint sensitivities of a released, constrained frame match central differences."""
+    section = {'E': 200e9, 'A': 0.01, 'Iy': 2e-4, 'Iz': 1e-4, 'G': 80e9, 'J': 1.5e-4}
+    fixed = {'dx': True, 'dy': True, 'dz': True, 'rx': True, 'ry': True, 'rz': True}
+    model = {
+        'nodes': [{'id': 'a', 'x': 0, 'y': 0, 'z': 0}, {'id': 'b', 'x': 0, 'y': 3, 'z': 0},
+                  {'id': 'c', 'x': 5, 'y': 3, 'z': 1}, {'id': 'd', 'x': 5, 'y': 0, 'z': 1}],
+        'members': [
+            dict(section, id='c1', startNodeId='a', endNodeId='b'),
+            dict(section, id='bm', startNodeId='b', endNodeId='c', beta=0.4,
+                 releases={'endMomentZ': True}),
+            dict(section, id='c2', startNodeId='d', endNodeId='c', Iz=3e-4),
+        ],
+        'supports': [dict(fixed, nodeId='a'), dict(fixed, nodeId='d')],
+        'loads': [{'nodeId': 'b', 'fx': 10000, 'fz': 3000}, {'nodeId': 'c', 'fy': -20000}],
+        'constraints': [{'type': 'equalDof', 'masterNodeId': 'b', 'slaveNodeId': 'c', 'dofs': ['dx']}],
+        'sensitivity': {'responses': [
+            {'type': 'displacement', 'nodeId': 'c', 'component': 'dx'},
+            {'type': 'reaction', 'nodeId': 'a', 'component': 'mz'},
+            {'type': 'memberForce', 'memberId': 'bm', 'component': 'startMomentZ'},
+        ]},
+    }
+    
+    result = solve_model(model, 'sensitivity')['sensitivities']
+    keys = list(result['responses'])
+    
+    for member_id, prop in (('bm', 'Iz'), ('c1', 'A')):
+        column = result['memberIds'].index(member_id)
+        member = next(m for m in model['members'] if m['id'] == member_id)
+        value = member[prop]
+        step = value * 1e-3
+        perturbed = []
+        for sign in (1, -1):
+            member[prop] = value + sign * step
+            data = solve_model(model, 'sensitivity_fd')['sensitivities']['responses']
+            perturbed.append(np.array([data[k]['value'] for k in keys]))
+        member[prop] = value
+        
+        central = (perturbed[0] - perturbed[1]) / (2 * step)
+        adjoint = np.array([result['responses'][k][prop][column] for k in keys])
+        error = abs(central - adjoint).max() / abs(central).max()
+        assert error < 1e-5, (member_id, prop, central, adjoint)
+        print(f"  d/d{prop}({member_id}): relative error vs central differences {error:.1e}")
+
+
+def generate_grid_model(nx: int, nz: int, storeys: int = 1) -> dict:
+    """Generate a multi-storey grid frame with fixed column bases."""
+    section = {'E': 200e9, 'A': 0.01, 'Iy': 1e-4, 'Iz': 1e-4, 'G': 80e9, 'J': 1.5e-4}
+    nodes, members = [], []
+    for level in range(storeys + 1):
+        for i in range(nx):
+            for k in range(nz):
+                nodes.append({'id': f'n{level}_{i}_{k}', 'x': 4.0 * i, 'y': 3.0 * level, 'z': 4.0 * k})
+                if level > 0:
+                    members.append(dict(section, id=f'c{level}_{i}_{k}',
+                                        startNodeId=f'n{level - 1}_{i}_{k}', endNodeId=f'n{level}_{i}_{k}'))
+                    if i > 0:
+                        members.append(dict(section, id=f'bx{level}_{i}_{k}',
+                                            startNodeId=f'n{level}_{i - 1}_{k}', endNodeId=f'n{level}_{i}_{k}'))
+                    if k > 0:
+                        members.append(dict(section, id=f'bz{level}_{i}_{k}',
+                                            startNodeId=f'n{level}_{i}_{k - 1}', endNodeId=f'n{level}_{i}_{k}'))
+    fixed = {'dx': True, 'dy': True, 'dz': True, 'rx': True, 'ry': True, 'rz': True}
+    supports = [dict(fixed, nodeId=f'n0_{i}_{k}') for i in range(nx) for k in range(nz)]
+    loads = [{'nodeId': f'n{storeys}_{i}_{k}', 'fx': 5000.0, 'fy': -20000.0}
+             for i in range(nx) for k in range(nz)]
+    return {'nodes': nodes, 'members': members, 'supports': supports, 'loads': loads}
+
+
+def check_section_sizing():
+    """Sizing a frame meets its drift and utilization limits."""
+    model = generate_grid_model(6, 6, storeys=3)
+    for load in model['loads']:
+        load['fx'] *= 4
+        load['fy'] *= 20
+    catalogue = []
+    for i in range(12):
+        A, I = 4e-3 * 1.25**i, 2e-5 * 1.25**(2 * i)
+        catalogue.append({'name': f'S{i}', 'A': A, 'Iy': I, 'Iz': I, 'J': I / 2,
+                          'Zy': I / 0.15, 'Zz': I / 0.15})
+    groups = {}
+    for member in model['members']:
+        kind = 'columns' if member['id'].startswith('c') else 'beams'
+        storey = member['id'][1 if kind == 'columns' else 2]
+        groups.setdefault(f'{kind}{storey}', []).append(member['id'])
+    drift_limit = 9.0 / 400
+    model['optimization'] = {
+        'catalogue': catalogue,
+        'groups': [{'id': group_id, 'memberIds': ids} for group_id, ids in groups.items()],
+        'displacementLimits': [{'nodeId': 'n3_5_5', 'component': 'dx', 'limit': drift_limit}],
+        'maxUtilization': 0.9,
+    }
+    
+    result = solve_model(model, 'sizing')
+    report = result['optimization']
+    assert report['converged'] and report['feasible'], report['history']
+    final = report['history'][-1]
+    assert final['maxUtilization'] <= 0.9 and final['maxDisplacementRatio'] <= 1.0, final
+    # Static results are for the sized design
+    drift = result['nodalDisplacements']['n3_5_5']['dx']
+    assert abs(drift) <= drift_limit * (1 + 1e-9), drift
+    lightest = report['history'][0]['weight']
+    
+    # A plane frame is sized with plane-frame elements, to the same design
+    import solver
+    plane_model = generate_grid_model(6, 1, storeys=3)
+    plane_model['optimization'] = dict(model['optimization'], groups=[
+        {'id': kind, 'memberIds': [m['id'] for m in plane_model['members'] if m['id'][0] == kind]}
+        for kind in 'cb'], displacementLimits=[{'nodeId': 'n3_5_0', 'component': 'dx', 'limit': drift_limit}])
+    problem = solver.parse_optimization(plane_model)
+    plane, frame = build_solver(plane_model), build_solver(plane_model)
+    frame.planar = False
+    plane_report, frame_report = plane.optimize_sections(problem), frame.optimize_sections(problem)
+    assert plane_report['sections'] == frame_report['sections'], plane_report['sections']
+    assert plane.system.K.nnz < frame.system.K.nnz / 2, (plane.system.K.nnz, frame.system.K.nnz)
+    print(f"  {report['iterations']} iterations, weight {lightest:.0f} -> {report['weight']:.0f}, "
+          f"drift {drift / drift_limit:.3f} of limit")
+
+
+def check_profiling():
+    """--profile emits a per-stage profile message ahead of the result."""
+    model = generate_large_model(200)
+    model['config'] = {'profile': {'topN': 5}}
+    input_file = Path('/tmp/beamlab_profile.json')
+    input_file.write_text(json.dumps(model))
+    
+    output = subprocess.run(['python3', 'solver.py', '--profile', str(input_file)],
+                            capture_output=True, text=True, timeout=120)
+    types = [json.loads(line)['type'] for line in output.stdout.splitlines() if line.startswith('{')]
+    assert types[-2:] == ['profile', 'result'], types
+    
+    messages = [json.loads(line) for line in output.stdout.splitlines() if line.startswith('{')]
+    profile, result = messages[-2]['data'], messages[-1]['data']
+    for stage in ('parse', 'assembly', 'boundary_conditions', 'solve', 'postprocessing'):
+        assert stage in profile['stages'], list(profile['stages'])
+        assert len(profile['stages'][stage]['functions']) <= 5
+    assert abs(profile['stages']['assembly']['wallMs'] - result['timing']['assembly']) < 1.0
+    assert profile['functions'] and profile['stages']['assembly']['tracedPeakMB'] > 0
+    
+    # Profiled runs overlapping in threads (as in a server thread pool) both finish
+    import solver
+    import threading
+    import tracemalloc
+    from concurrent.futures import ThreadPoolExecutor
+    large_started = threading.Event()
+    
+    def profiled(size, progress_callback=None):
+        return solver.analyze(dict(generate_large_model(size), config={'profile': True}),
+                              progress_callback=progress_callback)
+    
+    with contextlib.redirect_stdout(io.StringIO()), ThreadPoolExecutor(2) as pool:
+        large = pool.submit(profiled, 3000, lambda *update: large_started.set())
+        large_started.wait(60)
+        small = pool.submit(profiled, 200)
+        for run in (large, small):
+            assert run.result(timeout=300)['profile']['stages']['solve']['wallMs'] > 0
+    assert not tracemalloc.is_tracing()
+    
+    # Tracing started by someone else is left running
+    tracemalloc.start()
+    with contextlib.redirect_stdout(io.StringIO()):
+        profiled(200)
+    assert tracemalloc.is_tracing()
+    tracemalloc.stop()
+    print(f"  Stages: {', '.join(profile['stages'])}")
+
+
+def check_library_api():
+    """analyze() runs in-process: progress via callback, errors as SolverError."""
+    import solver
+    model = generate_large_model(200)
+    expected = solve_model(model, 'library')
+    
+    updates = []
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        result = solver.analyze(model, progress_callback=lambda *update: updates.append(update))
+        try:
+            solver.analyze(dict(model, supports=[]))
+            raise AssertionError("Model without supports was accepted")
+        except solver.SolverError as e:
+            assert e.error == "No supports provided in input", e.error
+        
+        # A load on a DOF with no stiffness surfaces the details too
+        released = dict(model, loads=model['loads'] + [{'nodeId': 'extra', 'fy': -1.0}],
+                        nodes=model['nodes'] + [{'id': 'extra', 'x': 1e3, 'y': 0, 'z': 0}])
+        try:
+            solver.analyze(released)
+            raise AssertionError("Load on a free-floating node was accepted")
+        except solver.SolverError as e:
+            assert e.details, e.error
+    
+    assert output.getvalue() == "", output.getvalue()[:200]
+    assert updates[0][0] == 'initializing' and updates[-1][1] == 100, updates
+    assert np.allclose(result['displacements'], expected['displacements'], rtol=1e-9, atol=1e-15)
+    print(f"  {len(updates)} progress callbacks, no stdout output")
+
+
+def check_mixed_precision():
+    """Float32 factors refined in float64 match the double-precision solve."""
+    import solver
+    model = generate_grid_model(12, 12, storeys=3)
+    double = build_solver(model).solve(use_iterative=False)
+    mixed_solver = build_solver(model)
+    mixed = mixed_solver.solve(use_iterative=False, precision='mixed')
+    info = mixed['solverInfo']
+    assert info['method'] == 'direct-superlu-mixed', info
+    assert info['relativeResidual'] <= solver.REFINEMENT_TOLERANCE, info
+    assert info['factorMB'] < double['solverInfo']['factorMB'], (info, double['solverInfo'])
+    
+    expected = np.array(double['displacements'])
+    error = abs(np.array(mixed['displacements']) - expected).max() / abs(expected).max()
+    assert error < 1e-10, error
+    
+    # Refinement that cannot reach its tolerance falls back to float64
+    system = mixed_solver.system
+    lu = solver.MixedPrecisionLU(system.K_reduced, tolerance=1e-30)
+    u = lu.solve(system.F_reduced)
+    assert lu.fallback is not None and 'stalled' in lu.fallback_reason, lu.fallback_reason
+    assert abs(u - mixed_solver.u_reduced).max() / abs(u).max() < 1e-10
+    print(f"  {info['refinementSteps']} refinement steps, residual {info['relativeResidual']:.1e}, "
+          f"factors {info['factorMB']:.1f} MB vs {double['solverInfo']['factorMB']:.1f} MB")
+
+
+def check_out_of_core():
+    """Out-of-core CG on memory-mapped blocks matches the in-memory solve."""
+    import solver
+    model = generate_grid_model(8, 8, storeys=3)
+    for level in range(1, 4):
+        model['constraints'] = model.get('constraints', []) + [{
+            'type': 'diaphragm', 'plane': 'xz',
+            'nodeIds': [f'n{level}_{i}_{k}' for i in range(8) for k in range(8)]}]
+    # Hinged beam ends around one top-storey node
+    for member in model['members']:
+        if member['id'] in ('bx3_4_4', 'bx3_5_4', 'bz3_4_4', 'bz3_4_5'):
+            side = 'end' if member['id'] in ('bx3_4_4', 'bz3_4_4') else 'start'
+            member['releases'] = {f'{side}MomentY': True, f'{side}MomentZ': True}
+    
+    expected = solver.analyze(model)
+    with tempfile.TemporaryDirectory() as scratch_dir:
+        model['config'] = {'outOfCore': {'scratchDir': scratch_dir, 'memoryLimitMB': 1},
+                           'tolerance': 1e-12, 'maxIterations': 20000}
+        result = solver.analyze(model)
+        assert not list(Path(scratch_dir).iterdir()), "Scratch files left behind"
+    
+    info = result['solverInfo']
+    assert info['method'] == 'out-of-core-cg' and info['converged'], info
+    assert info['blocks'] > 1 and info['scratchMB'] > 0, info
+    assert info['eliminatedDofs'] == expected['solverInfo']['eliminatedDofs'], info
+    for key in ('displacements', 'reactions'):
+        u, u_expected = np.array(result[key]), np.array(expected[key])
+        error = abs(u - u_expected).max() / abs(u_expected).max()
+        assert error < 1e-9, (key, error)
+    print(f"  {info['iterations']} iterations over {info['blocks']} blocks, "
+          f"{info['scratchMB']:.1f} MB scratch")
+
+
+def check_checkpoint_resume():
+    """An interrupted CG solve resumes from its checkpoint with --resume."""
+    model = generate_grid_model(10, 10, storeys=3)
+    expected = solve_model(dict(model, config={'useIterative': False}), 'checkpoint_direct')
+    
+    with tempfile.TemporaryDirectory() as checkpoint_dir:
+        checkpoint = {'dir': checkpoint_dir, 'intervalSeconds': 0}
+        solver_dir = Path(checkpoint_dir) / 'beamlab-checkpoint'
+        unrelated = Path(checkpoint_dir) / 'unrelated.txt'
+        unrelated.write_text('not the solver\'s')
+        config = {'useIterative': True, 'preconditioner': 'jacobi', 'tolerance': 1e-12,
+                  'checkpoint': checkpoint}
+        # Stopped early, as if killed: the system and the last iterate are on disk
+        partial = solve_model(dict(model, config=dict(config, maxIterations=40)), 'checkpoint')
+        assert not partial['solverInfo']['converged'], partial['solverInfo']
+        saved = json.loads((solver_dir / 'meta.json').read_text())
+        assert saved['iterations'] == 40 and saved['preconditioner'] == 'jacobi', saved
+        
+        input_file = Path('/tmp/beamlab_checkpoint.json')
+        input_file.write_text(json.dumps(dict(model, config=dict(config, maxIterations=5000))))
+        output = subprocess.run(['python3', 'solver.py', '--resume', str(input_file)],
+                                capture_output=True, text=True, timeout=120)
+        messages = [json.loads(line) for line in output.stdout.splitlines() if line.startswith('{')]
+        result = messages[-1]['data']
+        info = result['solverInfo']
+        assert info['converged'] and info['resumedFromIteration'] == 40, info
+        assert 'assembly' not in result['timing'], result['timing']
+        u, u_expected = np.array(result['displacements']), np.array(expected['displacements'])
+        assert abs(u - u_expected).max() / abs(u_expected).max() < 1e-9
+        assert not solver_dir.exists(), "Checkpoint kept after convergence"
+        assert unrelated.exists(), "Clearing the checkpoint removed a file it did not write"
+        
+        # A checkpoint never resumes a different model
+        solve_model(dict(model, config=dict(config, maxIterations=5)), 'checkpoint')
+        changed = dict(model, loads=model['loads'][1:], config=dict(config, maxIterations=5000))
+        input_file.write_text(json.dumps(changed))
+        output = subprocess.run(['python3', 'solver.py', '--resume', str(input_file)],
+                                capture_output=True, text=True, timeout=120)
+        error = json.loads(output.stdout.splitlines()[-1])
+        assert error['type'] == 'error' and 'different model' in error['data']['error'], error
+    print(f"  Resumed at iteration 40, converged after {info['iterations']}")
+
+
+def check_load_combinations():
+    """Combinations by superposition match solving each factored load set."""
+    import solver
+    model = generate_grid_model(5, 5, storeys=2)
+    dead = [dict(load, fx=0.0, case='dead') for load in model['loads']]
+    live = [{'nodeId': f'n1_{i}_2', 'fy': -8000.0, 'case': 'live'} for i in range(5)]
+    wind = [{'nodeId': f'n2_0_{k}', 'fx': 6000.0, 'fz': 1500.0, 'case': 'wind'} for k in range(5)]
+    model['loads'] = dead + live + wind
+    factors = {
+        'ULS1': {'dead': 1.35, 'live': 1.5},
+        'ULS2': {'dead': 1.0, 'wind': 1.5},
+        'ULS3': {'dead': 1.2, 'live': 1.2, 'wind': -1.2},
+        'SLS': {'dead': 1.0, 'live': 1.0},
+    }
+    model['combinations'] = [{'id': key, 'factors': value} for key, value in factors.items()]
+    result = solver.analyze(model)['combinations']
+    assert result['cases'] == ['dead', 'live', 'wind'], result['cases']
+    
+    for combination_id, combination in factors.items():
+        loads = [dict(load, **{c: load.get(c, 0.0) * combination.get(load['case'], 0.0)
+                               for c in ('fx', 'fy', 'fz')}) for load in model['loads']]
+        reference = build_solver(dict(model, loads=loads))
+        expected = reference.solve()
+        forces = reference._member_end_forces(np.array(expected['displacements']))
+        got = result['results'][combination_id]
+        for key in ('displacements', 'reactions'):
+            error = abs(np.array(got[key]) - np.array(expected[key])).max()
+            assert error <= 1e-9 * abs(np.array(expected[key])).max(), (combination_id, key, error)
+        got_forces = np.array([got['memberForces'][m['id']] for m in model['members']])
+        assert abs(got_forces - forces).max() <= 1e-9 * abs(forces).max(), combination_id
+    
+    # Envelopes are the extremes over the combinations
+    ids = list(factors)
+    dy = np.array([result['results'][k]['displacements'][6 * 25 + 1] for k in ids])
+    envelope = result['envelopes']['nodalDisplacements']['n1_0_0']
+    assert envelope['dy']['min'] == dy.min() and envelope['dy']['minCombination'] == ids[dy.argmin()]
+    moments = [result['results'][k]['memberForces']['c1_2_2'][5] for k in ids]
+    assert result['envelopes']['memberForces']['c1_2_2']['startMomentZ']['max'] == max(moments)
+    assert set(result['envelopes']['nodalReactions']) == {f'n0_{i}_{k}' for i in range(5) for k in range(5)}
+    print(f"  {len(ids)} combinations of {len(result['cases'])} cases in {result['timeMs']:.1f}ms")
+
+
+def check_element_cache():
+    """Deduplicated element stiffness matches per-member computation and reports hits."""
+    import solver
+    model = generate_grid_model(6, 6, storeys=3)
+    model['members'][0]['releases'] = {'endMomentZ': True}
+    model['members'][1]['Iz'] *= 2
+    s = build_solver(model)
+    result = s.solve()
+    elements = s._get_elements()
+    direct = solver.transform_to_global(
+        s._local_element_stiffness(elements, slice(None)), elements.R)
+    assert np.array_equal(s._element_stiffness(elements, slice(None)), direct)
+    
+    stats = result['matrixStats']['elementCache']
+    assert stats['elements'] == len(model['members']), stats
+    assert stats['unique'] == 5, stats  # columns, x and z beams, released, stiffened
+    assert stats['hitRate'] > 0.9, stats
+    print(f"  {stats['unique']} unique of {stats['elements']} elements "
+          f"({100 * stats['hitRate']:.1f}% hits)")
+
+
+def check_truss_fast_path():
+    """Pin-jointed models use axial truss elements with the frame results."""
+    # Triangular-prism space truss: braced cross-sections, chords and face diagonals
+    corners = {'a': (0.0, -1.0), 'b': (0.0, 1.0), 'c': (2.0, 0.0)}
+    section = {'E': 200e9, 'A': 0.004, 'Iy': 2e-5, 'Iz': 3e-5, 'G': 80e9, 'J': 1e-5}
+    nodes, members = [], []
+    for i in range(11):
+        nodes += [{'id': f'{c}{i}', 'x': 2.0 * i, 'y': y, 'z': z} for c, (y, z) in corners.items()]
+        members += [dict(section, id=f'{p}{q}{i}', startNodeId=f'{p}{i}', endNodeId=f'{q}{i}')
+                    for p, q in ('ab', 'bc', 'ca')]
+        if i < 10:
+            members += [dict(section, id=f'{c}{i}-{i+1}', startNodeId=f'{c}{i}', endNodeId=f'{c}{i+1}')
+                        for c in corners]
+            members += [dict(section, id=f'{p}{i}{q}{i+1}', startNodeId=f'{p}{i}', endNodeId=f'{q}{i+1}')
+                        for p, q in ('ab', 'bc', 'ca')]
+    pinned = {'dx': True, 'dy': True, 'dz': True, 'rx': False, 'ry': False, 'rz': False}
+    model = {
+        'nodes': nodes, 'members': members,
+        'supports': [dict(pinned, nodeId=f'{c}{i}') for c in corners for i in (0, 10)],
+        'loads': [{'nodeId': f'c{i}', 'fy': -20000.0, 'fz': 3000.0} for i in range(1, 10)],
+        'config': {'truss': True},
+    }
+    fast = build_solver(model)
+    fast.truss = True
+    result = fast.solve()
+    assert result['solverInfo']['elementType'] == 'truss', result['solverInfo']
+    
+    # Reference: the same members through the 12x12 frame kernels
+    frame = build_solver(model)
+    frame.truss = True
+    released = frame._get_elements().released
+    frame.truss = False
+    assert released[:, [3, 4, 5, 10, 11]].all()
+    expected = frame.solve()
+    assert 'elementType' not in expected['solverInfo']
+    assert result['solverInfo']['inactiveDofs'] == expected['solverInfo']['inactiveDofs']
+    for key in ('displacements', 'reactions'):
+        error = abs(np.array(result[key]) - np.array(expected[key])).max()
+        assert error <= 1e-9 * abs(np.array(expected[key])).max(), (key, error)
+    u = np.array(result['displacements'])
+    forces = fast._member_end_forces(u)
+    reference = frame._member_end_forces(u)
+    assert abs(forces - reference).max() <= 1e-9 * abs(reference).max()
+    assert fast._assemble_global_stiffness().nnz < frame._assemble_global_stiffness().nnz
+    
+    # Detected from the releases alone, through the CLI
+    releases = {'startMomentY': True, 'startMomentZ': True, 'startTorsion': True,
+                'endMomentY': True, 'endMomentZ': True}
+    detected = solve_model(dict(model, config={}, members=[dict(m, releases=releases) for m in members]),
+                           'truss_detected')
+    assert detected['solverInfo']['elementType'] == 'truss', detected['solverInfo']
+    error = abs(np.array(detected['displacements']) - u).max()
+    assert error <= 1e-9 * abs(u).max(), error
+    print(f"  {len(members)} bars, {result['matrixStats']['nnz']} nonzeros "
+          f"({expected['matrixStats']['nnz']} as frames)")
+
+
+def check_plane_frame():
+    """Models in the xy-plane use plane-frame elements with the 3D results."""
+    section = {'E': 200e9, 'A': 0.01, 'Iy': 2e-5, 'Iz': 8e-5, 'G': 80e9, 'J': 1e-5}
+    nodes, members = [], []
+    for level in range(4):
+        nodes += [{'id': f'n{level}_{i}', 'x': 5.0 * i + 0.2 * level, 'y': 3.5 * level, 'z': 0}
+                  for i in range(4)]
+        if level:
+            members += [dict(section, id=f'c{level}_{i}', startNodeId=f'n{level-1}_{i}',
+                             endNodeId=f'n{level}_{i}') for i in range(4)]
+            members += [dict(section, id=f'b{level}_{i}', startNodeId=f'n{level}_{i}',
+                             endNodeId=f'n{level}_{i+1}', beta=np.pi if i == 1 else 0.0)
+                        for i in range(3)]
+    members[4]['releases'] = {'startMomentZ': True, 'endMomentZ': True}
+    fixed = {'dx': True, 'dy': True, 'dz': True, 'rx': True, 'ry': True, 'rz': True}
+    model = {
+        'nodes': nodes, 'members': members,
+        'supports': [dict(fixed, nodeId=f'n0_{i}') for i in range(4)],
+        'loads': [{'nodeId': f'n{level}_0', 'fx': 15000.0 * level, 'mz': 2000.0} for level in range(1, 4)]
+                 + [{'nodeId': 'n3_2', 'fy': -40000.0}],
+    }
+    plane = build_solver(model)
+    result = plane.solve()
+    assert result['solverInfo']['elementType'] == 'plane', result['solverInfo']
+    
+    frame = build_solver(model)
+    frame.planar = False
+    expected = frame.solve()
+    assert 'elementType' not in expected['solverInfo']
+    for key in ('displacements', 'reactions'):
+        error = abs(np.array(result[key]) - np.array(expected[key])).max()
+        assert error <= 1e-9 * abs(np.array(expected[key])).max(), (key, error)
+    u = np.array(result['displacements'])
+    forces = plane._member_end_forces(u)
+    reference = frame._member_end_forces(u)
+    assert abs(forces - reference).max() <= 1e-9 * abs(reference).max()
+    assert result['matrixStats']['nnz'] < expected['matrixStats']['nnz'] / 2
+    
+    # Low-rank member updates stay in the plane formulation
+    updated = plane.update_members({'b2_1': {'Iz': 2e-4}, 'c1_0': {'releases': {}}})
+    assert updated['solverInfo']['method'] == 'incremental-woodbury', updated['solverInfo']
+    frame.update_members({'b2_1': {'Iz': 2e-4}, 'c1_0': {'releases': {}}})
+    check = frame.solve()
+    error = abs(np.array(updated['displacements']) - np.array(check['displacements'])).max()
+    assert error <= 1e-9 * abs(np.array(check['displacements'])).max(), error
+    
+    # Typical 2D input: supports restrain only in-plane DOFs; out-of-plane
+    # loads fall back to the full formulation
+    planar_supports = [{'nodeId': f'n0_{i}', 'dx': True, 'dy': True, 'rz': True} for i in range(4)]
+    result_2d = solve_model(dict(model, supports=planar_supports), 'plane_frame_2d')
+    assert result_2d['solverInfo']['elementType'] == 'plane'
+    assert result_2d['nodalDisplacements']['n3_2']['dz'] == 0.0
+    error = abs(np.array(result_2d['displacements']) - u).max()
+    assert error <= 1e-9 * abs(u).max(), error
+    out_of_plane = dict(model, loads=model['loads'] + [{'nodeId': 'n3_3', 'fz': 500.0}])
+    assert 'elementType' not in build_solver(out_of_plane).solve()['solverInfo']
+    print(f"  {result['matrixStats']['nnz']} nonzeros in plane, "
+          f"{expected['matrixStats']['nnz']} in 3D")
+
+
+def check_symmetry():
+    """Mirror-symmetric models solve a half or quarter model with the full results."""
+    def compare(model, planes):
+        symmetric = build_solver(model)
+        result = symmetric.solve(use_iterative=False)
+        full = build_solver(model)
+        full.symmetry = False
+        expected = full.solve(use_iterative=False)
+        info = result['solverInfo'].get('symmetry')
+        assert [(p['axis'], p['loads']) for p in info['planes']] == planes, info
+        assert info['residual'] < 1e-10, info
+        for key in ('displacements', 'reactions'):
+            error = abs(np.array(result[key]) - np.array(expected[key])).max()
+            assert error <= 1e-9 * abs(np.array(expected[key])).max(), (key, error)
+        return symmetric, info, len(expected['displacements']) - 6 * 36
+    
+    # Lateral plus gravity loads: symmetric about z only, a half model
+    model = generate_grid_model(6, 6, storeys=4)
+    solver, info, free = compare(model, [('z', 'symmetric')])
+    assert info['equations'] == free // 2, (info['equations'], free)
+    
+    # Updates after a symmetric solve factor the whole model once
+    updated = solver.update_members({'c1_0_0': {'Iz': 3e-4}})
+    assert updated['solverInfo']['method'] == 'incremental-woodbury', updated['solverInfo']
+    
+    # Gravity only: a quarter model; lateral only: antisymmetric about x
+    gravity = dict(model, loads=[dict(load, fx=0.0) for load in model['loads']])
+    _, info, _ = compare(gravity, [('x', 'symmetric'), ('z', 'symmetric')])
+    assert info['equations'] < free // 4 + 6 * 5 * 4, info
+    lateral = dict(model, loads=[dict(load, fy=0.0) for load in model['loads']])
+    compare(lateral, [('x', 'antisymmetric'), ('z', 'symmetric')])
+    
+    # Unsymmetric loads or properties solve the whole model
+    uneven = dict(gravity, loads=gravity['loads'] + [{'nodeId': 'n4_0_0', 'fy': -1.0}])
+    assert 'symmetry' not in build_solver(uneven).solve()['solverInfo']
+    members = [dict(m, Iz=2e-4) if m['id'] == 'bz2_1_3' else m for m in model['members']]
+    result = build_solver(dict(gravity, members=members)).solve()
+    assert [p['axis'] for p in result['solverInfo']['symmetry']['planes']] == ['z']
+    print(f"  Quarter model: {info['equations']} of {free} equations, "
+          f"residual {info['residual']:.1e}")
+
+
+def check_matrix_free():
+    """Matrix-free element-by-element CG matches the assembled direct solve."""
+    import solver
+    def compare(model, **options):
+        reference = build_solver(model)
+        reference.symmetry = False
+        expected = reference.solve(use_iterative=False)
+        result = build_solver(model).solve(matrix_free=True, tolerance=1e-12,
+                                           max_iterations=20000, **options)
+        info = result['solverInfo']
+        assert info['method'] == 'matrix-free-cg' and info['converged'], info
+        for key in ('displacements', 'reactions'):
+            error = abs(np.array(result[key]) - np.array(expected[key])).max()
+            assert error <= 1e-8 * abs(np.array(expected[key])).max(), (key, error)
+        return info
+    
+    # Repeated members: a few shared element matrices
+    info = compare(generate_grid_model(6, 6, storeys=4))
+    assert info['preconditioner'] == 'block-jacobi', info
+    assert info['operatorMB'] < 0.5, info
+    assert compare(generate_grid_model(4, 4, storeys=2), preconditioner='jacobi')['preconditioner'] == 'jacobi'
+    
+    # Distinct members: one stored matrix per element; plus releases
+    model = generate_grid_model(8, 8, storeys=3)
+    for i, node in enumerate(model['nodes']):
+        node['x'] += 0.01 * (i % 7)
+    model['members'][5]['releases'] = {'endMomentZ': True, 'endMomentY': True}
+    compare(model)
+    
+    # Block-Jacobi also preconditions the assembled CG
+    result = build_solver(model).solve(use_iterative=True, preconditioner='block-jacobi', tolerance=1e-12)
+    assert result['solverInfo']['converged'], result['solverInfo']
+    
+    # Multi-point constraints need the assembled system
+    constrained = dict(model, constraints=[{'type': 'diaphragm', 'plane': 'xz',
+                                            'nodeIds': [f'n1_{i}_0' for i in range(8)]}])
+    try:
+        build_solver(constrained).solve(matrix_free=True)
+        assert False, "constraints accepted"
+    except solver.SolverError as e:
+        assert 'constraints' in e.error
+    print(f"  {info['iterations']} block-Jacobi iterations, operator {info['operatorMB']:.2f} MB")
+
+
+def check_block_storage():
+    """Skew frames assemble in 6x6 block storage and solve as the scalar matrix does."""
+    import solver
+    model = generate_grid_model(5, 5, storeys=3)
+    c, s = np.cos(0.4), np.sin(0.4)
+    rotation = np.array([[c, -s, 0], [s, c, 0], [0, 0, 1]]) @ np.array([[1, 0, 0], [0, c, -s], [0, s, c]])
+    for node in model['nodes']:
+        node['x'], node['y'], node['z'] = map(float, rotation @ [node['x'], node['y'], node['z']])
+    
+    blocked = build_solver(model)
+    K = blocked._assemble_global_stiffness()
+    assert K.format == 'bsr' and K.blocksize == (6, 6), K.format
+    scalar = solver.SparseAssembler(blocked.num_dofs)
+    elements = blocked._get_elements()
+    scalar.add_elements(*blocked._assembly_blocks(elements, slice(0, len(elements)), 'frame'))
+    K_scalar = scalar.to_csr()
+    assert abs(K - K_scalar).max() <= 1e-9 * abs(K_scalar).max()
+    assert K.indices.nbytes * 20 < K_scalar.indices.nbytes
+    
+    system = blocked._reduce_system(K, blocked._build_force_vector())
+    assert isinstance(system.K_reduced, solver.BlockReducedMatrix)
+    free = system.free_dofs
+    x = np.random.default_rng(0).standard_normal((len(free), 2))
+    assert np.allclose(system.K_reduced @ x, K_scalar[free][:, free] @ x)
+    assert abs(system.K_reduced.tocsr() - K_scalar[free][:, free]).max() <= 1e-9 * abs(K_scalar).max()
+    
+    direct = build_solver(model).solve(use_iterative=False)
+    iterative = build_solver(model).solve(use_iterative=True, preconditioner='block-jacobi',
+                                          tolerance=1e-12)
+    assert direct['matrixStats']['format'] == 'bsr', direct['matrixStats']
+    assert iterative['solverInfo']['converged'], iterative['solverInfo']
+    u = np.array(direct['displacements'])
+    assert abs(np.array(iterative['displacements']) - u).max() <= 1e-8 * abs(u).max()
+    
+    # Axis-aligned members leave the blocks mostly empty: scalar CSR
+    aligned = build_solver(generate_grid_model(5, 5, storeys=3)).solve()
+    assert aligned['matrixStats']['format'] == 'csr', aligned['matrixStats']
+    print(f"  index {direct['matrixStats']['indexMB'] * 1024:.1f} KB in blocks, "
+          f"{K_scalar.indices.nbytes / 1024:.1f} KB scalar")
+
+
+def check_active_set():
+    """Tension-only bracing and uplift-free supports match the equivalent linear models."""
+    import solver
+    section = {'E': 200e9, 'A': 0.01, 'Iy': 1e-4, 'Iz': 1e-4, 'G': 80e9, 'J': 1.5e-4}
+    fixed = {'dx': True, 'dy': True, 'dz': True, 'rx': True, 'ry': True, 'rz': True}
+    pinned = {'startMomentY': True, 'startMomentZ': True, 'startTorsion': True,
+              'endMomentY': True, 'endMomentZ': True}
+    
+    # Two-bay portal with X-bracing in both bays, pushed sideways
+    nodes = [{'id': f'{level}{i}', 'x': 4.0 * i, 'y': 3.0 * (level == 't'), 'z': 0}
+             for level in 'bt' for i in range(3)]
+    members = [dict(section, id=f'c{i}', startNodeId=f'b{i}', endNodeId=f't{i}') for i in range(3)]
+    members += [dict(section, id=f'g{i}', startNodeId=f't{i}', endNodeId=f't{i + 1}') for i in range(2)]
+    braces = [dict(section, id=f'x{i}{d}', startNodeId=f'b{i + (d == "r")}',
+                   endNodeId=f't{i + (d == "l")}', A=0.002, releases=pinned, tensionOnly=True)
+              for i in range(2) for d in 'lr']
+    frame = {'nodes': nodes, 'members': members + braces,
+             'supports': [dict(fixed, nodeId=f'b{i}') for i in range(3)],
+             'loads': [{'nodeId': 't0', 'fx': 50000.0}, {'nodeId': 't1', 'fy': -20000.0}]}
+    result = solver.analyze(frame)
+    states = result['solverInfo']['activeSet']
+    assert states['converged'] and states['refactorizations'] == 0, states
+    inactive = [m['id'] for m in states['members'] if not m['active']]
+    assert sorted(inactive) == ['x0r', 'x1r'], inactive
+    assert all(m['axialForce'] > 0 for m in states['members'] if m['active'])
+    assert all(step['method'] == 'woodbury' for step in states['history'])
+    reference = solver.analyze(dict(frame, members=[m for m in frame['members']
+                                                    if m['id'] not in inactive]))
+    u = np.array(reference['displacements'])
+    assert abs(np.array(result['displacements']) - u).max() <= 1e-9 * abs(u).max()
+    
+    # Two-span beam loaded on one span: the far end would hold the beam down
+    beam = {
+        'nodes': [{'id': f'n{i}', 'x': 3.0 * i, 'y': 0, 'z': 0} for i in range(5)],
+        'members': [dict(section, id=f'm{i}', startNodeId=f'n{i}', endNodeId=f'n{i + 1}')
+                    for i in range(4)],
+        'supports': [dict(fixed, nodeId='n0', rz=False), {'nodeId': 'n2', 'dy': True, 'dz': True},
+                     {'nodeId': 'n4', 'compressionOnly': ['dy'], 'dz': True}],
+        'loads': [{'nodeId': 'n1', 'fy': -10000.0}],
+    }
+    result = solver.analyze(beam)
+    support = result['solverInfo']['activeSet']['supports'][0]
+    assert not support['engaged'] and result['nodalDisplacements']['n4']['dy'] > 0, support
+    free_end = dict(beam, supports=beam['supports'][:2] + [{'nodeId': 'n4', 'dz': True}])
+    reference = solver.analyze(dict(free_end, config={'activeSet': False}))
+    u = np.array(reference['displacements'])
+    assert abs(np.array(result['displacements']) - u).max() <= 1e-9 * abs(u).max()
+    assert result['nodalReactions']['n2']['fy'] > 0
+    
+    # A downward load on the far span keeps the bearing engaged
+    held = solver.analyze(dict(beam, loads=beam['loads'] + [{'nodeId': 'n3', 'fy': -30000.0}]))
+    support = held['solverInfo']['activeSet']['supports'][0]
+    assert support['engaged'] and support['reaction'] > 0, support
+    
+    # config.activeSet = false analyzes the flagged members as linear ones
+    linear = solver.analyze(dict(frame, config={'activeSet': False}))
+    assert 'activeSet' not in linear['solverInfo']
+    print(f"  Bracing: {states['iterations']} iterations, inactive {inactive}; "
+          f"uplift at n4: {result['nodalDisplacements']['n4']['dy']:.2e}")
+
+
+def check_time_history():
+    """Newmark time history of a cantilever with a tip mass against the exact SDOF response."""
+    import solver
+    section = {'E': 200e9, 'A': 0.01, 'Iy': 1e-4, 'Iz': 1e-4, 'G': 80e9, 'J': 1.5e-4}
+    L, mass, F = 3.0, 1000.0, 10000.0
+    k = 3 * section['E'] * section['Iz'] / L ** 3
+    omega = np.sqrt(k / mass)
+    period = 2 * np.pi / omega
+    dt = period / 200
+    model = {
+        'nodes': [{'id': 'a', 'x': 0, 'y': 0, 'z': 0}, {'id': 'b', 'x': L, 'y': 0, 'z': 0}],
+        'members': [dict(section, id='m', startNodeId='a', endNodeId='b')],
+        'supports': [{'nodeId': 'a', 'dx': True, 'dy': True, 'dz': True,
+                      'rx': True, 'ry': True, 'rz': True}],
+        'loads': [{'nodeId': 'b', 'fy': F}],
+    }
+    # Suddenly applied load on a massless beam: u = F/k (1 - cos wt)
+    history = {'dt': dt, 'steps': 400, 'density': 0.0, 'masses': [{'nodeId': 'b', 'mass': mass}],
+               'loads': [{'time': [0.0, 1.0], 'factor': [1.0, 1.0]}]}
+    frames = []
+    result = solver.analyze(dict(model, timeHistory=history),
+                            frame_callback=lambda t, u: frames.append((t, u['b'][1])))
+    th = result['timeHistory']
+    times = np.array([t for t, _ in frames])
+    u_tip = np.array([u for _, u in frames])
+    exact = F / k * (1 - np.cos(omega * times))
+    # Trapezoidal rule only shifts the period, by (w dt)^2 / 12
+    assert len(frames) == 401 and th['output']['frames'] == 401, th['output']
+    assert abs(u_tip - exact).max() <= 0.01 * 2 * F / k, abs(u_tip - exact).max()
+    assert abs(th['peakDisplacements']['b']['dy'] - 2 * F / k) <= 1e-4 * F / k
+    assert abs(th['totalMass']['fy'] - mass) <= 1e-9 * mass
+    
+    # A ground acceleration is the load -m a_g on the relative displacements
+    ground = dict(history, loads=[], groundMotion={'direction': 'dy', 'time': [0.0, 1.0],
+                                                    'acceleration': [-F / mass] * 2})
+    relative = solver.analyze(dict(model, loads=[], timeHistory=ground))['timeHistory']
+    assert abs(relative['peakDisplacements']['b']['dy'] - th['peakDisplacements']['b']['dy']) \
+        <= 1e-9 * F / k
+    
+    # Heavy damping settles onto the static deflection; output every 10th step to CSV
+    with tempfile.TemporaryDirectory() as tmp:
+        path = str(Path(tmp) / 'frames.csv')
+        damped = dict(history, steps=2000, damping={'ratio': 0.2, 'frequencies': [1 / period] * 2},
+                      output={'every': 10, 'nodeIds': ['b'], 'file': path})
+        result = solver.analyze(dict(model, timeHistory=damped))['timeHistory']
+        with open(path) as f:
+            rows = f.read().splitlines()
+    assert len(rows) == 1 + 1 + 2000 // 10, len(rows)
+    final = float(rows[-1].split(',')[rows[0].split(',').index('b:dy')])
+    assert abs(final - F / k) <= 1e-3 * F / k, (final, F / k)
+    assert result['output'] == {'frames': 201, 'file': path, 'every': 10}, result['output']
+    print(f"  SDOF T = {period * 1000:.1f} ms, peak {th['peakDisplacements']['b']['dy']:.3e} m "
+          f"(2F/k = {2 * F / k:.3e}), {th['stepMs']:.3f} ms/step")
+
+
+def check_response_spectrum():
+    """Modal response spectrum: exact for a single mass, Lanczos matches dense, CQC matches its double sum."""
+    import solver
+    section = {'E': 200e9, 'A': 0.01, 'Iy': 1e-4, 'Iz': 1e-4, 'G': 80e9, 'J': 1.5e-4}
+    L, mass, Sa = 3.0, 1000.0, 2.0
+    k = 3 * section['E'] * section['Iz'] / L ** 3
+    cantilever = {
+        'nodes': [{'id': 'a', 'x': 0, 'y': 0, 'z': 0}, {'id': 'b', 'x': L, 'y': 0, 'z': 0}],
+        'members': [dict(section, id='m', startNodeId='a', endNodeId='b')],
+        'supports': [{'nodeId': 'a', 'dx': True, 'dy': True, 'dz': True,
+                      'rx': True, 'ry': True, 'rz': True}],
+        'loads': [],
+        'responseSpectrum': {'density': 0.0, 'masses': [{'nodeId': 'b', 'mass': mass}],
+                             'spectrum': {'period': [0.0, 10.0], 'acceleration': [Sa, Sa]},
+                             'directions': [{'direction': 'dy'}]},
+    }
+    rs = solver.analyze(cantilever)['responseSpectrum']
+    assert abs(rs['modes'][0]['period'] - 2 * np.pi * np.sqrt(mass / k)) <= 1e-9
+    assert abs(rs['nodalDisplacements']['b']['dy'] - mass * Sa / k) <= 1e-9 * mass * Sa / k
+    assert abs(rs['baseShear']['fy'] - mass * Sa) <= 1e-9 * mass * Sa
+    assert abs(rs['nodalReactions']['a']['mz'] - mass * Sa * L) <= 1e-9 * mass * Sa * L
+    assert abs(rs['cumulativeMassRatio']['dy'] - 1) <= 1e-12
+    
+    # Lanczos against the dense eigensolver on a building with close x/z modes
+    spectrum = {'modes': 40, 'spectrum': {'period': [0.0, 0.5, 4.0], 'acceleration': [5.0, 10.0, 1.0]},
+                'directions': [{'direction': 'dx'}, {'direction': 'dz', 'scale': 0.3}]}
+    building = dict(generate_grid_model(6, 6, 4), responseSpectrum=spectrum)
+    lanczos = solver.analyze(building)['responseSpectrum']
+    dense_size = solver.DENSE_EIGEN_SIZE
+    solver.DENSE_EIGEN_SIZE = 10 ** 6
+    try:
+        dense = solver.analyze(building)['responseSpectrum']
+    finally:
+        solver.DENSE_EIGEN_SIZE = dense_size
+    assert lanczos['eigenSolver'] == 'lanczos' and dense['eigenSolver'] == 'dense'
+    periods = [np.array([mode['period'] for mode in r['modes']]) for r in (lanczos, dense)]
+    assert abs(periods[0] - periods[1]).max() <= 1e-9 * periods[1].max()
+    u = [np.array(r['displacements']) for r in (lanczos, dense)]
+    assert abs(u[0] - u[1]).max() <= 1e-8 * u[1].max()
+    srss = solver.analyze(dict(building, responseSpectrum=dict(spectrum, combination='srss')))
+    assert lanczos['baseShear']['fx'] != srss['responseSpectrum']['baseShear']['fx']
+    
+    # Blocked combination against the explicit double sum over modes
+    rng = np.random.default_rng(3)
+    omega = np.sort(rng.uniform(5, 50, 30))
+    X, Q = rng.standard_normal((7, 30)), rng.standard_normal((2, 30))
+    rho = solver.cqc_correlation(omega, 0.05)
+    assert np.allclose(np.diag(rho), 1) and np.allclose(rho, rho.T)
+    explicit = np.sqrt([[sum(X[r, i] * Q[d, i] * rho[i, j] * Q[d, j] * X[r, j]
+                             for i in range(30) for j in range(30)) for d in range(2)]
+                        for r in range(7)])
+    assert np.allclose(solver.combine_modal_responses(X, Q, rho), explicit)
+    print(f"  T1 = {periods[0][0]:.3f} s, {len(periods[0])} modes, mass ratio x "
+          f"{lanczos['cumulativeMassRatio']['dx']:.3f}; eigen {lanczos['eigenMs']:.0f} ms, "
+          f"CQC {lanczos['combinationMs']:.0f} ms")
+
+
+def check_pushover():
+    """Pushover of a fixed portal reaches the plastic sway mechanism load 4 Mp / h."""
+    import solver
+    Mp, h, span = 1e5, 4.0, 6.0
+    section = {'E': 200e9, 'A': 0.01, 'Iy': 1e-4, 'Iz': 1e-4, 'G': 80e9, 'J': 1.5e-4,
+               'plasticMoment': Mp}
+    fixed = {'dx': True, 'dy': True, 'dz': True, 'rx': True, 'ry': True, 'rz': True}
+    portal = {
+        'nodes': [{'id': 'a', 'x': 0, 'y': 0, 'z': 0}, {'id': 'b', 'x': 0, 'y': h, 'z': 0},
+                  {'id': 'c', 'x': span, 'y': h, 'z': 0}, {'id': 'd', 'x': span, 'y': 0, 'z': 0}],
+        'members': [dict(section, id='left', startNodeId='a', endNodeId='b'),
+                    dict(section, id='beam', startNodeId='b', endNodeId='c'),
+                    dict(section, id='right', startNodeId='d', endNodeId='c')],
+        'supports': [dict(fixed, nodeId='a'), dict(fixed, nodeId='d')],
+        'loads': [{'nodeId': 'b', 'fx': 1000.0, 'case': 'lateral'},
+                  {'nodeId': 'b', 'fy': -20000.0, 'case': 'dead'},
+                  {'nodeId': 'c', 'fy': -20000.0, 'case': 'dead'}],
+        'pushover': {'controlNodeId': 'c', 'controlDof': 'dx', 'case': 'lateral', 'gravityCase': 'dead'},
+    }
+    result = solver.analyze(portal)
+    pushover = result['pushover']
+    assert pushover['termination'] == 'mechanism', pushover['termination']
+    collapse = 4 * Mp / h / 1000.0
+    assert abs(pushover['curve'][-1]['loadFactor'] - collapse) <= 1e-9 * collapse
+    assert len(pushover['hinges']) == 6 and pushover['refactorizations'] == 0
+    assert all(abs(abs(hinge['moment']) - Mp) <= 1e-9 * Mp for hinge in pushover['hinges'])
+    factors = [point['loadFactor'] for point in pushover['curve']]
+    assert factors == sorted(factors)
+    # Hinges are restored afterwards: the main solve is untouched
+    assert solver.analyze(dict(portal, pushover=None))['displacements'] == result['displacements']
+    
+    # Refactoring at every event gives the same curve as the low-rank updates
+    model = solver.StructuralSolver(*solver.parse_input(portal))
+    refactored = model.pushover_analysis(solver.parse_pushover(portal), max_rank=0)
+    # Every event after the first, and the attempt that finds the mechanism
+    assert refactored['refactorizations'] == pushover['events']
+    assert np.allclose([p['displacement'] for p in refactored['curve']],
+                       [p['displacement'] for p in pushover['curve']], rtol=1e-9)
+    
+    # A target displacement stops the push part-way
+    target = pushover['curve'][2]['displacement'] / 2 + pushover['curve'][3]['displacement'] / 2
+    stopped = solver.analyze(dict(portal, pushover=dict(portal['pushover'], targetDisplacement=target)))
+    assert stopped['pushover']['termination'] == 'target'
+    assert abs(stopped['pushover']['curve'][-1]['displacement'] - target) <= 1e-12
+    assert len(stopped['pushover']['hinges']) == pushover['curve'][2]['hinges']
+    print(f"  Collapse load factor {pushover['curve'][-1]['loadFactor']:.3f} (4 Mp/h: {collapse:.3f}), "
+          f"{pushover['events']} events, {pushover['woodburyUpdates']} low-rank updates")
+
+
+def check_parallel_kernels():
+    """Row-chunked products and preconditioners match the serial kernels; CG reports speedups."""
+    import solver
+    from concurrent.futures import ThreadPoolExecutor
+    model = generate_grid_model(6, 6, storeys=3)
+    c, s = np.cos(0.4), np.sin(0.4)
+    rotation = np.array([[c, -s, 0], [s, c, 0], [0, 0, 1]]) @ np.array([[1, 0, 0], [0, c, -s], [0, s, c]])
+    for node in model['nodes']:
+        node['x'], node['y'], node['z'] = map(float, rotation @ [node['x'], node['y'], node['z']])
+    
+    skew = build_solver(model)
+    system = skew._reduce_system(skew._assemble_global_stiffness(), skew._build_force_vector())
+    K_blocked, K_scalar = system.K_reduced, system.K_reduced.tocsr()
+    x = np.random.default_rng(0).standard_normal(K_scalar.shape[0])
+    coo = K_scalar.tocoo()
+    serial_M = solver.block_jacobi(coo.row, coo.col, coo.data, system.free_dofs)
+    with ThreadPoolExecutor(4) as pool:
+        for chunks in (2, 3, 7):
+            assert np.allclose(solver.parallel_matvec(K_scalar, pool, chunks)(x), K_scalar @ x)
+            assert np.allclose(K_blocked.parallel_matvec(pool, chunks)(x), K_scalar @ x)
+            parallel_M = solver.block_jacobi(coo.row, coo.col, coo.data, system.free_dofs,
+                                             pool=pool, chunks=chunks)
+            assert np.allclose(parallel_M.matvec(x), serial_M.matvec(x))
+    bounds = solver.balanced_chunks(K_scalar.indptr, 4)
+    entries = np.diff(K_scalar.indptr[bounds])
+    assert bounds[0] == 0 and bounds[-1] == K_scalar.shape[0] and entries.max() < 1.5 * entries.mean()
+    
+    # CG with threads: same solution, each kernel timed serially and in parallel
+    minimum = solver.PARALLEL_MIN_CHUNK_WORK
+    solver.PARALLEL_MIN_CHUNK_WORK = 100
+    try:
+        serial = build_solver(model).solve(use_iterative=True, preconditioner='block-jacobi',
+                                           tolerance=1e-12)
+        threaded = build_solver(model).solve(use_iterative=True, preconditioner='block-jacobi',
+                                             tolerance=1e-12, threads=4)
+    finally:
+        solver.PARALLEL_MIN_CHUNK_WORK = minimum
+    info = threaded['solverInfo']['parallel']
+    assert info['threads'] == 4 and 'parallel' not in serial['solverInfo']
+    for kernel in ('matvec', 'preconditioner'):
+        assert info[kernel]['chunks'] == 4 and info[kernel]['speedup'] > 0, info
+        assert info[kernel]['used'] == (info[kernel]['parallelMs'] < info[kernel]['serialMs'])
+    u = np.array(serial['displacements'])
+    assert abs(np.array(threaded['displacements']) - u).max() <= 1e-8 * abs(u).max()
+    assert solver.resolve_threads('auto') >= 1
+    print(f"  4 threads: matvec x{info['matvec']['speedup']:.2f}, "
+          f"block-Jacobi x{info['preconditioner']['speedup']:.2f}")
+
+
+def check_benchmark_suite():
+    """Benchmark generators and runner produce consistent result files."""
+    import benchmark
+    with contextlib.redirect_stdout(io.StringIO()):
+        records = benchmark.run_benchmarks(['grid', 'tower', 'truss'], [300],
+                                           ['direct', 'cg-jacobi'], trace_memory=True)
+    assert len(records) == 6, records
+    for record in records:
+        assert record['success'], record
+        assert record['peakTracedMB'] > 0 and record['totalMs'] > 0, record
+        if record['path'] == 'direct':
+            assert record['relativeResidual'] < 1e-9, record
+    
+    with tempfile.TemporaryDirectory() as output_dir:
+        json_path = benchmark.write_results(records, Path(output_dir))
+        saved = json.loads(json_path.read_text())
+        assert saved['results'] == json.loads(json.dumps(records))
+        with open(json_path.with_suffix('.csv')) as f:
+            assert len(list(csv.DictReader(f))) == len(records)
+    print(f"  {len(records)} cases, nodes: {sorted({r['nodes'] for r in records})}")
+
+
+def check_incremental_update():
+    """Woodbury re-solve after resizing a few members matches a full solve."""
+    model = generate_grid_model(8, 8, storeys=3)
+    updates = {
+        'c1_3_3': {'A': 0.02, 'Iy': 3e-4, 'Iz': 3e-4},
+        'bx2_4_4': {'Iz': 5e-5, 'releases': {'startMomentZ': True}},
+        'bz3_2_5': {'E': 70e9, 'beta': 0.3},
+    }
+    
+    solver = build_solver(model)
+    solver.solve()
+    start = time.perf_counter()
+    result = solver.update_members(updates)
+    elapsed = (time.perf_counter() - start) * 1000
+    assert result['solverInfo']['method'] == 'incremental-woodbury', result['solverInfo']
+    
+    reference = build_solver(model)
+    reference.update_members(updates)  # Applies the changes, then solves
+    expected = reference.system.expand(reference.u_reduced)
+    u = np.array(result['displacements'])
+    error = abs(u - expected).max() / abs(expected).max()
+    assert error < 1e-9, error
+    print(f"  {len(updates)}-member update: {elapsed:.1f}ms, relative error {error:.1e}")
+    
+    # Beyond the rank threshold the updated matrix is refactored
+    changes = {m['id']: {'Iz': 2e-4} for m in model['members'][:40]}
+    result = solver.update_members(changes, max_rank=16)
+    assert result['solverInfo']['method'] == 'incremental-refactor', result['solverInfo']
+    reference = build_solver(model)
+    reference.update_members(dict(updates, **{k: dict(updates.get(k, {}), **v)
+                                              for k, v in changes.items()}))
+    error = abs(solver.u_reduced - reference.u_reduced).max() / abs(reference.u_reduced).max()
+    assert error < 1e-9, error
+    print(f"  {len(changes)}-member update refactored, relative error {error:.1e}")
+
+
 def main():
     """Run all tests."""
     print("\n" + "="*60)
@@ -192,6 +1337,33 @@ def main():
     # Test 4: Large stress test (threshold for cloud)
     results.append(run_stress_test(2000))
     
+    # Feature tests
+    results.append(run_feature_test('Coincident node merging', check_node_merging))
+    results.append(run_feature_test('Rigid diaphragm constraint', check_rigid_diaphragm))
+    results.append(run_feature_test('Member end releases', check_member_releases))
+    results.append(run_feature_test('Incremental low-rank re-solve', check_incremental_update))
+    results.append(run_feature_test('Moving load influence lines', check_moving_load))
+    results.append(run_feature_test('Adjoint sensitivities', check_adjoint_sensitivity))
+    results.append(run_feature_test('Section sizing optimization', check_section_sizing))
+    results.append(run_feature_test('Benchmark suite', check_benchmark_suite))
+    results.append(run_feature_test('Profiling hooks', check_profiling))
+    results.append(run_feature_test('Library API', check_library_api))
+    results.append(run_feature_test('Mixed precision', check_mixed_precision))
+    results.append(run_feature_test('Out-of-core solve', check_out_of_core))
+    results.append(run_feature_test('Checkpoint and resume', check_checkpoint_resume))
+    results.append(run_feature_test('Load combinations', check_load_combinations))
+    results.append(run_feature_test('Element stiffness cache', check_element_cache))
+    results.append(run_feature_test('Truss fast path', check_truss_fast_path))
+    results.append(run_feature_test('Plane frame fast path', check_plane_frame))
+    results.append(run_feature_test('Mirror symmetry', check_symmetry))
+    results.append(run_feature_test('Matrix-free solve', check_matrix_free))
+    results.append(run_feature_test('Block sparse storage', check_block_storage))
+    results.append(run_feature_test('Tension/compression-only active set', check_active_set))
+    results.append(run_feature_test('Newmark time history', check_time_history))
+    results.append(run_feature_test('Response spectrum (CQC)', check_response_spectrum))
+    results.append(run_feature_test('Event-to-event pushover', check_pushover))
+    results.append(run_feature_test('Thread-parallel CG kernels', check_parallel_kernels))
+    
     # Summary
     print("\n" + "="*60)
     print("Test Summary")